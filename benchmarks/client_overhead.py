@@ -0,0 +1,525 @@
+"""Benchmark: what does smello.init() add to each outgoing call?
+
+Runs ``requests.Session.send``, ``httpx.Client.send``,
+``httpx.AsyncClient.send`` and gRPC unary calls against an in-process
+stub server, once without Smello and once after ``smello.init()``, for
+every combination of body size, header count and concurrency.  Each run
+happens in a fresh subprocess, so patching and allocator state never leak
+between them.  Captures go to a sink process that acknowledges batches
+without storing them.
+
+Reported per scenario:
+
+- p50 / p99 call latency without and with Smello, and the difference
+- process CPU per call, and the CPU used by Smello's transport thread
+- peak and retained traced memory (``tracemalloc``) over a batch of calls
+
+Usage:
+    uv run python benchmarks/client_overhead.py --output results.json
+    uv run python benchmarks/client_overhead.py --quick --compare results.json
+
+Prerequisites for the gRPC scenarios:
+    uv pip install grpcio protobuf
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LIBRARIES = ("requests", "httpx", "httpx-async", "grpc")
+BODY_SIZES = (256, 16 * 1024, 1024 * 1024)
+HEADER_COUNTS = (4, 32)
+CONCURRENCY = (1, 8)
+
+# The stub server listens on 127.0.0.1 and the sink on "localhost":
+# smello.init() ignores the sink's host, so the two must differ.
+_STUB_HOST = "127.0.0.1"
+_SINK_HOST = "localhost"
+_GRPC_METHOD = "/bench.Echo/Call"
+
+
+# ---------------------------------------------------------------------------
+# Servers
+# ---------------------------------------------------------------------------
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Echo a body of the same size as the request body."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        self.wfile.write(b"x" * length)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    """Acknowledge capture batches like the Smello server, without storing them."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.endswith("/batch"):
+            status = 200
+            data = json.dumps({"results": [{"status": "ok"}] * len(body["captures"])})
+        else:
+            status, data = 201, '{"status": "ok"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(handler, host: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run_sink(ports) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SinkHandler)
+    server.daemon_threads = True
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _serve_grpc():
+    import grpc  # noqa: PLC0415 -- optional dependency
+    from google.protobuf.wrappers_pb2 import BytesValue  # noqa: PLC0415
+
+    def call(request, context):
+        return BytesValue(value=b"x" * len(request.value))
+
+    handler = grpc.method_handlers_generic_handler(
+        "bench.Echo",
+        {
+            "Call": grpc.unary_unary_rpc_method_handler(
+                call,
+                request_deserializer=BytesValue.FromString,
+                response_serializer=BytesValue.SerializeToString,
+            )
+        },
+    )
+    server = grpc.server(ThreadPoolExecutor(max_workers=16))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port(f"{_STUB_HOST}:0")
+    server.start()
+    return server, port
+
+
+# ---------------------------------------------------------------------------
+# Clients: each returns a callable making one call, and a cleanup callable
+# ---------------------------------------------------------------------------
+
+
+def _headers(count: int) -> dict[str, str]:
+    return {f"x-bench-{i}": f"value-{i}" for i in range(count)}
+
+
+def _requests_client(url: str, body: bytes, headers: dict):
+    import requests  # noqa: PLC0415 -- optional dependency
+
+    local = threading.local()
+
+    def call():
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        session.post(url, data=body, headers=headers).content
+
+    return call, lambda: None
+
+
+def _httpx_client(url: str, body: bytes, headers: dict):
+    import httpx  # noqa: PLC0415 -- optional dependency
+
+    client = httpx.Client(limits=httpx.Limits(max_connections=64))
+
+    def call():
+        client.post(url, content=body, headers=headers).content
+
+    return call, client.close
+
+
+def _httpx_async_client(url: str, body: bytes, headers: dict):
+    import httpx  # noqa: PLC0415 -- optional dependency
+
+    client = httpx.AsyncClient(limits=httpx.Limits(max_connections=64))
+
+    async def call():
+        (await client.post(url, content=body, headers=headers)).content
+
+    return call, client.aclose
+
+
+def _grpc_client(target: str, body: bytes, headers: dict):
+    import grpc  # noqa: PLC0415 -- optional dependency
+    from google.protobuf.wrappers_pb2 import BytesValue  # noqa: PLC0415
+
+    channel = grpc.insecure_channel(target)
+    stub = channel.unary_unary(
+        _GRPC_METHOD,
+        request_serializer=BytesValue.SerializeToString,
+        response_deserializer=BytesValue.FromString,
+    )
+    message = BytesValue(value=body)
+    metadata = list(headers.items())
+
+    def call():
+        stub(message, metadata=metadata)
+
+    return call, channel.close
+
+
+# ---------------------------------------------------------------------------
+# Measurement (runs in a child process)
+# ---------------------------------------------------------------------------
+
+
+def _run_calls(call, count: int, concurrency: int, loop) -> list[float]:
+    """Make *count* calls, *concurrency* at a time; return each call's latency.
+
+    Coroutine functions run on *loop*, which must outlive the client.
+    """
+    if loop is not None:
+        return loop.run_until_complete(_run_async_calls(call, count, concurrency))
+
+    def timed(_):
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    if concurrency == 1:
+        return [timed(None) for _ in range(count)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, range(count)))
+
+
+async def _run_async_calls(call, count: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            return time.perf_counter() - start
+
+    return await asyncio.gather(*(timed() for _ in range(count)))
+
+
+def _transport_cpu() -> float | None:
+    """CPU seconds used so far by Smello's transport thread (Linux only)."""
+    for thread in threading.enumerate():
+        if thread.name == "smello-transport" and thread.native_id is not None:
+            try:
+                with open(f"/proc/self/task/{thread.native_id}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                return None
+            # utime and stime are fields 14 and 15 of the full line
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return None
+
+
+def _flush(patched: bool) -> None:
+    if patched:
+        import smello  # noqa: PLC0415
+
+        smello.flush(timeout=30)
+
+
+def _measure(spec: dict) -> list[dict]:
+    library = spec["library"]
+    patched = spec["mode"] == "patched"
+    if patched:
+        import smello  # noqa: PLC0415
+
+        smello.init(server_url=spec["sink_url"])
+
+    if library == "grpc":
+        server, port = _serve_grpc()
+        target = f"{_STUB_HOST}:{port}"
+        make_client = _grpc_client
+    else:
+        server = _serve(_StubHandler, _STUB_HOST)
+        target = f"http://{_STUB_HOST}:{server.server_address[1]}/echo"
+        make_client = {
+            "requests": _requests_client,
+            "httpx": _httpx_client,
+            "httpx-async": _httpx_async_client,
+        }[library]
+    loop = asyncio.new_event_loop() if library == "httpx-async" else None
+
+    results = []
+    for scenario in spec["scenarios"]:
+        body = b"x" * scenario["body_bytes"]
+        call, close = make_client(target, body, _headers(scenario["headers"]))
+        concurrency = scenario["concurrency"]
+
+        _run_calls(call, spec["warmup"], concurrency, loop)
+        _flush(patched)
+
+        worker_cpu = _transport_cpu()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        latencies = _run_calls(call, spec["iterations"], concurrency, loop)
+        _flush(patched)
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        if worker_cpu is not None:
+            worker_cpu = _transport_cpu() - worker_cpu
+
+        # Tracing slows everything down, so allocations get their own pass.
+        alloc_calls = max(20, spec["iterations"] // 5)
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        _run_calls(call, alloc_calls, concurrency, loop)
+        peak = tracemalloc.get_traced_memory()[1]
+        _flush(patched)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        if loop is not None:
+            loop.run_until_complete(close())
+        else:
+            close()
+
+        latencies.sort()
+        calls = spec["iterations"]
+        results.append(
+            {
+                **scenario,
+                "calls": calls,
+                "p50_us": _percentile(latencies, 50) * 1e6,
+                "p99_us": _percentile(latencies, 99) * 1e6,
+                "mean_us": statistics.fmean(latencies) * 1e6,
+                "calls_per_s": calls / wall,
+                "cpu_us_per_call": cpu / calls * 1e6,
+                "worker_cpu_us_per_call": (
+                    None if worker_cpu is None else worker_cpu / calls * 1e6
+                ),
+                "alloc_peak_kib": (peak - base) / 1024,
+                "alloc_retained_kib": (retained - base) / 1024,
+            }
+        )
+
+    if loop is not None:
+        loop.close()
+    if library == "grpc":
+        server.stop(None)
+    else:
+        server.shutdown()
+    return results
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+# ---------------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------------
+
+
+def _available(library: str) -> bool:
+    module = {"httpx-async": "httpx"}.get(library, library)
+    try:
+        __import__(module)
+        if library == "grpc":
+            __import__("google.protobuf.wrappers_pb2")
+    except ImportError:
+        return False
+    return True
+
+
+def _run_child(spec: dict) -> list[dict]:
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child"],
+        input=json.dumps(spec),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{spec['library']} ({spec['mode']}) failed:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+
+def _compare(baseline: dict, patched: dict) -> dict:
+    return {
+        "body_bytes": baseline["body_bytes"],
+        "headers": baseline["headers"],
+        "concurrency": baseline["concurrency"],
+        "added_p50_us": patched["p50_us"] - baseline["p50_us"],
+        "added_p99_us": patched["p99_us"] - baseline["p99_us"],
+        "added_cpu_us_per_call": (
+            patched["cpu_us_per_call"] - baseline["cpu_us_per_call"]
+        ),
+        "worker_cpu_us_per_call": patched["worker_cpu_us_per_call"],
+        "added_alloc_peak_kib": (
+            patched["alloc_peak_kib"] - baseline["alloc_peak_kib"]
+        ),
+        "alloc_retained_kib": patched["alloc_retained_kib"],
+        "baseline": baseline,
+        "patched": patched,
+    }
+
+
+def _key(result: dict) -> tuple:
+    return (
+        result["library"],
+        result["body_bytes"],
+        result["headers"],
+        result["concurrency"],
+    )
+
+
+def _print_table(results: list[dict], previous: dict[tuple, dict]) -> None:
+    header = (
+        f"{'library':<12} {'body':>8} {'hdrs':>4} {'conc':>4} "
+        f"{'+p50 us':>9} {'+p99 us':>9} {'+cpu us':>9} {'worker us':>9} "
+        f"{'+peak KiB':>9}"
+    )
+    if previous:
+        header += f" {'prev +p50':>9}"
+    print(header)
+    for r in results:
+        worker = r["worker_cpu_us_per_call"]
+        line = (
+            f"{r['library']:<12} {r['body_bytes']:>8} {r['headers']:>4} "
+            f"{r['concurrency']:>4} {r['added_p50_us']:>9.1f} "
+            f"{r['added_p99_us']:>9.1f} {r['added_cpu_us_per_call']:>9.1f} "
+            f"{'-' if worker is None else f'{worker:.1f}':>9} "
+            f"{r['added_alloc_peak_kib']:>9.1f}"
+        )
+        if previous:
+            old = previous.get(_key(r))
+            old_p50 = "-" if old is None else f"{old['added_p50_us']:.1f}"
+            line += f" {old_p50:>9}"
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--libraries", nargs="+", choices=LIBRARIES, default=LIBRARIES)
+    parser.add_argument("--body-sizes", nargs="+", type=int, default=BODY_SIZES)
+    parser.add_argument("--header-counts", nargs="+", type=int, default=HEADER_COUNTS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=CONCURRENCY)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="one body size, header count and concurrency level; 100 calls each",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--compare", help="JSON file of an earlier run to show next to this one"
+    )
+    args = parser.parse_args(argv)
+
+    if args.child:
+        json.dump(_measure(json.load(sys.stdin)), sys.stdout)
+        return 0
+
+    if args.quick:
+        args.body_sizes, args.header_counts, args.concurrency = [1024], [8], [1]
+        args.iterations, args.warmup = 100, 20
+
+    ports = multiprocessing.Queue()
+    sink = multiprocessing.Process(target=_run_sink, args=(ports,), daemon=True)
+    sink.start()
+    sink_url = f"http://{_SINK_HOST}:{ports.get(timeout=10)}"
+
+    scenarios = [
+        {"body_bytes": size, "headers": headers, "concurrency": concurrency}
+        for size, headers, concurrency in itertools.product(
+            args.body_sizes, args.header_counts, args.concurrency
+        )
+    ]
+    results = []
+    try:
+        for library in args.libraries:
+            if not _available(library):
+                print(f"Skipping {library}: not installed", file=sys.stderr)
+                continue
+            runs = {}
+            for mode in ("baseline", "patched"):
+                runs[mode] = _run_child(
+                    {
+                        "library": library,
+                        "mode": mode,
+                        "sink_url": sink_url,
+                        "scenarios": scenarios,
+                        "iterations": args.iterations,
+                        "warmup": args.warmup,
+                    }
+                )
+            for baseline, patched in zip(runs["baseline"], runs["patched"]):
+                results.append({"library": library, **_compare(baseline, patched)})
+    finally:
+        sink.terminate()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {_key(r): r for r in json.load(f)["results"]}
+    _print_table(results, previous)
+
+    if args.output:
+        report = {
+            "smello_version": _package_version("smello"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "iterations": args.iterations,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def _package_version(name: str) -> str | None:
+    from importlib.metadata import PackageNotFoundError, version  # noqa: PLC0415
+
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,19 +4,37 @@ import atexit
 import logging
 from urllib.parse import urlparse
 
-from smello._env import _env_bool, _env_list, _env_str
+from smello._env import (
+    _env_bool,
+    _env_float,
+    _env_int,
+    _env_list,
+    _env_rates,
+    _env_str,
+)
 from smello.config import SmelloConfig
 from smello.patches import apply_all as _apply_all
-from smello.transport import flush, shutdown
+from smello.transport import flush, shutdown, stats
 from smello.transport import start_worker as _start_worker
 
 logging.getLogger("smello").addHandler(logging.NullHandler())
 
-__all__ = ["init", "flush", "shutdown"]
+__all__ = ["init", "flush", "shutdown", "stats"]
 __version__ = "0.3.1"
 
 _DEFAULT_SERVER_URL = "http://localhost:5110"
 _DEFAULT_REDACT_HEADERS = ["authorization", "x-api-key"]
+_DEFAULT_BATCH_SIZE = 100
+_DEFAULT_BATCH_LINGER_MS = 50
+_DEFAULT_COMPRESS_MIN_BYTES = 1024
+_DEFAULT_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+_DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+_DEFAULT_QUEUE_MAX_ITEMS = 1000
+_DEFAULT_QUEUE_MAX_BYTES = 64 * 1024 * 1024
+_DEFAULT_QUEUE_BLOCK_TIMEOUT_MS = 100
+_DEFAULT_HEARTBEAT_INTERVAL_S = 60.0
+_DEFAULT_BREAKER_THRESHOLD = 5
+_DEFAULT_BREAKER_MAX_BACKOFF_S = 60.0
 
 _config: SmelloConfig | None = None
 _atexit_registered: bool = False
@@ -29,25 +47,135 @@ def init(
     ignore_hosts: list[str] | None = None,
     redact_headers: list[str] | None = None,
     enabled: bool | None = None,
+    batch_size: int | None = None,
+    batch_linger_ms: int | None = None,
+    compression: str | None = None,
+    compress_min_bytes: int | None = None,
+    spool_dir: str | None = None,
+    spool_max_bytes: int | None = None,
+    collector_socket: str | None = None,
+    max_body_bytes: int | None = None,
+    capture_content_types: list[str] | None = None,
+    ignore_content_types: list[str] | None = None,
+    sample_rate: float | None = None,
+    host_sample_rates: dict[str, float] | None = None,
+    keep_errors: bool | None = None,
+    slow_threshold_ms: int | None = None,
+    rate_limit_per_host: float | None = None,
+    queue_max_items: int | None = None,
+    queue_max_bytes: int | None = None,
+    queue_overflow: str | None = None,
+    queue_block_timeout_ms: int | None = None,
+    heartbeat_interval_s: float | None = None,
+    breaker_threshold: int | None = None,
+    breaker_max_backoff_s: float | None = None,
+    breaker_open_policy: str | None = None,
 ) -> None:
     """Initialize Smello. Patches requests and httpx to capture outgoing HTTP traffic.
 
     Each parameter falls back to a ``SMELLO_*`` environment variable when
     not passed explicitly, then to a hardcoded default:
 
-    ================  ==========================  ==========================
-    Parameter         Environment variable        Default
-    ================  ==========================  ==========================
-    enabled           ``SMELLO_ENABLED``          ``True``
-    server_url        ``SMELLO_URL``              ``http://localhost:5110``
-    capture_all       ``SMELLO_CAPTURE_ALL``      ``True``
-    capture_hosts     ``SMELLO_CAPTURE_HOSTS``    ``[]``
-    ignore_hosts      ``SMELLO_IGNORE_HOSTS``     ``[]``
-    redact_headers    ``SMELLO_REDACT_HEADERS``   ``["authorization", "x-api-key"]``
-    ================  ==========================  ==========================
+    ======================  =================================  ==================================
+    Parameter               Environment variable               Default
+    ======================  =================================  ==================================
+    enabled                 ``SMELLO_ENABLED``                 ``True``
+    server_url              ``SMELLO_URL``                     ``http://localhost:5110``
+    capture_all             ``SMELLO_CAPTURE_ALL``             ``True``
+    capture_hosts           ``SMELLO_CAPTURE_HOSTS``           ``[]``
+    ignore_hosts            ``SMELLO_IGNORE_HOSTS``            ``[]``
+    redact_headers          ``SMELLO_REDACT_HEADERS``          ``["authorization", "x-api-key"]``
+    batch_size              ``SMELLO_BATCH_SIZE``              ``100``
+    batch_linger_ms         ``SMELLO_BATCH_LINGER_MS``         ``50``
+    compression             ``SMELLO_COMPRESSION``             ``None`` (off)
+    compress_min_bytes      ``SMELLO_COMPRESS_MIN_BYTES``      ``1024``
+    spool_dir               ``SMELLO_SPOOL_DIR``               ``None`` (off)
+    spool_max_bytes         ``SMELLO_SPOOL_MAX_BYTES``         ``67108864`` (64 MiB)
+    collector_socket        ``SMELLO_COLLECTOR_SOCKET``        ``None`` (off)
+    max_body_bytes          ``SMELLO_MAX_BODY_BYTES``          ``1048576`` (1 MiB)
+    capture_content_types   ``SMELLO_CAPTURE_CONTENT_TYPES``   ``[]`` (all)
+    ignore_content_types    ``SMELLO_IGNORE_CONTENT_TYPES``    ``[]``
+    sample_rate             ``SMELLO_SAMPLE_RATE``             ``1.0``
+    host_sample_rates       ``SMELLO_HOST_SAMPLE_RATES``       ``{}``
+    keep_errors             ``SMELLO_KEEP_ERRORS``             ``True``
+    slow_threshold_ms       ``SMELLO_SLOW_THRESHOLD_MS``       ``None`` (off)
+    rate_limit_per_host     ``SMELLO_RATE_LIMIT_PER_HOST``     ``0`` (off)
+    queue_max_items         ``SMELLO_QUEUE_MAX_ITEMS``         ``1000``
+    queue_max_bytes         ``SMELLO_QUEUE_MAX_BYTES``         ``67108864`` (64 MiB)
+    queue_overflow          ``SMELLO_QUEUE_OVERFLOW``          ``None`` (see below)
+    queue_block_timeout_ms  ``SMELLO_QUEUE_BLOCK_TIMEOUT_MS``  ``100``
+    heartbeat_interval_s    ``SMELLO_HEARTBEAT_INTERVAL_S``    ``60`` (``0``: off)
+    breaker_threshold       ``SMELLO_BREAKER_THRESHOLD``       ``5`` (``0``: off)
+    breaker_max_backoff_s   ``SMELLO_BREAKER_MAX_BACKOFF_S``   ``60``
+    breaker_open_policy     ``SMELLO_BREAKER_OPEN_POLICY``     ``None`` (see below)
+    ======================  =================================  ==================================
 
     Boolean env vars accept ``true``/``1``/``yes`` and ``false``/``0``/``no``
-    (case-insensitive).  List env vars are comma-separated.
+    (case-insensitive).  List env vars are comma-separated;
+    ``SMELLO_HOST_SAMPLE_RATES`` takes ``host=rate`` pairs.
+
+    Entries of ``capture_hosts`` and ``ignore_hosts`` are host names,
+    ``*.example.com`` wildcards (subdomains only) or CIDR ranges such as
+    ``10.0.0.0/8``, optionally followed by a path prefix
+    (``api.example.com/v1/``).  For gRPC the path is the method, e.g.
+    ``/pkg.Service/``.
+
+    Captures are sent to the server in batches of up to ``batch_size``
+    items; the transport waits at most ``batch_linger_ms`` milliseconds
+    for a batch to fill up.
+
+    ``compression`` (``"gzip"`` or ``"zstd"``) compresses request bodies
+    sent to the server once they reach ``compress_min_bytes``.  ``"zstd"``
+    needs Python 3.14+ or the ``zstandard`` package and falls back to gzip
+    otherwise.
+
+    Captures wait for the transport in a queue of at most
+    ``queue_max_items`` captures and ``queue_max_bytes`` (estimated)
+    bytes.  ``queue_overflow`` picks what happens to a capture that
+    doesn't fit: ``"drop_newest"`` drops it, ``"drop_oldest"`` drops
+    queued captures to make room, ``"block"`` makes the calling thread
+    wait up to ``queue_block_timeout_ms`` before dropping it, and
+    ``"spill"`` writes it to the spool.  The default is ``"spill"`` with
+    ``spool_dir`` set and ``"drop_newest"`` otherwise.
+    ``smello.transport.queue_stats()`` counts what each policy dropped.
+
+    With ``spool_dir`` set, captures that couldn't be delivered (and, with
+    the ``"spill"`` policy, those that don't fit into the queue) are
+    written to a memory-mapped spool of at most ``spool_max_bytes`` in
+    that directory and replayed once the server is reachable, also after
+    a restart.
+
+    After ``breaker_threshold`` consecutive sends that failed to reach the
+    server (connection errors, timeouts, 5xx answers), a circuit breaker
+    stops network attempts.  Captures are then written to the spool
+    (``breaker_open_policy="spill"``, the default with ``spool_dir``) or
+    dropped (``"drop"``) right away.  One send is tried after a second,
+    then after twice as long per failure, up to ``breaker_max_backoff_s``;
+    the first one that succeeds closes the breaker.
+
+    With ``collector_socket`` set to a Unix socket path, processes on the
+    same host (e.g. pre-fork server workers) elect one collector that
+    forwards everybody's captures over a single server connection.
+
+    Bodies longer than ``max_body_bytes`` are cut to that size and marked
+    as truncated.  Bodies whose ``Content-Type`` matches
+    ``ignore_content_types`` (or, when set, doesn't match
+    ``capture_content_types``) are not captured at all; patterns may use
+    wildcards such as ``image/*``.
+
+    :func:`smello.stats` returns the client's own metrics: captures
+    enqueued, sampled out, dropped, sent and failed, bytes sent, queue
+    high-water marks, and latency histograms of requests to the server and
+    of the time the patches add to each call.  Every
+    ``heartbeat_interval_s`` seconds they are also posted to the server's
+    ``/api/heartbeat`` endpoint.
+
+    Calls are sampled with probability ``sample_rate``, or the host's entry
+    in ``host_sample_rates``.  Calls that weren't sampled are still
+    captured when they failed (``keep_errors``: status >= 400 or an
+    exception) or took at least ``slow_threshold_ms``.
+    ``rate_limit_per_host`` caps captures per second and host.  Each
+    capture records its sample rate.
     """
     global _config, _atexit_registered
 
@@ -76,12 +204,142 @@ def init(
             env_headers if env_headers is not None else list(_DEFAULT_REDACT_HEADERS)
         )
 
+    if batch_size is None:
+        env_size = _env_int("BATCH_SIZE")
+        batch_size = env_size if env_size is not None else _DEFAULT_BATCH_SIZE
+
+    if batch_linger_ms is None:
+        env_linger = _env_int("BATCH_LINGER_MS")
+        batch_linger_ms = (
+            env_linger if env_linger is not None else _DEFAULT_BATCH_LINGER_MS
+        )
+
+    if compression is None:
+        compression = _env_str("COMPRESSION")
+
+    if compress_min_bytes is None:
+        env_min = _env_int("COMPRESS_MIN_BYTES")
+        compress_min_bytes = (
+            env_min if env_min is not None else _DEFAULT_COMPRESS_MIN_BYTES
+        )
+
+    if spool_dir is None:
+        spool_dir = _env_str("SPOOL_DIR")
+
+    if spool_max_bytes is None:
+        env_spool = _env_int("SPOOL_MAX_BYTES")
+        spool_max_bytes = (
+            env_spool if env_spool is not None else _DEFAULT_SPOOL_MAX_BYTES
+        )
+
+    if collector_socket is None:
+        collector_socket = _env_str("COLLECTOR_SOCKET")
+
+    if max_body_bytes is None:
+        env_max = _env_int("MAX_BODY_BYTES")
+        max_body_bytes = env_max if env_max is not None else _DEFAULT_MAX_BODY_BYTES
+
+    if capture_content_types is None:
+        capture_content_types = _env_list("CAPTURE_CONTENT_TYPES") or []
+
+    if ignore_content_types is None:
+        ignore_content_types = _env_list("IGNORE_CONTENT_TYPES") or []
+
+    if sample_rate is None:
+        env_rate = _env_float("SAMPLE_RATE")
+        sample_rate = env_rate if env_rate is not None else 1.0
+
+    if host_sample_rates is None:
+        host_sample_rates = _env_rates("HOST_SAMPLE_RATES") or {}
+
+    if keep_errors is None:
+        env_keep = _env_bool("KEEP_ERRORS")
+        keep_errors = env_keep if env_keep is not None else True
+
+    if slow_threshold_ms is None:
+        slow_threshold_ms = _env_int("SLOW_THRESHOLD_MS")
+
+    if rate_limit_per_host is None:
+        env_limit = _env_float("RATE_LIMIT_PER_HOST")
+        rate_limit_per_host = env_limit if env_limit is not None else 0
+
+    if queue_max_items is None:
+        env_items = _env_int("QUEUE_MAX_ITEMS")
+        queue_max_items = (
+            env_items if env_items is not None else _DEFAULT_QUEUE_MAX_ITEMS
+        )
+
+    if queue_max_bytes is None:
+        env_bytes = _env_int("QUEUE_MAX_BYTES")
+        queue_max_bytes = (
+            env_bytes if env_bytes is not None else _DEFAULT_QUEUE_MAX_BYTES
+        )
+
+    if queue_overflow is None:
+        queue_overflow = _env_str("QUEUE_OVERFLOW")
+
+    if queue_block_timeout_ms is None:
+        env_timeout = _env_int("QUEUE_BLOCK_TIMEOUT_MS")
+        queue_block_timeout_ms = (
+            env_timeout if env_timeout is not None else _DEFAULT_QUEUE_BLOCK_TIMEOUT_MS
+        )
+
+    if heartbeat_interval_s is None:
+        env_interval = _env_float("HEARTBEAT_INTERVAL_S")
+        heartbeat_interval_s = (
+            env_interval if env_interval is not None else _DEFAULT_HEARTBEAT_INTERVAL_S
+        )
+
+    if breaker_threshold is None:
+        env_threshold = _env_int("BREAKER_THRESHOLD")
+        breaker_threshold = (
+            env_threshold if env_threshold is not None else _DEFAULT_BREAKER_THRESHOLD
+        )
+
+    if breaker_max_backoff_s is None:
+        env_backoff = _env_float("BREAKER_MAX_BACKOFF_S")
+        breaker_max_backoff_s = (
+            env_backoff if env_backoff is not None else _DEFAULT_BREAKER_MAX_BACKOFF_S
+        )
+
+    if breaker_open_policy is None:
+        breaker_open_policy = _env_str("BREAKER_OPEN_POLICY")
+
     _config = SmelloConfig(
         server_url=server_url.rstrip("/"),
         capture_hosts=capture_hosts,
         capture_all=capture_all,
         ignore_hosts=ignore_hosts,
         redact_headers=[h.lower() for h in redact_headers],
+        batch_size=max(1, batch_size),
+        batch_linger_ms=max(0, batch_linger_ms),
+        compression=compression.lower() if compression else None,
+        compress_min_bytes=max(0, compress_min_bytes),
+        spool_dir=spool_dir,
+        spool_max_bytes=max(0, spool_max_bytes),
+        collector_socket=collector_socket,
+        queue_max_items=max(1, queue_max_items),
+        queue_max_bytes=max(0, queue_max_bytes),
+        queue_overflow=queue_overflow.lower().replace("-", "_")
+        if queue_overflow
+        else None,
+        queue_block_timeout_ms=max(0, queue_block_timeout_ms),
+        heartbeat_interval_s=max(0, heartbeat_interval_s),
+        breaker_threshold=max(0, breaker_threshold),
+        breaker_max_backoff_s=max(0, breaker_max_backoff_s),
+        breaker_open_policy=breaker_open_policy.lower()
+        if breaker_open_policy
+        else None,
+        max_body_bytes=max(0, max_body_bytes),
+        capture_content_types=[t.lower() for t in capture_content_types],
+        ignore_content_types=[t.lower() for t in ignore_content_types],
+        sample_rate=min(max(sample_rate, 0.0), 1.0),
+        host_sample_rates={
+            host: min(max(rate, 0.0), 1.0) for host, rate in host_sample_rates.items()
+        },
+        keep_errors=keep_errors,
+        slow_threshold_ms=slow_threshold_ms,
+        rate_limit_per_host=max(0, rate_limit_per_host),
     )
 
     # Always ignore the smello server itself
@@ -90,7 +348,7 @@ def init(
         _config.ignore_hosts.append(server_host)
 
     # Start transport worker
-    _start_worker(_config.server_url)
+    _start_worker(_config.server_url, _config)
 
     # Apply patches
     _apply_all(_config)
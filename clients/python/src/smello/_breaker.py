@@ -0,0 +1,107 @@
+"""Circuit breaker for the connection to the Smello server.
+
+After *threshold* consecutive failed sends the breaker opens: the
+transport stops trying the network and spools or drops captures right
+away instead of waiting for a timeout per batch.  Once a delay has
+passed, one send is let through as a probe ("half open").  A successful
+probe closes the breaker; a failed one opens it again with twice the
+delay, up to *max_delay*.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Track send failures and decide whether to try the network.
+
+    Only the transport worker thread calls the mutating methods.
+    """
+
+    def __init__(
+        self, threshold: int = 5, base_delay: float = 1.0, max_delay: float = 60.0
+    ):
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = CLOSED
+        self.failures = 0
+        # Times the breaker opened, and consecutive failed probes
+        self.opened = 0
+        self._probes_failed = 0
+        self._retry_at = 0.0
+
+    def allow(self) -> bool:
+        """Whether a send may go out now.
+
+        An open breaker whose delay has passed turns half open and lets
+        this one send through as the probe.
+        """
+        if self.state == OPEN:
+            if time.monotonic() < self._retry_at:
+                return False
+            self.state = HALF_OPEN
+        return True
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through (0 otherwise)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(self._retry_at - time.monotonic(), 0.0)
+
+    def success(self) -> None:
+        """Record a send that reached the server."""
+        if self.state != CLOSED:
+            logger.info("Smello server reachable again, resuming sends")
+        self.state = CLOSED
+        self.failures = 0
+        self._probes_failed = 0
+
+    def failure(self) -> None:
+        """Record a send that didn't reach the server."""
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self._probes_failed += 1
+            self._open()
+            logger.debug(
+                "Smello server still unreachable, next attempt in %.1fs",
+                self.retry_in(),
+            )
+        elif self.state == CLOSED and 0 < self.threshold <= self.failures:
+            self.opened += 1
+            self._open()
+            logger.warning(
+                "Smello server unreachable after %d failed send(s), "
+                "pausing sends for %.1fs",
+                self.failures,
+                self.retry_in(),
+            )
+
+    def reset(self) -> None:
+        """Close the breaker and forget past failures."""
+        self.state = CLOSED
+        self.failures = 0
+        self._probes_failed = 0
+        self._retry_at = 0.0
+
+    def stats(self) -> dict:
+        """Return the state, failure counts and time to the next probe."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "retry_in_s": round(self.retry_in(), 3),
+        }
+
+    def _open(self) -> None:
+        delay = min(self.base_delay * 2**self._probes_failed, self.max_delay)
+        self.state = OPEN
+        self._retry_at = time.monotonic() + delay
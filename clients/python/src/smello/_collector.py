@@ -0,0 +1,181 @@
+"""Per-host collector: lets several processes share one server connection.
+
+Processes configured with the same ``collector_socket`` path elect one of
+them as the collector.  The collector listens on that Unix socket,
+accepts capture batches from the other processes (same HTTP framing as
+``/api/capture/batch``) and puts them on its own transport queue, so only
+the collector talks to the Smello server.  Heartbeats posted to
+``/api/heartbeat`` are handed over too, and forwarded with the
+collector's own.  If the collector exits, the
+next process that fails to reach it takes over.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import errno
+import http.client
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_supported() -> bool:
+    """Whether this platform has Unix sockets and file locks."""
+    return fcntl is not None and hasattr(socket, "AF_UNIX")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """``HTTPConnection`` over a Unix domain socket."""
+
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Set by serve(): called with one payload, returns False if dropped
+    enqueue: Callable[[dict], bool]
+    # Set by serve(): called with a client's heartbeat
+    heartbeat: Callable[[dict], None]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _Server
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        if self.path.endswith("/heartbeat"):
+            try:
+                self.server.heartbeat(json.loads(data))
+            except ValueError:
+                self._reply(400, {"detail": "Malformed heartbeat"})
+            else:
+                self._reply(202, {"status": "ok"})
+            return
+        if not self.path.endswith(("/capture", "/capture/batch")):
+            self._reply(404, {"detail": "Not Found"})
+            return
+        try:
+            body = json.loads(data)
+            payloads = body["captures"] if self.path.endswith("/batch") else [body]
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, {"detail": "Malformed capture batch"})
+            return
+
+        results = []
+        for payload in payloads:
+            if self.server.enqueue(payload):
+                results.append({"status": "ok"})
+            else:
+                results.append({"status": "error", "error": "collector queue full"})
+        if self.path.endswith("/batch"):
+            self._reply(200, {"results": results})
+        else:
+            self._reply(201, {"status": results[0]["status"]})
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Collector:
+    """A running collector bound to a Unix socket in this process."""
+
+    def __init__(self, server: _Server, path: str):
+        self._server = server
+        self.path = path
+        self._pid = os.getpid()
+
+    def close(self) -> None:
+        """Stop serving; only the process that bound the socket removes it."""
+        if os.getpid() == self._pid:
+            self._server.shutdown()
+            with contextlib.suppress(OSError):
+                os.unlink(self.path)
+        self._server.server_close()
+
+    def forget(self) -> None:
+        """Drop the listening socket inherited by a forked child.
+
+        The serving thread doesn't exist in the child, and the socket file
+        still belongs to the parent.
+        """
+        self._server.socket.close()
+
+
+def serve(
+    path: str,
+    enqueue: Callable[[dict], bool],
+    heartbeat: Callable[[dict], None] = lambda heartbeat: None,
+) -> Collector | None:
+    """Become the collector for *path*, unless a live collector exists.
+
+    Returns the running :class:`Collector`, or ``None`` if another
+    process is already serving.  A lock file next to the socket
+    serializes the election, so a stale socket is replaced exactly once.
+    """
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if _is_alive(path):
+                return None
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            server = _Server(path, _Handler)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    server.enqueue = enqueue
+    server.heartbeat = heartbeat
+    thread = threading.Thread(
+        target=server.serve_forever, daemon=True, name="smello-collector"
+    )
+    thread.start()
+    logger.debug("Serving as capture collector on %s", path)
+    return Collector(server, path)
+
+
+def _is_alive(path: str) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError as err:
+        if err.errno not in (errno.ENOENT, errno.ECONNREFUSED):
+            raise
+        return False
+    finally:
+        sock.close()
+    return True
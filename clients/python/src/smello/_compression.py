@@ -0,0 +1,56 @@
+"""Compress transport request bodies (gzip, or zstd when available)."""
+
+from __future__ import annotations
+
+import gzip
+import logging
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Favour speed: compression runs on the transport worker thread, and
+# capture payloads (JSON) compress well even at low levels.
+_GZIP_LEVEL = 1
+_ZSTD_LEVEL = 3
+
+
+def _load_zstd() -> Callable[[bytes], bytes] | None:
+    """Return a zstd compress function, or ``None`` if zstd isn't available.
+
+    Uses the standard library module on Python 3.14+, then the
+    ``zstandard`` package.
+    """
+    try:
+        from compression import (  # type: ignore[unresolved-import]  # noqa: PLC0415 -- Python 3.14+
+            zstd,
+        )
+
+        return lambda data: zstd.compress(data, level=_ZSTD_LEVEL)
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore[unresolved-import]  # noqa: PLC0415 -- optional dependency
+    except ImportError:
+        return None
+    compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+    return compressor.compress
+
+
+def get_compressor(encoding: str | None) -> tuple[str, Callable[[bytes], bytes]] | None:
+    """Resolve a configured encoding to ``(content_encoding, compress)``.
+
+    Returns ``None`` when compression is disabled.  ``"zstd"`` falls back
+    to gzip when no zstd implementation is installed.
+    """
+    if not encoding or encoding == "none":
+        return None
+    if encoding == "zstd":
+        compress = _load_zstd()
+        if compress is not None:
+            return "zstd", compress
+        logger.warning("zstd is not available, compressing captures with gzip")
+    elif encoding != "gzip":
+        logger.warning(
+            "Unknown compression %r, compressing captures with gzip", encoding
+        )
+    return "gzip", lambda data: gzip.compress(data, compresslevel=_GZIP_LEVEL)
@@ -46,3 +46,48 @@ def _env_list(name: str) -> list[str] | None:
         return None
     items = [item.strip() for item in raw.split(",") if item.strip()]
     return items if items else None
+
+
+def _env_int(name: str) -> int | None:
+    """Read ``SMELLO_{name}`` as an integer.
+
+    Returns ``None`` if unset, empty, or not a valid integer.
+    """
+    raw = _env_str(name)
+    if raw is None:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+def _env_float(name: str) -> float | None:
+    """Read ``SMELLO_{name}`` as a float.
+
+    Returns ``None`` if unset, empty, or not a valid number.
+    """
+    raw = _env_str(name)
+    if raw is None:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def _env_rates(name: str) -> dict[str, float] | None:
+    """Read ``SMELLO_{name}`` as comma-separated ``key=number`` pairs.
+
+    Pairs that don't parse are skipped.  Returns ``None`` if the variable
+    is unset or has no valid pair.
+    """
+    rates = {}
+    for item in _env_list(name) or []:
+        key, sep, value = item.partition("=")
+        try:
+            if sep and key.strip():
+                rates[key.strip()] = float(value)
+        except ValueError:
+            continue
+    return rates if rates else None
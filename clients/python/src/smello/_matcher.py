@@ -0,0 +1,115 @@
+"""Compiled matcher for ``capture_hosts`` / ``ignore_hosts`` rules.
+
+A rule is a host pattern, optionally followed by a path prefix::
+
+    api.example.com            exact host
+    *.example.com              any subdomain of example.com
+    10.0.0.0/8                 IP hosts in a CIDR range
+    api.example.com/v1/        exact host, paths starting with /v1/
+    *.example.com/v1/          ... also with wildcards and CIDR ranges
+
+Exact hosts are looked up in a dict, wildcards in a trie keyed by the
+host's labels from right to left, so a lookup costs one pass over the
+host's labels no matter how many rules there are.  The rules a host
+matches are cached per host.
+"""
+
+from __future__ import annotations
+
+import functools
+import ipaddress
+import logging
+from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Prefix tuple meaning "every path"
+_ANY_PATH = ("",)
+# Trie node key holding the path prefixes of ``*.<labels so far>``
+_WILDCARD = "*"
+
+_Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+class HostMatcher:
+    """Match ``(host, path)`` pairs against a list of rules."""
+
+    def __init__(self, rules: Iterable[str], cache_size: int = 1024):
+        self._exact: dict[str, list[str]] = {}
+        self._trie: dict = {}
+        self._networks: list[tuple[_Network, list[str]]] = []
+        for rule in rules:
+            try:
+                self._add(rule.strip().lower())
+            except ValueError:
+                logger.warning("Ignoring invalid host rule %r", rule)
+        self._prefixes = functools.lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __bool__(self) -> bool:
+        return bool(self._exact or self._trie or self._networks)
+
+    def match(self, host: str, path: str = "") -> bool:
+        """Whether a request to *host* and *path* matches any rule."""
+        prefixes = self._prefixes(host)
+        if prefixes is None:
+            return False
+        if prefixes is _ANY_PATH:
+            return True
+        return path.startswith(prefixes)
+
+    # -- Compilation -----------------------------------------------------
+
+    def _add(self, rule: str) -> None:
+        if not rule:
+            return
+        host, _, path = rule.partition("/")
+        if _is_ip(host):
+            bits, _, rest = path.partition("/")
+            if bits.isdigit():
+                network = ipaddress.ip_network(f"{host}/{bits}", strict=False)
+                self._networks.append((network, [f"/{rest}" if rest else ""]))
+                return
+        path = f"/{path}" if path else ""
+        if host.startswith("*."):
+            node = self._trie
+            for label in reversed(host[2:].split(".")):
+                node = node.setdefault(label, {})
+            node.setdefault(_WILDCARD, []).append(path)
+        else:
+            self._exact.setdefault(host, []).append(path)
+
+    # -- Lookup ----------------------------------------------------------
+
+    def _lookup(self, host: str) -> tuple[str, ...] | None:
+        """Return the path prefixes of all rules matching *host*."""
+        host = host.lower()
+        prefixes = list(self._exact.get(host, ()))
+
+        labels = host.split(".")
+        node = self._trie
+        # A wildcard needs at least one label in front of its suffix.
+        for label in reversed(labels[1:]):
+            node = node.get(label)
+            if node is None:
+                break
+            prefixes.extend(node.get(_WILDCARD, ()))
+
+        if self._networks and _is_ip(host):
+            address = ipaddress.ip_address(host)
+            for network, paths in self._networks:
+                if address in network:
+                    prefixes.extend(paths)
+
+        if not prefixes:
+            return None
+        if "" in prefixes:
+            return _ANY_PATH
+        return tuple(prefixes)
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
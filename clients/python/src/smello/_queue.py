@@ -0,0 +1,107 @@
+"""Capture queue bounded by item count and by payload bytes."""
+
+from __future__ import annotations
+
+import queue
+import time
+from collections import deque
+
+# Rough per-item cost of headers, ids and the JSON envelope, in bytes
+_ITEM_OVERHEAD = 512
+
+
+class CaptureQueue(queue.Queue):
+    """A :class:`queue.Queue` that also bounds the total size of its items.
+
+    Each item is put with its size in bytes (an estimate is fine).  A put
+    waits for room when the queue holds *maxsize* items, or when adding
+    the item would go over *max_bytes*.  An item larger than *max_bytes*
+    is still accepted into an empty queue, so it can't block it forever.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int):
+        super().__init__(maxsize)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # Highest fill level seen, by items and by bytes
+        self.high_water_items = 0
+        self.high_water_bytes = 0
+
+    def put(self, item, block=True, timeout=None, size: int = 0) -> None:
+        with self.not_full:
+            if not block:
+                if not self._has_room(size):
+                    raise queue.Full
+            elif timeout is None:
+                while not self._has_room(size):
+                    self.not_full.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._has_room(size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Full
+                    self.not_full.wait(remaining)
+            self._put((item, size))
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def put_nowait(self, item, size: int = 0) -> None:
+        self.put(item, block=False, size=size)
+
+    def pop_oldest(self) -> tuple[object, int] | None:
+        """Remove the oldest item without handing it to a consumer.
+
+        Returns ``(item, size)``, or ``None`` if the queue is empty.  The
+        item counts as done, so :meth:`join` doesn't wait for it.
+        """
+        with self.mutex:
+            if not self.queue:
+                return None
+            entry = self.queue.popleft()
+            self.bytes -= entry[1]
+            self.unfinished_tasks -= 1
+            if self.unfinished_tasks == 0:
+                self.all_tasks_done.notify_all()
+            self.not_full.notify()
+            return entry
+
+    def resize(self, maxsize: int, max_bytes: int) -> None:
+        """Change the limits; items already queued stay."""
+        with self.mutex:
+            self.maxsize = maxsize
+            self.max_bytes = max_bytes
+            self.not_full.notify_all()
+
+    # -- queue.Queue hooks (called with the mutex held) -------------------
+
+    def _init(self, maxsize):
+        self.queue: deque[tuple[object, int]] = deque()
+
+    def _put(self, entry):
+        self.queue.append(entry)
+        self.bytes += entry[1]
+        self.high_water_items = max(self.high_water_items, len(self.queue))
+        self.high_water_bytes = max(self.high_water_bytes, self.bytes)
+
+    def _get(self):
+        item, size = self.queue.popleft()
+        self.bytes -= size
+        return item
+
+    def _has_room(self, size: int) -> bool:
+        if not self.queue:
+            return True
+        if 0 < self.maxsize <= len(self.queue):
+            return False
+        return self.bytes + size <= self.max_bytes
+
+
+def payload_size(payload: dict) -> int:
+    """Estimate the size of a serialized capture payload in bytes."""
+    size = _ITEM_OVERHEAD
+    for part in ("request", "response"):
+        body = (payload.get(part) or {}).get("body")
+        if isinstance(body, str | bytes):
+            size += len(body)
+    return size
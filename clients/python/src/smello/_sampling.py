@@ -0,0 +1,113 @@
+"""Decide which calls to capture: head sampling, tail rules, rate limits."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING
+
+from smello import _stats
+
+if TYPE_CHECKING:
+    from smello.config import SmelloConfig
+
+# Every sampler in the process, so a forked child can replace their locks
+_samplers: weakref.WeakSet[Sampler] = weakref.WeakSet()
+
+
+class Sampler:
+    """Sampling decisions for one :class:`~smello.config.SmelloConfig`.
+
+    A call goes through two steps.  :meth:`sample` runs before the call
+    and before anything is copied: it draws against the host's sample
+    rate.  :meth:`keep` runs once the status and duration are known: a
+    call that wasn't sampled is still kept if it failed or was slow, and
+    every kept call must get a token from its host's bucket.
+
+    The rate returned by :meth:`keep` is the probability a call like this
+    one is captured, so the server can extrapolate counts (``1 / rate``
+    calls per capture).
+    """
+
+    def __init__(self, config: SmelloConfig):
+        self._config = config
+        self._lock = threading.Lock()
+        _samplers.add(self)
+        # host -> (tokens, monotonic time of the last refill)
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def rate(self, host: str) -> float:
+        """Return the head sample rate for *host*."""
+        rate = self._config.host_sample_rates.get(host, self._config.sample_rate)
+        return min(max(rate, 0.0), 1.0)
+
+    def sample(self, host: str) -> bool | None:
+        """Draw the head sampling decision for a call to *host*.
+
+        Returns ``True`` if the call is sampled, ``False`` if it isn't but
+        a tail rule may still keep it, and ``None`` if it can't be kept
+        at all (the caller skips capturing entirely).
+        """
+        rate = self.rate(host)
+        if rate >= 1.0 or (rate > 0.0 and random.random() < rate):
+            return True
+        if self._config.keep_errors or self._config.slow_threshold_ms is not None:
+            return False
+        _stats.incr("captures_sampled_out")
+        return None
+
+    def keep(
+        self,
+        host: str,
+        sampled: bool,
+        status_code: int,
+        duration_s: float,
+        error: bool = False,
+    ) -> float | None:
+        """Decide whether to capture a finished call.
+
+        Returns the sample rate to record on the capture, or ``None`` to
+        drop it.
+        """
+        if self._is_tail(status_code, duration_s, error):
+            rate = 1.0
+        elif sampled:
+            rate = self.rate(host)
+        else:
+            _stats.incr("captures_sampled_out")
+            return None
+        if not self._take_token(host):
+            _stats.incr("captures_rate_limited")
+            return None
+        return rate
+
+    def _is_tail(self, status_code: int, duration_s: float, error: bool) -> bool:
+        config = self._config
+        if config.keep_errors and (error or status_code >= 400):
+            return True
+        threshold = config.slow_threshold_ms
+        return threshold is not None and duration_s * 1000 >= threshold
+
+    def _take_token(self, host: str) -> bool:
+        limit = self._config.rate_limit_per_host
+        if not limit:
+            return True
+        now = time.monotonic()
+        # Allow bursts of up to one second's worth of captures.
+        capacity = max(limit, 1.0)
+        with self._lock:
+            tokens, last = self._buckets.get(host, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * limit)
+            if tokens < 1.0:
+                self._buckets[host] = (tokens, now)
+                return False
+            self._buckets[host] = (tokens - 1.0, now)
+            return True
+
+
+def after_fork() -> None:
+    """Replace the samplers' locks, which a parent thread may have held."""
+    for sampler in list(_samplers):
+        sampler._lock = threading.Lock()
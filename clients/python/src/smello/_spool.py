@@ -0,0 +1,276 @@
+"""On-disk spool for captures the transport couldn't deliver or queue.
+
+The spool is a directory of fixed-size, memory-mapped segment files.
+Records are appended to the newest segment::
+
+    <length: uint32> <crc32: uint32> <JSON payload: length bytes>
+
+A zero length marks the end of the written data (segments are created
+zero-filled).  The position of the last record the server acknowledged
+is kept in a small ``ack`` file, so after a crash or restart replay
+resumes from there.  Fully acknowledged segments are deleted.
+
+Writes go through a shared mapping, so they survive a crash of the
+instrumented process without an ``fsync`` per record.  An exclusive lock
+on the ``lock`` file keeps a second process from appending to the same
+segments.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("<II")
+_SEGMENT_BYTES = 4 * 1024 * 1024
+_ACK_FILE = "ack"
+_LOCK_FILE = "lock"
+
+# (segment number, byte offset within the segment)
+Position = tuple[int, int]
+
+
+class _Segment:
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        self.number = int(path.stem.split("-")[1])
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def record_at(self, offset: int) -> bytes | None:
+        """Return the record stored at *offset*, or ``None`` at the end of data."""
+        if offset + _HEADER.size > len(self.map):
+            return None
+        length, crc = _HEADER.unpack_from(self.map, offset)
+        end = offset + _HEADER.size + length
+        if length == 0 or end > len(self.map):
+            return None
+        data = self.map[offset + _HEADER.size : end]
+        if zlib.crc32(data) != crc:
+            # Torn write from a crash: treat as the end of the data.
+            return None
+        return data
+
+    def close(self) -> None:
+        self.map.flush()
+        self.map.close()
+
+
+class SpoolInUseError(OSError):
+    """Another process has the spool directory open."""
+
+
+def _lock_directory(directory: Path) -> int:
+    fd = os.open(directory / _LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+    if fcntl is None:
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise SpoolInUseError(f"{directory} is in use by another process") from None
+    return fd
+
+
+class Spool:
+    """Append-only, size-bounded spool of capture payloads.
+
+    Thread-safe: application threads append while the transport worker
+    reads and acknowledges.  Only one process (or ``Spool`` object) can
+    have a directory open; opening it again raises
+    :class:`SpoolInUseError` until the first one is closed.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = _lock_directory(self.directory)
+        self.segment_bytes = max(64 * 1024, min(_SEGMENT_BYTES, max_bytes // 2))
+        self.max_segments = max(2, max_bytes // self.segment_bytes)
+        self._lock = threading.Lock()
+        # Whether a write failure was logged; later ones are only debug-logged
+        self._io_error_logged = False
+        self._segments: list[_Segment] = [
+            _Segment(path, self.segment_bytes)
+            for path in sorted(self.directory.glob("segment-*.log"))
+        ]
+        self._ack = self._load_ack()
+        self._read = self._ack
+        self._write = self._find_write_position()
+        self._drop_acked_segments()
+
+    # -- Public API ------------------------------------------------------
+
+    def append(self, payload: dict) -> bool:
+        """Append *payload*; returns ``False`` if the spool is full.
+
+        An I/O error (the directory was removed, the disk is full) also
+        returns ``False``.
+        """
+        data = json.dumps(payload, default=repr).encode("utf-8")
+        size = _HEADER.size + len(data)
+        if size + _HEADER.size > self.segment_bytes:
+            return False
+
+        with self._lock:
+            segment_number, offset = self._write
+            # Leave room for the zero-length end marker.
+            if not self._segments or offset + size + _HEADER.size > self.segment_bytes:
+                if len(self._segments) >= self.max_segments:
+                    return False
+                try:
+                    segment = self._new_segment(segment_number + 1)
+                except OSError as err:
+                    self._io_error(err)
+                    return False
+                offset = 0
+            else:
+                segment = self._segments[-1]
+            _HEADER.pack_into(segment.map, offset, len(data), zlib.crc32(data))
+            segment.map[offset + _HEADER.size : offset + size] = data
+            # Overwrite leftovers of a torn write with a fresh end marker.
+            _HEADER.pack_into(segment.map, offset + size, 0, 0)
+            self._write = (segment.number, offset + size)
+            return True
+
+    def read(self, max_items: int) -> tuple[list[dict], Position]:
+        """Return up to *max_items* payloads after the read cursor.
+
+        The returned position goes to :meth:`ack` once the payloads have
+        been delivered.  Until then, the same payloads are returned again
+        after :meth:`rewind`.
+        """
+        payloads: list[dict] = []
+        with self._lock:
+            position = self._read
+            while len(payloads) < max_items:
+                segment = self._segment(position[0])
+                record = segment.record_at(position[1]) if segment else None
+                if record is None:
+                    later = [s for s in self._segments if s.number > position[0]]
+                    if not later or position == self._write:
+                        break
+                    position = (later[0].number, 0)
+                    continue
+                position = (position[0], position[1] + _HEADER.size + len(record))
+                try:
+                    payloads.append(json.loads(record))
+                except ValueError:
+                    logger.debug("Skipping unreadable spool record at %s", position)
+            self._read = position
+        return payloads, position
+
+    def ack(self, position: Position) -> None:
+        """Mark everything before *position* as delivered.
+
+        If the position can't be saved, a restart replays from the last
+        saved one.
+        """
+        with self._lock:
+            self._ack = position
+            tmp = self.directory / f"{_ACK_FILE}.tmp"
+            try:
+                tmp.write_text(f"{position[0]} {position[1]}")
+                os.replace(tmp, self.directory / _ACK_FILE)
+            except OSError as err:
+                self._io_error(err)
+            self._drop_acked_segments()
+
+    def rewind(self) -> None:
+        """Move the read cursor back to the last acknowledged position."""
+        with self._lock:
+            self._read = self._ack
+
+    def pending(self) -> bool:
+        """Whether there are payloads that were not read yet."""
+        with self._lock:
+            return self._read != self._write
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def forget(self) -> None:
+        """Drop the handles inherited by a forked child.
+
+        The segments and the directory lock still belong to the parent.
+        """
+        self._lock = threading.Lock()
+        for segment in self._segments:
+            segment.map.close()
+        self._segments = []
+        if self._lock_fd is not None:
+            # The lock belongs to the open file, which the parent still has.
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    # -- Internals -------------------------------------------------------
+
+    def _segment(self, number: int) -> _Segment | None:
+        for segment in self._segments:
+            if segment.number == number:
+                return segment
+        return None
+
+    def _new_segment(self, number: int) -> _Segment:
+        segment = _Segment(
+            self.directory / f"segment-{number:08d}.log", self.segment_bytes
+        )
+        self._segments.append(segment)
+        return segment
+
+    def _io_error(self, err: OSError) -> None:
+        if self._io_error_logged:
+            logger.debug("Capture spool in %s failed: %s", self.directory, err)
+        else:
+            self._io_error_logged = True
+            logger.warning("Capture spool in %s failed: %s", self.directory, err)
+
+    def _load_ack(self) -> Position:
+        try:
+            segment, offset = (self.directory / _ACK_FILE).read_text().split()
+            return int(segment), int(offset)
+        except (OSError, ValueError):
+            first = self._segments[0].number if self._segments else 0
+            return first, 0
+
+    def _find_write_position(self) -> Position:
+        if not self._segments:
+            return self._ack
+        segment = self._segments[-1]
+        offset = 0
+        while (record := segment.record_at(offset)) is not None:
+            offset += _HEADER.size + len(record)
+        return segment.number, offset
+
+    def _drop_acked_segments(self) -> None:
+        while len(self._segments) > 1 and self._segments[0].number < self._ack[0]:
+            segment = self._segments.pop(0)
+            segment.close()
+            try:
+                segment.path.unlink(missing_ok=True)
+            except OSError as err:
+                self._io_error(err)
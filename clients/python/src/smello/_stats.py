@@ -0,0 +1,133 @@
+"""Self-metrics of the client: counters and latency histograms.
+
+Patches and the transport record what happens to captures here;
+:func:`smello.stats` reports it, and the transport sends it to the
+server as a periodic heartbeat.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+
+# Upper bounds of the histogram buckets, in seconds; the last bucket is open.
+_BUCKETS = (
+    0.000_01,
+    0.000_025,
+    0.000_05,
+    0.000_1,
+    0.000_25,
+    0.000_5,
+    0.001,
+    0.002_5,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+COUNTERS = (
+    # Captures handed to the transport queue
+    "captures_enqueued",
+    # Calls not captured because of sampling or the per-host rate limit
+    "captures_sampled_out",
+    "captures_rate_limited",
+    # Captures the server accepted, and those given up on after retries
+    "captures_sent",
+    "captures_failed",
+    # Captures spooled or dropped unsent while the circuit breaker was open
+    "captures_short_circuited",
+    # Requests to the server (or collector) that failed, and bytes sent
+    "send_errors",
+    "bytes_sent",
+)
+
+HISTOGRAMS = (
+    # One request to the server, as timed by the transport worker
+    "send_latency",
+    # Time a patched function adds on top of the original call
+    "patch_overhead",
+)
+
+
+class Histogram:
+    """Bucketed latency histogram."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the *pct*-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return _BUCKETS[index] if index < len(_BUCKETS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        """Return count, mean, p50, p99 and max, in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+_lock = threading.Lock()
+_counters: dict[str, int] = dict.fromkeys(COUNTERS, 0)
+_histograms: dict[str, Histogram] = {name: Histogram() for name in HISTOGRAMS}
+
+
+def incr(name: str, amount: int = 1) -> None:
+    """Add *amount* to the counter *name*."""
+    with _lock:
+        _counters[name] += amount
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record a duration in the histogram *name*."""
+    with _lock:
+        _histograms[name].observe(seconds)
+
+
+def snapshot() -> dict:
+    """Return the current counters and histogram summaries."""
+    with _lock:
+        result: dict = dict(_counters)
+        for name, histogram in _histograms.items():
+            result[name] = histogram.summary()
+    return result
+
+
+def reset() -> None:
+    """Zero all counters and histograms (after a fork, and in tests)."""
+    global _lock
+    _lock = threading.Lock()
+    for name in _counters:
+        _counters[name] = 0
+    for name in _histograms:
+        _histograms[name] = Histogram()
@@ -0,0 +1,49 @@
+"""Capture streamed response bodies without consuming them."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from smello.config import SmelloConfig
+
+
+class BodyTee:
+    """Keep a bounded head of a body while it streams to the application.
+
+    Chunks pass through untouched; the first *limit* bytes are copied.
+    *on_done* is called with ``(head, total_size)`` exactly once, when
+    the stream is exhausted or closed, whichever comes first.
+    """
+
+    def __init__(self, limit: int, on_done: Callable[[bytes, int], None]):
+        self._limit = limit
+        self._on_done = on_done
+        self._chunks: list[bytes] = []
+        self._kept = 0
+        self._done = False
+        self.size = 0
+
+    def feed(self, chunk: bytes | str) -> None:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self.size += len(chunk)
+        room = self._limit - self._kept
+        if room > 0:
+            part = chunk[:room]
+            self._chunks.append(part)
+            self._kept += len(part)
+
+    def finish(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        head = b"".join(self._chunks)
+        self._chunks = []
+        self._on_done(head, self.size)
+
+
+def head_limit(config: SmelloConfig, content_type: str | None) -> int:
+    """How many bytes of a streamed body with *content_type* to keep."""
+    if not config.should_capture_body(content_type):
+        return 0
+    return config.max_body_bytes
@@ -0,0 +1,130 @@
+"""Phase timings of one HTTP call: pool wait, DNS, connect, TLS, first byte
+and download, plus the identity of the client object that made the call.
+
+Patches hook the connection layer of their library and report the
+phases they see to a :class:`PhaseTimer`.  Phases the library does not
+expose (or that did not happen, like the handshake of a pooled
+connection) stay ``None``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+import weakref
+
+PHASES = ("pool_wait", "dns", "connect", "tls", "ttfb", "download")
+
+_local = threading.local()
+
+_client_ids: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_client_ids_lock = threading.Lock()
+
+
+class PhaseTimer:
+    """Accumulates the time spent in each phase of one call.
+
+    Phases that happen more than once (retries, redirects followed by the
+    library) add up.  ``reused`` is ``False`` once a new connection was
+    opened, and ``True`` if a response arrived without opening one.
+    """
+
+    __slots__ = (
+        "pool_wait",
+        "dns",
+        "connect",
+        "tls",
+        "ttfb",
+        "download",
+        "reused",
+        "_started",
+    )
+
+    def __init__(self):
+        self.pool_wait: float | None = None
+        self.dns: float | None = None
+        self.connect: float | None = None
+        self.tls: float | None = None
+        self.ttfb: float | None = None
+        self.download: float | None = None
+        self.reused: bool | None = None
+        self._started: dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        setattr(self, phase, (getattr(self, phase) or 0.0) + max(seconds, 0.0))
+
+    def start(self, phase: str) -> None:
+        self._started[phase] = time.monotonic()
+
+    def stop(self, phase: str) -> None:
+        """End a phase begun with :meth:`start`; unstarted phases are ignored."""
+        started = self._started.pop(phase, None)
+        if started is not None:
+            self.add(phase, time.monotonic() - started)
+
+    def new_connection(self) -> None:
+        self.reused = False
+
+    def response_started(self) -> None:
+        """The response headers arrived."""
+        if self.reused is None:
+            self.reused = True
+
+    def to_dict(self) -> dict | None:
+        """The payload's ``timings``; ``None`` if nothing was observed."""
+        if self.ttfb is None and self.reused is None:
+            return None
+        timings: dict = {f"{phase}_ms": _ms(getattr(self, phase)) for phase in PHASES}
+        timings["connection_reused"] = self.reused
+        return timings
+
+
+def client_id(client) -> str | None:
+    """A random id for *client* (a session or client object), kept for its lifetime.
+
+    Calls made through one ``requests.Session`` or ``httpx.Client`` share
+    an id; code that creates a client per call shows up as one id per
+    call.
+    """
+    try:
+        known = _client_ids.get(client)
+    except TypeError:  # not weakly referenceable
+        return None
+    if known is not None:
+        return known
+    with _client_ids_lock:
+        return _client_ids.setdefault(client, uuid.uuid4().hex[:12])
+
+
+def after_fork() -> None:
+    """Replace the client id lock, which a parent thread may have held."""
+    global _client_ids_lock
+    _client_ids_lock = threading.Lock()
+
+
+def current() -> PhaseTimer | None:
+    """The timer of the call in progress on this thread, if any."""
+    return getattr(_local, "timer", None)
+
+
+def activate(timer: PhaseTimer) -> PhaseTimer | None:
+    """Make *timer* the current one on this thread; returns the previous one.
+
+    A call made while another is in progress (``requests`` follows
+    redirects by calling ``send`` again) ends the outer call's download.
+    """
+    previous = current()
+    if previous is not None:
+        previous.stop("download")
+    _local.timer = timer
+    return previous
+
+
+def restore(timer: PhaseTimer | None) -> None:
+    """Make *timer*, as returned by :func:`activate`, current again."""
+    _local.timer = timer
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
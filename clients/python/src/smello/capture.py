@@ -1,11 +1,178 @@
 """Serialize captured HTTP request/response pairs for sending to the server."""
 
+import functools
 import sys
 import time
 import uuid
+from collections.abc import Callable
 
 from smello.config import SmelloConfig
 
+# A body as handed over by a patch: text, raw bytes, or a zero-argument
+# callable that renders it (called on the transport worker).
+Body = str | bytes | Callable[[], str | bytes | None] | None
+
+# Estimated bytes per capture and per header, for Capture.size_hint()
+_ITEM_OVERHEAD = 512
+_HEADER_OVERHEAD = 64
+
+
+class Capture:
+    """A captured call, recorded on the calling thread.
+
+    Holds references to what the client library already produced (header
+    mappings, body bytes) plus the wall-clock time of the call.  Bodies
+    are cut to ``config.max_body_bytes`` right away, so queued captures
+    stay small.  Copying, decoding and redaction happen in
+    :meth:`to_payload`, which the transport worker calls.
+    """
+
+    __slots__ = (
+        "config",
+        "method",
+        "url",
+        "request_headers",
+        "request_body",
+        "request_body_size",
+        "request_truncated",
+        "status_code",
+        "response_headers",
+        "response_body",
+        "response_body_size",
+        "response_truncated",
+        "response_encoding",
+        "duration_s",
+        "library",
+        "sample_rate",
+        "timestamp",
+        "timings",
+        "client_id",
+        "pool_size",
+    )
+
+    def __init__(
+        self,
+        config: SmelloConfig,
+        method: str,
+        url: str,
+        request_headers,
+        request_body: Body,
+        status_code: int,
+        response_headers,
+        response_body: Body,
+        duration_s: float,
+        library: str,
+        response_encoding: str | None = None,
+        request_content_type: str | None = None,
+        response_content_type: str | None = None,
+        response_body_size: int | None = None,
+        timestamp: float | None = None,
+        sample_rate: float = 1.0,
+        timings: dict | None = None,
+        client_id: str | None = None,
+        pool_size: int | None = None,
+    ):
+        """Record a call.
+
+        The content types default to the ``Content-Type`` header of the
+        respective headers mapping.  *response_body_size* is the size of
+        the whole body when *response_body* holds only its head (streamed
+        responses).  *timestamp* defaults to now.  *sample_rate* is the
+        probability that a call like this one was captured.  *timings*
+        is the phase breakdown from :meth:`PhaseTimer.to_dict
+        <smello._timings.PhaseTimer.to_dict>`, if the patch measured one.
+        *client_id* identifies the session or client object that made the
+        call, and *pool_size* is the size of its connection pool.
+        """
+        self.config = config
+        self.method = method
+        self.url = url
+        self.request_headers = request_headers
+        self.request_body, self.request_body_size, self.request_truncated = _limit_body(
+            config, request_body, request_content_type or _content_type(request_headers)
+        )
+        self.status_code = status_code
+        self.response_headers = response_headers
+        self.response_body, self.response_body_size, self.response_truncated = (
+            _limit_body(
+                config,
+                response_body,
+                response_content_type or _content_type(response_headers),
+            )
+        )
+        if (
+            response_body_size is not None
+            and response_body_size > self.response_body_size
+        ):
+            self.response_body_size = response_body_size
+            self.response_truncated = True
+        self.response_encoding = response_encoding
+        self.duration_s = duration_s
+        self.library = library
+        self.sample_rate = sample_rate
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.timings = timings
+        self.client_id = client_id
+        self.pool_size = pool_size
+
+    def size_hint(self) -> int:
+        """Estimate the bytes this capture holds, for the queue's byte budget.
+
+        Counts the (already cut) bodies plus a flat cost per header.
+        """
+        size = _ITEM_OVERHEAD
+        for headers in (self.request_headers, self.response_headers):
+            try:
+                size += len(headers) * _HEADER_OVERHEAD
+            except TypeError:
+                pass
+        return size + _held_bytes(self.request_body) + _held_bytes(self.response_body)
+
+    def to_payload(self) -> dict:
+        """Build the capture payload dict."""
+        config = self.config
+        req_body, req_size, req_truncated = _render(
+            config, self.request_body, self.request_body_size, self.request_truncated
+        )
+        resp_body, resp_size, resp_truncated = _render(
+            config, self.response_body, self.response_body_size, self.response_truncated
+        )
+        return {
+            "id": str(uuid.uuid4()),
+            "timestamp": time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.timestamp)
+            ),
+            "duration_ms": int(self.duration_s * 1000),
+            "timings": self.timings,
+            "request": {
+                "method": self.method,
+                "url": self.url,
+                "headers": _redact_headers(
+                    dict(self.request_headers), config.redact_headers
+                ),
+                "body": _body_to_str(req_body, truncated=req_truncated),
+                "body_size": req_size,
+                "truncated": req_truncated,
+            },
+            "response": {
+                "status_code": self.status_code,
+                "headers": dict(self.response_headers),
+                "body": _body_to_str(
+                    resp_body, self.response_encoding, truncated=resp_truncated
+                ),
+                "body_size": resp_size,
+                "truncated": resp_truncated,
+            },
+            "meta": {
+                "library": self.library,
+                "sample_rate": self.sample_rate,
+                "client_id": self.client_id,
+                "pool_size": self.pool_size,
+                "python_version": _python_version(),
+                "smello_version": "0.1.0",
+            },
+        }
+
 
 def serialize_request_response(
     config: SmelloConfig,
@@ -18,37 +185,82 @@ def serialize_request_response(
     response_body: str | bytes | None,
     duration_s: float,
     library: str,
+    response_encoding: str | None = None,
 ) -> dict:
-    """Build the capture payload dict."""
-    req_headers = _redact_headers(dict(request_headers), config.redact_headers)
-    resp_headers = dict(response_headers)
+    """Build the capture payload dict.
 
-    req_body_str = _body_to_str(request_body)
-    resp_body_str = _body_to_str(response_body)
+    *response_encoding* is the charset the response declared; bytes
+    bodies without one are decoded as UTF-8.
+    """
+    return Capture(
+        config=config,
+        method=method,
+        url=url,
+        request_headers=request_headers,
+        request_body=request_body,
+        status_code=status_code,
+        response_headers=response_headers,
+        response_body=response_body,
+        duration_s=duration_s,
+        library=library,
+        response_encoding=response_encoding,
+    ).to_payload()
 
-    return {
-        "id": str(uuid.uuid4()),
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "duration_ms": int(duration_s * 1000),
-        "request": {
-            "method": method,
-            "url": url,
-            "headers": req_headers,
-            "body": req_body_str,
-            "body_size": len(request_body) if request_body else 0,
-        },
-        "response": {
-            "status_code": status_code,
-            "headers": resp_headers,
-            "body": resp_body_str,
-            "body_size": len(response_body) if response_body else 0,
-        },
-        "meta": {
-            "library": library,
-            "python_version": _python_version(),
-            "smello_version": "0.1.0",
-        },
-    }
+
+def _held_bytes(body: Body) -> int:
+    """Size of a body, or of the data a deferred body renders from."""
+    if isinstance(body, str | bytes):
+        return len(body)
+    if isinstance(body, functools.partial):
+        # Snapshots hold bytes; a stream's messages are nested snapshots
+        return sum(_held_bytes(arg) for arg in body.args)
+    return 0
+
+
+def _content_type(headers) -> str | None:
+    try:
+        return headers.get("content-type") or headers.get("Content-Type")
+    except Exception:
+        return None
+
+
+def _limit_body(
+    config: SmelloConfig, body: Body, content_type: str | None
+) -> tuple[Body, int, bool]:
+    """Apply the body filters; returns ``(body, original size, truncated)``.
+
+    Bodies rendered later (callables) are cut to size in :func:`_render`.
+    """
+    if body is None:
+        return None, 0, False
+    if not isinstance(body, str | bytes) and not callable(body):
+        # Streamed upload (iterator, file object): nothing to keep
+        return None, 0, False
+    if not config.should_capture_body(content_type):
+        size = 0 if callable(body) else len(body)
+        return None, size, True
+    if callable(body):
+        return body, 0, False
+    return _truncate(body, config.max_body_bytes)
+
+
+def _render(
+    config: SmelloConfig, body: Body, size: int, truncated: bool
+) -> tuple[str | bytes | None, int, bool]:
+    """Render a deferred body and cut it to ``max_body_bytes``."""
+    if not callable(body):
+        return body, size, truncated
+    rendered = body()
+    if rendered is None:
+        return None, 0, False
+    return _truncate(rendered, config.max_body_bytes)
+
+
+def _truncate(body: str | bytes, max_bytes: int) -> tuple[str | bytes, int, bool]:
+    size = len(body)
+    if size > max_bytes:
+        return body[:max_bytes], size, True
+    return body, size, False
 
 
 def _redact_headers(headers: dict, redact_keys: list[str]) -> dict:
@@ -57,14 +269,24 @@ def _redact_headers(headers: dict, redact_keys: list[str]) -> dict:
     }
 
 
-def _body_to_str(body: str | bytes | None) -> str | None:
+def _body_to_str(
+    body: str | bytes | None, encoding: str | None = None, truncated: bool = False
+) -> str | None:
     if body is None:
         return None
     if isinstance(body, bytes):
-        try:
-            return body.decode("utf-8")
-        except UnicodeDecodeError:
-            return f"<binary: {len(body)} bytes>"
+        if encoding:
+            try:
+                return body.decode(encoding, errors="replace")
+            except LookupError:
+                pass  # unknown charset: treat like an undeclared one
+        # A cut can split the last UTF-8 sequence (at most 3 bytes).
+        for cut in range(4 if truncated else 1):
+            try:
+                return body[: len(body) - cut].decode("utf-8")
+            except UnicodeDecodeError:
+                continue
+        return f"<binary: {len(body)} bytes>"
     return body
 
 
@@ -2,6 +2,9 @@
 
 from dataclasses import dataclass, field
 
+from smello._matcher import HostMatcher
+from smello._sampling import Sampler
+
 
 @dataclass
 class SmelloConfig:
@@ -12,11 +15,82 @@ class SmelloConfig:
     redact_headers: list[str] = field(
         default_factory=lambda: ["authorization", "x-api-key"]
     )
+    batch_size: int = 100
+    batch_linger_ms: int = 50
+    compression: str | None = None
+    compress_min_bytes: int = 1024
+    spool_dir: str | None = None
+    spool_max_bytes: int = 64 * 1024 * 1024
+    collector_socket: str | None = None
+    queue_max_items: int = 1000
+    queue_max_bytes: int = 64 * 1024 * 1024
+    queue_overflow: str | None = None
+    queue_block_timeout_ms: int = 100
+    heartbeat_interval_s: float = 60.0
+    breaker_threshold: int = 5
+    breaker_max_backoff_s: float = 60.0
+    breaker_open_policy: str | None = None
+    max_body_bytes: int = 1024 * 1024
+    capture_content_types: list[str] = field(default_factory=list)
+    ignore_content_types: list[str] = field(default_factory=list)
+    sample_rate: float = 1.0
+    host_sample_rates: dict[str, float] = field(default_factory=dict)
+    keep_errors: bool = True
+    slow_threshold_ms: int | None = None
+    rate_limit_per_host: float = 0
+    _sampler: Sampler | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _host_matchers: tuple[HostMatcher, HostMatcher] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def sampler(self) -> Sampler:
+        """The :class:`~smello._sampling.Sampler` for this configuration."""
+        if self._sampler is None:
+            self._sampler = Sampler(self)
+        return self._sampler
 
-    def should_capture(self, host: str) -> bool:
-        """Decide whether to capture a request to the given host."""
-        if host in self.ignore_hosts:
+    def should_capture(self, host: str, path: str = "") -> bool:
+        """Decide whether to capture a request to the given host and path.
+
+        ``capture_hosts`` and ``ignore_hosts`` are compiled into
+        :class:`~smello._matcher.HostMatcher` objects on the first call;
+        changing the lists afterwards has no effect.
+        """
+        if self._host_matchers is None:
+            self._host_matchers = (
+                HostMatcher(self.ignore_hosts),
+                HostMatcher(self.capture_hosts),
+            )
+        ignore, capture = self._host_matchers
+        if ignore and ignore.match(host, path):
             return False
         if self.capture_all:
             return True
-        return host in self.capture_hosts
+        return capture.match(host, path)
+
+    def should_capture_body(self, content_type: str | None) -> bool:
+        """Decide whether to keep a body with the given ``Content-Type``.
+
+        Patterns are media types such as ``application/json`` or
+        wildcards such as ``image/*``.
+        """
+        if not self.capture_content_types and not self.ignore_content_types:
+            return True
+        media_type = (content_type or "").split(";", 1)[0].strip().lower()
+        if _match_media_type(media_type, self.ignore_content_types):
+            return False
+        if not self.capture_content_types:
+            return True
+        return _match_media_type(media_type, self.capture_content_types)
+
+
+def _match_media_type(media_type: str, patterns: list[str]) -> bool:
+    for pattern in patterns:
+        if pattern == media_type or pattern == "*/*":
+            return True
+        if pattern.endswith("/*") and media_type.startswith(pattern[:-1]):
+            return True
+    return False
@@ -1,9 +1,14 @@
-"""Monkey-patch for the `grpc` library (unary-unary calls)."""
+"""Monkey-patch for the `grpc` library (unary and streaming calls)."""
 
+import asyncio
+import functools
+import json
 import logging
+import threading
 import time
 
-from smello.capture import serialize_request_response
+from smello import _stats
+from smello.capture import Body, Capture
 from smello.config import SmelloConfig
 from smello.transport import send
 
@@ -29,17 +34,30 @@ _GRPC_STATUS_TO_HTTP = {
     16: 401,  # UNAUTHENTICATED
 }
 
+# Messages per direction that a streaming call keeps for the capture
+# body, within max_body_bytes; the rest are only counted.
+_STREAM_SAMPLE_MESSAGES = 10
+
+# Tasks waiting for grpc.aio calls to finish; the event loop only keeps
+# weak references to them.
+_watch_tasks: set = set()
+
 
 def patch_grpc(config: SmelloConfig) -> None:
-    """Patch grpc.insecure_channel and grpc.secure_channel to capture unary-unary calls."""
+    """Patch grpc.insecure_channel and grpc.secure_channel to capture calls."""
     try:
         import grpc  # type: ignore[unresolved-import]  # noqa: PLC0415 -- optional dependency
     except ImportError:
         return  # grpc not installed, skip
 
     # Define interceptor class here so it can inherit from the real
-    # grpc.UnaryUnaryClientInterceptor (required by grpc.intercept_channel).
-    Interceptor = _make_interceptor_class(grpc.UnaryUnaryClientInterceptor)
+    # grpc interceptor classes (required by grpc.intercept_channel).
+    Interceptor = _make_interceptor_class(
+        grpc.UnaryUnaryClientInterceptor,
+        grpc.UnaryStreamClientInterceptor,
+        grpc.StreamUnaryClientInterceptor,
+        grpc.StreamStreamClientInterceptor,
+    )
 
     original_insecure = grpc.insecure_channel
     original_secure = grpc.secure_channel
@@ -57,6 +75,56 @@ def patch_grpc(config: SmelloConfig) -> None:
     grpc.insecure_channel = patched_insecure_channel
     grpc.secure_channel = patched_secure_channel
 
+    aio = getattr(grpc, "aio", None)
+    if aio is not None:
+        _patch_aio(aio, config)
+
+
+def _patch_aio(aio, config: SmelloConfig) -> None:
+    """Add the interceptor to grpc.aio.insecure_channel and grpc.aio.secure_channel.
+
+    It goes after the application's own interceptors, closest to the wire.
+    """
+    interceptor_classes = _make_aio_interceptor_classes(
+        aio.UnaryUnaryClientInterceptor,
+        aio.UnaryStreamClientInterceptor,
+        aio.StreamUnaryClientInterceptor,
+        aio.StreamStreamClientInterceptor,
+    )
+
+    def with_interceptors(target, interceptors):
+        return [
+            *(interceptors or ()),
+            *(cls(config, target) for cls in interceptor_classes),
+        ]
+
+    original_insecure = aio.insecure_channel
+    original_secure = aio.secure_channel
+
+    def patched_insecure_channel(
+        target, options=None, compression=None, interceptors=None
+    ):
+        return original_insecure(
+            target,
+            options=options,
+            compression=compression,
+            interceptors=with_interceptors(target, interceptors),
+        )
+
+    def patched_secure_channel(
+        target, credentials, options=None, compression=None, interceptors=None
+    ):
+        return original_secure(
+            target,
+            credentials,
+            options=options,
+            compression=compression,
+            interceptors=with_interceptors(target, interceptors),
+        )
+
+    aio.insecure_channel = patched_insecure_channel
+    aio.secure_channel = patched_secure_channel
+
 
 def _grpc_status_to_http(code_value: int) -> int:
     return _GRPC_STATUS_TO_HTTP.get(code_value, 500)
@@ -81,6 +149,40 @@ def _extract_host(target: str) -> str:
     return target
 
 
+def _status(source, default: tuple[int, str]) -> tuple[int, str]:
+    """The gRPC status code and name of a call or ``RpcError``."""
+    code = getattr(source, "code", None)
+    if not callable(code):
+        return default
+    try:
+        return _code_status(code(), default)
+    except Exception:
+        return default
+
+
+def _code_status(code_obj, default: tuple[int, str]) -> tuple[int, str]:
+    """The status code and name of a ``grpc.StatusCode``."""
+    if not hasattr(code_obj, "value"):
+        return default
+    return code_obj.value[0], getattr(code_obj, "name", default[1])
+
+
+def _trailing(call):
+    """The trailing metadata of a finished call, if it has any."""
+    trailing = getattr(call, "trailing_metadata", None)
+    if callable(trailing):
+        trailing = trailing()
+    return trailing
+
+
+def _status_headers(grpc_code: int, grpc_name: str, trailing) -> dict:
+    """Response headers for a finished call: its status and trailing metadata."""
+    headers = {"grpc-status": str(grpc_code), "grpc-status-name": grpc_name}
+    if trailing:
+        headers.update(_metadata_to_dict(trailing))
+    return headers
+
+
 def _metadata_to_dict(metadata) -> dict:
     """Convert gRPC metadata (list of tuples) to a dict."""
     if metadata is None:
@@ -95,28 +197,97 @@ def _proto_to_json(message) -> str:
     Google Cloud client libraries).  Proto-plus objects expose the
     underlying protobuf via a ``_pb`` attribute.
     """
+    json_format = _json_format()
+    if json_format is None:
+        return str(message)
     try:
-        from google.protobuf.json_format import (  # type: ignore[unresolved-import]  # noqa: PLC0415 -- optional dependency
-            MessageToJson,
-        )
-
         # proto-plus wraps protobuf messages; unwrap before serializing.
         pb = getattr(message, "_pb", message)
-        return MessageToJson(pb)
+        return json_format.MessageToJson(pb)
     except Exception:
         return str(message)
 
 
-def _make_interceptor_class(base_class):
-    """Create the interceptor class with the correct gRPC base class.
+@functools.cache
+def _json_format():
+    """``google.protobuf.json_format``, imported once; ``None`` without protobuf."""
+    try:
+        from google.protobuf import (  # type: ignore[unresolved-import]  # noqa: PLC0415 -- optional dependency
+            json_format,
+        )
+    except ImportError:
+        return None
+    return json_format
+
 
-    We can't inherit from grpc.UnaryUnaryClientInterceptor at module level
-    because grpc is an optional dependency. This factory is called from
-    patch_grpc() after grpc has been successfully imported.
+def _proto_snapshot(message, max_bytes: int | None = None) -> Body:
+    """Snapshot *message* for rendering as JSON on the transport worker.
+
+    Keeps the ``SerializeToString()`` bytes and the full type name of
+    the message: serializing is cheap compared to ``MessageToJson``, and
+    decouples the capture from later changes to the message object.
+    Messages larger than *max_bytes* are not kept: a truncated message
+    can't be rendered.
     """
+    pb = getattr(message, "_pb", message)
+    try:
+        data = pb.SerializeToString()
+        type_name = pb.DESCRIPTOR.full_name
+    except Exception:
+        return str(message)
+    if max_bytes is not None and len(data) > max_bytes:
+        return f"<protobuf: {len(data)} bytes, larger than max_body_bytes>"
+    return functools.partial(_render_proto, type_name, data)
 
-    class _SmelloInterceptor(base_class):
-        """gRPC unary-unary client interceptor that captures calls."""
+
+def _render_proto(type_name: str, data: bytes) -> str:
+    message_class = _message_class(type_name)
+    try:
+        message = message_class.FromString(data)  # type: ignore[possibly-unbound-attribute]
+    except Exception:
+        return f"<protobuf {type_name}: {len(data)} bytes>"
+    return _proto_to_json(message)
+
+
+@functools.lru_cache(maxsize=1024)
+def _message_class(type_name: str):
+    """The message class for *type_name* in the default descriptor pool.
+
+    Generated ``*_pb2`` modules and proto-plus types register their
+    messages there.  Returns ``None`` for unknown types.
+    """
+    try:
+        from google.protobuf import (  # type: ignore[unresolved-import]  # noqa: PLC0415 -- optional dependency
+            descriptor_pool,
+            message_factory,
+        )
+
+        descriptor = descriptor_pool.Default().FindMessageTypeByName(type_name)
+        return message_factory.GetMessageClass(descriptor)
+    except Exception:
+        return None
+
+
+def _render_messages(*messages) -> str:
+    """Render snapshotted stream messages as a JSON array.
+
+    Snapshots render to JSON; placeholders (messages over the size limit
+    or that aren't protobuf) are quoted as JSON strings.
+    """
+    parts = [m() if callable(m) else json.dumps(m) for m in messages]
+    return "[" + ", ".join(parts) + "]"
+
+
+def _make_interceptor_class(*base_classes):
+    """Create the interceptor class with the correct gRPC base classes.
+
+    We can't inherit from grpc.UnaryUnaryClientInterceptor and friends at
+    module level because grpc is an optional dependency. This factory is
+    called from patch_grpc() after grpc has been successfully imported.
+    """
+
+    class _SmelloInterceptor(*base_classes):
+        """gRPC client interceptor that captures unary and streaming calls."""
 
         def __init__(self, config: SmelloConfig, target: str):
             self._config = config
@@ -127,93 +298,543 @@ def _make_interceptor_class(base_class):
                 self._config, self._target, continuation, client_call_details, request
             )
 
+        def intercept_unary_stream(self, continuation, client_call_details, request):
+            return _intercept_unary_stream(
+                self._config, self._target, continuation, client_call_details, request
+            )
+
+        def intercept_stream_unary(
+            self, continuation, client_call_details, request_iterator
+        ):
+            return _intercept_stream_unary(
+                self._config,
+                self._target,
+                continuation,
+                client_call_details,
+                request_iterator,
+            )
+
+        def intercept_stream_stream(
+            self, continuation, client_call_details, request_iterator
+        ):
+            return _intercept_stream_stream(
+                self._config,
+                self._target,
+                continuation,
+                client_call_details,
+                request_iterator,
+            )
+
     return _SmelloInterceptor
 
 
 def _intercept_unary_unary(config, target, continuation, client_call_details, request):
-    host = _extract_host(target)
+    entered = time.monotonic()
+    capture = _start_capture(
+        config, target, client_call_details, entered, request, response_streaming=False
+    )
+    if capture is None:
+        return continuation(client_call_details, request)
+    return _capture_when_done(capture, continuation, client_call_details, request)
 
-    if not config.should_capture(host):
+
+def _intercept_unary_stream(config, target, continuation, client_call_details, request):
+    entered = time.monotonic()
+    capture = _start_capture(config, target, client_call_details, entered, request)
+    if capture is None:
         return continuation(client_call_details, request)
+    return _ResponseStream(continuation(client_call_details, request), capture)
 
-    method = client_call_details.method
-    if isinstance(method, bytes):
-        method = method.decode("utf-8")
 
-    url = f"grpc://{target}{method}"
+def _intercept_stream_unary(
+    config, target, continuation, client_call_details, request_iterator
+):
+    entered = time.monotonic()
+    capture = _start_capture(
+        config, target, client_call_details, entered, response_streaming=False
+    )
+    if capture is None:
+        return continuation(client_call_details, request_iterator)
+    return _capture_when_done(
+        capture,
+        continuation,
+        client_call_details,
+        capture.tee_requests(request_iterator),
+    )
+
 
-    request_headers = _metadata_to_dict(client_call_details.metadata)
-    request_body = _proto_to_json(request)
+def _capture_when_done(capture, continuation, client_call_details, request):
+    """Start a call with a unary response and capture it once it completes.
 
-    start = time.monotonic()
+    The call is returned as soon as it started: ``stub.Method.future()``
+    fan-out keeps its parallelism, and blocking calls wait in grpc as
+    usual.  grpc runs the done-callback on its own thread, or right away
+    if the call already finished.
+    """
     try:
         response = continuation(client_call_details, request)
-        result = response.result()
-        duration = time.monotonic() - start
-
-        status_code = _grpc_status_to_http(0)
-        response_body = _proto_to_json(result)
-        response_headers = {
-            "grpc-status": "0",
-            "grpc-status-name": "OK",
-        }
-        trailing = getattr(response, "trailing_metadata", None)
-        if callable(trailing):
-            trailing = trailing()
-        if trailing:
-            response_headers.update(_metadata_to_dict(trailing))
     except Exception as err:
-        duration = time.monotonic() - start
+        capture.finish(_status(err, (2, "UNKNOWN")), None, err=err)
+        raise
+    response.add_done_callback(functools.partial(_unary_done, capture))
+    return response
+
+
+def _unary_done(capture: "_CallCapture", future) -> None:
+    try:
+        if future.cancelled():
+            capture.finish((1, "CANCELLED"), None)
+            return
+        err = future.exception()
+        result = None if err is not None else future.result()
+    except Exception as exc:
+        err = exc
+    if err is not None:
+        capture.finish(_status(err, (2, "UNKNOWN")), _trailing(future), err=err)
+    else:
+        capture.finish((0, "OK"), _trailing(future), result=result)
+
+
+def _intercept_stream_stream(
+    config, target, continuation, client_call_details, request_iterator
+):
+    entered = time.monotonic()
+    capture = _start_capture(config, target, client_call_details, entered)
+    if capture is None:
+        return continuation(client_call_details, request_iterator)
+    response = continuation(client_call_details, capture.tee_requests(request_iterator))
+    return _ResponseStream(response, capture)
+
+
+def _start_capture(
+    config,
+    target,
+    client_call_details,
+    entered,
+    request=None,
+    response_streaming=True,
+):
+    """Begin recording a call, or return ``None`` to leave it alone.
+
+    *request* is the request message of a call with a unary request;
+    calls without one stream their requests.
+    """
+    host = _extract_host(target)
+    method = client_call_details.method
+    if isinstance(method, bytes):
+        method = method.decode("utf-8")
+
+    if not config.should_capture(host, method):
+        return None
+    sampled = config.sampler.sample(host)
+    if sampled is None:
+        return None
+    return _CallCapture(
+        config,
+        host,
+        f"grpc://{target}{method}",
+        client_call_details.metadata,
+        sampled,
+        entered,
+        request,
+        response_streaming,
+    )
 
-        grpc_code = 2  # UNKNOWN
-        grpc_name = "UNKNOWN"
-        response_body = str(err)
 
-        if hasattr(err, "code") and callable(err.code):
-            code_obj = err.code()  # type: ignore[call-top-callable]
-            if hasattr(code_obj, "value"):
-                grpc_code = code_obj.value[0]  # type: ignore[not-subscriptable]
-                grpc_name = code_obj.name if hasattr(code_obj, "name") else grpc_name
+class _MessageLog:
+    """Count, time and sample the messages of one direction of a stream.
 
-        status_code = _grpc_status_to_http(grpc_code)
-        response_headers = {
-            "grpc-status": str(grpc_code),
-            "grpc-status-name": grpc_name,
-        }
+    The first ``_STREAM_SAMPLE_MESSAGES`` messages are snapshotted for the
+    capture body, up to *sample_bytes* in total; ``0`` keeps none.
+    """
 
+    __slots__ = (
+        "count",
+        "bytes",
+        "first_at",
+        "last_at",
+        "max_gap",
+        "samples",
+        "overhead",
+        "_room",
+    )
+
+    def __init__(self, sample_bytes: int):
+        self.count = 0
+        self.bytes = 0
+        self.first_at = 0.0
+        self.last_at = 0.0
+        self.max_gap = 0.0
+        self.samples: list[Body] = []
+        # Time spent recording, reported as patch overhead
+        self.overhead = 0.0
+        self._room = sample_bytes
+
+    def record(self, message) -> None:
+        now = time.monotonic()
+        if self.count:
+            self.max_gap = max(self.max_gap, now - self.last_at)
+        else:
+            self.first_at = now
+        self.last_at = now
+        self.count += 1
+
+        pb = getattr(message, "_pb", message)
         try:
-            _send_capture(
-                config=config,
-                method="POST",
-                url=url,
-                request_headers=request_headers,
-                request_body=request_body,
-                status_code=status_code,
-                response_headers=response_headers,
-                response_body=response_body,
-                duration_s=duration,
-            )
-        except Exception as capture_err:
-            logger.debug("Failed to capture gRPC request: %s", capture_err)
+            size = pb.ByteSize()
+        except Exception:
+            size = 0
+        self.bytes += size
+        if self._room > 0 and len(self.samples) < _STREAM_SAMPLE_MESSAGES:
+            self.samples.append(_proto_snapshot(message, self._room))
+            self._room -= size
+        self.overhead += time.monotonic() - now
+
+    def mean_gap(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return (self.last_at - self.first_at) / (self.count - 1)
+
+    def body(self) -> Body:
+        if not self.samples:
+            return None
+        return functools.partial(_render_messages, *self.samples)
+
+
+class _CallCapture:
+    """Record a call and send its capture when it finishes.
+
+    Streamed messages are counted as they pass through; nothing is
+    buffered beyond the sampled messages.  :meth:`finish` sends the
+    capture once, from whichever thread or task sees the call end first.
+    """
 
-        raise
+    def __init__(
+        self,
+        config,
+        host,
+        url,
+        metadata,
+        sampled,
+        entered,
+        request=None,
+        response_streaming=True,
+    ):
+        self.config = config
+        self.host = host
+        self.url = url
+        self.request_headers = _metadata_to_dict(metadata)
+        self.sampled = sampled
+        self.request_streaming = request is None
+        self.response_streaming = response_streaming
+        # Calls that weren't sampled are only copied if a tail rule keeps them.
+        sample_bytes = config.max_body_bytes if sampled else 0
+        self.requests = _MessageLog(sample_bytes)
+        self.responses = _MessageLog(sample_bytes)
+        self._request = request
+        self._request_body = (
+            _proto_snapshot(request, config.max_body_bytes)
+            if sampled and request is not None
+            else None
+        )
+        self._lock = threading.Lock()
+        self._done = False
+        self.start = time.monotonic()
+        self._overhead = self.start - entered
+
+    def tee_requests(self, request_iterator):
+        """Yield the request messages, recording each one."""
+        for message in request_iterator:
+            self.requests.record(message)
+            yield message
+
+    async def atee_requests(self, request_iterator):
+        """Like :meth:`tee_requests`, for sync or async iterators."""
+        if hasattr(request_iterator, "__aiter__"):
+            async for message in request_iterator:
+                self.requests.record(message)
+                yield message
+        else:
+            for message in request_iterator:
+                self.requests.record(message)
+                yield message
+
+    def finish(self, status: tuple[int, str], trailing, err=None, result=None):
+        """Send the capture of the finished call (only the first time).
+
+        *status* is the gRPC status code and name, *err* the exception
+        the call failed with, and *result* the response message of a
+        call with a unary response.
+        """
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        finished = time.monotonic()
+        duration = finished - self.start
+        status_code = _grpc_status_to_http(status[0])
+
+        rate = self.config.sampler.keep(
+            self.host, self.sampled, status_code, duration, error=err is not None
+        )
+        if rate is not None:
+            try:
+                self._send(status, trailing, err, result, duration, rate)
+            except Exception as capture_err:
+                logger.debug("Failed to capture gRPC request: %s", capture_err)
+
+        _stats.observe(
+            "patch_overhead",
+            self._overhead
+            + self.requests.overhead
+            + self.responses.overhead
+            + (time.monotonic() - finished),
+        )
+
+    def _send(self, status, trailing, err, result, duration, rate) -> None:
+        if self.request_streaming:
+            request_body = self.requests.body()
+        elif self._request_body is not None:
+            request_body = self._request_body
+        else:
+            request_body = _proto_snapshot(self._request, self.config.max_body_bytes)
+
+        if self.response_streaming:
+            response_body = self.responses.body()
+        elif result is not None:
+            response_body = _proto_snapshot(result, self.config.max_body_bytes)
+        else:
+            response_body = None
+        if response_body is None and err is not None:
+            response_body = str(err)
+
+        response_headers = _status_headers(*status, trailing)
+        response_headers.update(self._stream_headers())
 
-    try:
         _send_capture(
-            config=config,
+            config=self.config,
             method="POST",
-            url=url,
-            request_headers=request_headers,
+            url=self.url,
+            request_headers=self.request_headers,
             request_body=request_body,
-            status_code=status_code,
+            status_code=_grpc_status_to_http(status[0]),
             response_headers=response_headers,
             response_body=response_body,
             duration_s=duration,
+            sample_rate=rate,
         )
-    except Exception as capture_err:
-        logger.debug("Failed to capture gRPC request: %s", capture_err)
 
-    return response
+    def _stream_headers(self) -> dict:
+        """Message counts, sizes and timings, as ``smello-stream-*`` headers."""
+        headers = {}
+        if self.request_streaming:
+            headers["smello-stream-requests"] = str(self.requests.count)
+            headers["smello-stream-request-bytes"] = str(self.requests.bytes)
+        if self.response_streaming:
+            responses = self.responses
+            headers["smello-stream-responses"] = str(responses.count)
+            headers["smello-stream-response-bytes"] = str(responses.bytes)
+            if responses.count:
+                headers["smello-stream-first-response-ms"] = _ms(
+                    responses.first_at - self.start
+                )
+                headers["smello-stream-max-gap-ms"] = _ms(responses.max_gap)
+                headers["smello-stream-mean-gap-ms"] = _ms(responses.mean_gap())
+        return headers
+
+
+class _ResponseStream:
+    """A streaming call, as returned to the application.
+
+    Iterating it records each response message; the capture is sent
+    when the stream is exhausted, fails or is cancelled.  Everything
+    else (``code()``, ``trailing_metadata()``, ``add_done_callback()``,
+    ...) is delegated to the call.
+    """
+
+    def __init__(self, call, capture: _CallCapture):
+        self._call = call
+        self._capture = capture
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            message = next(self._call)
+        except StopIteration:
+            self._finish((0, "OK"))
+            raise
+        except Exception as err:
+            self._finish((2, "UNKNOWN"), err)
+            raise
+        self._capture.responses.record(message)
+        return message
+
+    def cancel(self):
+        cancelled = self._call.cancel()
+        self._finish((1, "CANCELLED"))
+        return cancelled
+
+    def _finish(self, default: tuple[int, str], err=None) -> None:
+        status = _status(err if err is not None else self._call, default)
+        self._capture.finish(status, _trailing(self._call), err=err)
+
+    def __getattr__(self, name):
+        return getattr(self._call, name)
+
+
+class _AioInterceptor:
+    """grpc.aio client interceptor methods that capture calls.
+
+    grpc.aio files each interceptor under a single kind of call, so
+    :func:`_make_aio_interceptor_classes` combines this class with each
+    of the four grpc.aio interceptor base classes.
+    """
+
+    def __init__(self, config: SmelloConfig, target: str):
+        self._config = config
+        self._target = target
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        return await _aio_intercept_unary_unary(
+            self._config, self._target, continuation, client_call_details, request
+        )
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        return await _aio_intercept_unary_stream(
+            self._config, self._target, continuation, client_call_details, request
+        )
+
+    async def intercept_stream_unary(
+        self, continuation, client_call_details, request_iterator
+    ):
+        return await _aio_intercept_stream_unary(
+            self._config,
+            self._target,
+            continuation,
+            client_call_details,
+            request_iterator,
+        )
+
+    async def intercept_stream_stream(
+        self, continuation, client_call_details, request_iterator
+    ):
+        return await _aio_intercept_stream_stream(
+            self._config,
+            self._target,
+            continuation,
+            client_call_details,
+            request_iterator,
+        )
+
+
+def _make_aio_interceptor_classes(*base_classes) -> list[type]:
+    """Create one grpc.aio interceptor class per base class."""
+    return [
+        type(f"_SmelloAio{base.__name__}", (_AioInterceptor, base), {})
+        for base in base_classes
+    ]
+
+
+async def _aio_intercept_unary_unary(
+    config, target, continuation, client_call_details, request
+):
+    entered = time.monotonic()
+    capture = _start_capture(
+        config, target, client_call_details, entered, request, response_streaming=False
+    )
+    call = await continuation(client_call_details, request)
+    if capture is not None:
+        _watch(capture, call)
+    return call
+
+
+async def _aio_intercept_unary_stream(
+    config, target, continuation, client_call_details, request
+):
+    entered = time.monotonic()
+    capture = _start_capture(config, target, client_call_details, entered, request)
+    call = await continuation(client_call_details, request)
+    if capture is None:
+        return call
+    return _aio_responses(call, capture)
+
+
+async def _aio_intercept_stream_unary(
+    config, target, continuation, client_call_details, request_iterator
+):
+    entered = time.monotonic()
+    capture = _start_capture(
+        config, target, client_call_details, entered, response_streaming=False
+    )
+    if capture is None:
+        return await continuation(client_call_details, request_iterator)
+    call = await continuation(
+        client_call_details, capture.atee_requests(request_iterator)
+    )
+    _watch(capture, call)
+    return call
+
+
+async def _aio_intercept_stream_stream(
+    config, target, continuation, client_call_details, request_iterator
+):
+    entered = time.monotonic()
+    capture = _start_capture(config, target, client_call_details, entered)
+    if capture is None:
+        return await continuation(client_call_details, request_iterator)
+    call = await continuation(
+        client_call_details, capture.atee_requests(request_iterator)
+    )
+    return _aio_responses(call, capture)
+
+
+def _watch(capture: _CallCapture, call) -> None:
+    """Send the capture of a grpc.aio call with a unary response once it's done.
+
+    The call goes back to the application right away; a task on the
+    event loop waits for it.
+    """
+    task = asyncio.ensure_future(_aio_finish(capture, call))
+    _watch_tasks.add(task)
+    task.add_done_callback(_watch_tasks.discard)
+
+
+async def _aio_finish(capture: _CallCapture, call) -> None:
+    try:
+        result = await call
+    except asyncio.CancelledError:
+        capture.finish((1, "CANCELLED"), None)
+        return
+    except Exception as err:  # grpc.aio.AioRpcError
+        capture.finish(_status(err, (2, "UNKNOWN")), _trailing(err), err=err)
+        return
+    capture.finish((0, "OK"), await call.trailing_metadata(), result=result)
+
+
+async def _aio_responses(call, capture: _CallCapture):
+    """Yield the responses of a grpc.aio streaming call, recording each one.
+
+    grpc.aio wraps this iterator in a call object, so the application
+    keeps ``code()``, ``cancel()``, ``write()`` and the rest.
+    """
+    try:
+        async for message in call:
+            capture.responses.record(message)
+            yield message
+    except asyncio.CancelledError:
+        capture.finish((1, "CANCELLED"), None)
+        raise
+    except Exception as err:  # grpc.aio.AioRpcError
+        capture.finish(_status(err, (2, "UNKNOWN")), _trailing(err), err=err)
+        raise
+    status = _code_status(await call.code(), (0, "OK"))
+    capture.finish(status, await call.trailing_metadata())
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
 
 
 def _send_capture(
@@ -221,13 +842,14 @@ def _send_capture(
     method: str,
     url: str,
     request_headers: dict,
-    request_body: str,
+    request_body: Body,
     status_code: int,
     response_headers: dict,
-    response_body: str,
+    response_body: Body,
     duration_s: float,
+    sample_rate: float = 1.0,
 ) -> None:
-    payload = serialize_request_response(
+    capture = Capture(
         config=config,
         method=method,
         url=url,
@@ -238,5 +860,8 @@ def _send_capture(
         response_body=response_body,
         duration_s=duration_s,
         library="grpc",
+        request_content_type="application/grpc",
+        response_content_type="application/grpc",
+        sample_rate=sample_rate,
     )
-    send(payload)
+    send(capture)
@@ -2,14 +2,25 @@
 
 import logging
 import time
-from urllib.parse import urlparse
 
-from smello.capture import serialize_request_response
+from smello import _stats, _timings
+from smello._tee import BodyTee, head_limit
+from smello.capture import Capture
 from smello.config import SmelloConfig
 from smello.transport import send
 
 logger = logging.getLogger(__name__)
 
+# httpcore trace steps and the phases they time.  httpcore resolves
+# names inside ``connect_tcp``, so DNS is part of the connect phase.
+_TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "connect_unix_socket": "connect",
+    "start_tls": "tls",
+    "receive_response_headers": "ttfb",
+    "receive_response_body": "download",
+}
+
 
 def patch_httpx(config: SmelloConfig) -> None:
     """Patch httpx.Client.send and httpx.AsyncClient.send."""
@@ -26,32 +37,37 @@ def _patch_sync(httpx, config: SmelloConfig) -> None:
     original_send = httpx.Client.send
 
     def patched_send(self, request, **kwargs):
-        host = urlparse(str(request.url)).hostname or ""
+        entered = time.monotonic()
+        host = request.url.host
 
-        if not config.should_capture(host):
+        if not config.should_capture(host, request.url.path):
+            return original_send(self, request, **kwargs)
+        sampled = config.sampler.sample(host)
+        if sampled is None:
             return original_send(self, request, **kwargs)
 
+        timer = _timings.PhaseTimer()
+        _add_trace(request, _sync_trace(timer, request.extensions.get("trace")))
+        timer.start("pool_wait")
+        started_at = time.time()
         start = time.monotonic()
         response = original_send(self, request, **kwargs)
         duration = time.monotonic() - start
 
-        try:
-            payload = serialize_request_response(
-                config=config,
-                method=request.method,
-                url=str(request.url),
-                request_headers=dict(request.headers),
-                request_body=request.content,
-                status_code=response.status_code,
-                response_headers=dict(response.headers),
-                response_body=response.text,
-                duration_s=duration,
-                library="httpx",
+        rate = config.sampler.keep(host, sampled, response.status_code, duration)
+        if rate is not None and kwargs.get("stream"):
+            _tee_stream(config, request, response, start, started_at, rate, timer, self)
+        elif rate is not None:
+            _send_capture(
+                config,
+                request,
+                response,
+                duration,
+                sample_rate=rate,
+                timer=timer,
+                client=self,
             )
-            send(payload)
-        except Exception as err:
-            logger.debug("Failed to capture request: %s", err)
-
+        _stats.observe("patch_overhead", time.monotonic() - entered - duration)
         return response
 
     httpx.Client.send = patched_send
@@ -61,32 +77,211 @@ def _patch_async(httpx, config: SmelloConfig) -> None:
     original_send = httpx.AsyncClient.send
 
     async def patched_send(self, request, **kwargs):
-        host = urlparse(str(request.url)).hostname or ""
+        entered = time.monotonic()
+        host = request.url.host
 
-        if not config.should_capture(host):
+        if not config.should_capture(host, request.url.path):
+            return await original_send(self, request, **kwargs)
+        sampled = config.sampler.sample(host)
+        if sampled is None:
             return await original_send(self, request, **kwargs)
 
+        timer = _timings.PhaseTimer()
+        _add_trace(request, _async_trace(timer, request.extensions.get("trace")))
+        timer.start("pool_wait")
+        started_at = time.time()
         start = time.monotonic()
         response = await original_send(self, request, **kwargs)
         duration = time.monotonic() - start
 
-        try:
-            payload = serialize_request_response(
-                config=config,
-                method=request.method,
-                url=str(request.url),
-                request_headers=dict(request.headers),
-                request_body=request.content,
-                status_code=response.status_code,
-                response_headers=dict(response.headers),
-                response_body=response.text,
-                duration_s=duration,
-                library="httpx",
+        rate = config.sampler.keep(host, sampled, response.status_code, duration)
+        if rate is not None and kwargs.get("stream"):
+            _tee_stream(config, request, response, start, started_at, rate, timer, self)
+        elif rate is not None:
+            _send_capture(
+                config,
+                request,
+                response,
+                duration,
+                sample_rate=rate,
+                timer=timer,
+                client=self,
             )
-            send(payload)
-        except Exception as err:
-            logger.debug("Failed to capture request: %s", err)
-
+        _stats.observe("patch_overhead", time.monotonic() - entered - duration)
         return response
 
     httpx.AsyncClient.send = patched_send
+
+
+def _add_trace(request, trace) -> None:
+    """Install httpcore's ``trace`` extension on *request*.
+
+    The extensions are copied, since applications may share one dict
+    between requests.
+    """
+    request.extensions = {**request.extensions, "trace": trace}
+
+
+def _sync_trace(timer: _timings.PhaseTimer, chained):
+    def trace(name: str, info: dict):
+        _on_trace(timer, name)
+        if chained is not None:
+            chained(name, info)
+
+    return trace
+
+
+def _async_trace(timer: _timings.PhaseTimer, chained):
+    async def trace(name: str, info: dict):
+        _on_trace(timer, name)
+        if chained is not None:
+            await chained(name, info)
+
+    return trace
+
+
+def _on_trace(timer: _timings.PhaseTimer, name: str) -> None:
+    """Report an httpcore trace event like ``connection.start_tls.started``.
+
+    httpcore has no event for getting a connection from the pool: the
+    pool wait is the time from ``send()`` to the first event.
+    """
+    timer.stop("pool_wait")
+    step, _, state = name.rpartition(".")
+    phase = _TRACE_PHASES.get(step.rpartition(".")[2])
+    if phase is None:
+        return
+    if state == "started":
+        if phase == "connect":
+            timer.new_connection()
+        timer.start(phase)
+        return
+    # "complete" or "failed"
+    timer.stop(phase)
+    if phase == "ttfb":
+        timer.response_started()
+
+
+def _tee_stream(
+    config: SmelloConfig,
+    request,
+    response,
+    start,
+    started_at,
+    sample_rate,
+    timer: _timings.PhaseTimer | None = None,
+    client=None,
+) -> None:
+    """Capture a streamed response once the application read or closed it.
+
+    ``iter_bytes`` / ``aiter_bytes`` back ``read()``, ``iter_text()`` and
+    ``iter_lines()``, and httpx closes the response when the stream is
+    exhausted, so wrapping those methods on the instance sees every
+    decoded chunk.  Reads through ``iter_raw()`` bypass the tee.
+    """
+
+    def on_done(head: bytes, size: int) -> None:
+        _send_capture(
+            config,
+            request,
+            response,
+            time.monotonic() - start,
+            body=head,
+            body_size=size,
+            timestamp=started_at,
+            sample_rate=sample_rate,
+            timer=timer,
+            client=client,
+        )
+
+    try:
+        limit = head_limit(config, response.headers.get("content-type"))
+        tee = BodyTee(limit, on_done)
+        iter_bytes = response.iter_bytes
+        aiter_bytes = response.aiter_bytes
+        close = response.close
+        aclose = response.aclose
+
+        def tee_iter_bytes(*args, **kwargs):
+            for chunk in iter_bytes(*args, **kwargs):
+                tee.feed(chunk)
+                yield chunk
+
+        async def tee_aiter_bytes(*args, **kwargs):
+            async for chunk in aiter_bytes(*args, **kwargs):
+                tee.feed(chunk)
+                yield chunk
+
+        def tee_close():
+            try:
+                close()
+            finally:
+                tee.finish()
+
+        async def tee_aclose():
+            try:
+                await aclose()
+            finally:
+                tee.finish()
+
+        response.iter_bytes = tee_iter_bytes
+        response.aiter_bytes = tee_aiter_bytes
+        response.close = tee_close
+        response.aclose = tee_aclose
+    except Exception as err:
+        logger.debug("Failed to capture request: %s", err)
+
+
+def _send_capture(
+    config: SmelloConfig,
+    request,
+    response,
+    duration_s: float,
+    body: bytes | None = None,
+    body_size: int | None = None,
+    timestamp: float | None = None,
+    sample_rate: float = 1.0,
+    timer: _timings.PhaseTimer | None = None,
+    client=None,
+) -> None:
+    """Queue a capture; *body* defaults to the (already read) response content."""
+    try:
+        if body is None:
+            body = response.content
+        capture = Capture(
+            config=config,
+            method=request.method,
+            url=str(request.url),
+            request_headers=request.headers,
+            request_body=_request_body(request),
+            status_code=response.status_code,
+            response_headers=response.headers,
+            response_body=body,
+            response_encoding=response.charset_encoding,
+            response_body_size=body_size,
+            duration_s=duration_s,
+            library="httpx",
+            timestamp=timestamp,
+            sample_rate=sample_rate,
+            timings=timer.to_dict() if timer is not None else None,
+            client_id=_timings.client_id(client) if client is not None else None,
+            pool_size=_pool_size(client, request.url),
+        )
+        send(capture)
+    except Exception as err:
+        logger.debug("Failed to capture request: %s", err)
+
+
+def _pool_size(client, url) -> int | None:
+    """Connections the client's httpcore pool for *url* may open."""
+    try:
+        return client._transport_for_url(url)._pool._max_connections
+    except Exception:  # mocked or custom transport, proxies
+        return None
+
+
+def _request_body(request) -> bytes | None:
+    try:
+        return request.content
+    except Exception:  # httpx.RequestNotRead: streamed upload
+        return None
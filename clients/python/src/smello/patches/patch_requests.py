@@ -1,10 +1,13 @@
 """Monkey-patch for the `requests` library."""
 
 import logging
+import socket
 import time
-from urllib.parse import urlparse
+from urllib.parse import urlsplit
 
-from smello.capture import serialize_request_response
+from smello import _stats, _timings
+from smello._tee import BodyTee, head_limit
+from smello.capture import Capture
 from smello.config import SmelloConfig
 from smello.transport import send
 
@@ -18,35 +21,243 @@ def patch_requests(config: SmelloConfig) -> None:
     except ImportError:
         return  # requests not installed, skip
 
+    _hook_urllib3()
     original_send = requests.Session.send
 
     def patched_send(self, prepared_request, **kwargs):
-        host = urlparse(prepared_request.url).hostname or ""
+        entered = time.monotonic()
+        url = urlsplit(prepared_request.url)
+        host = url.hostname or ""
 
-        if not config.should_capture(host):
+        if not config.should_capture(host, url.path):
+            return original_send(self, prepared_request, **kwargs)
+        sampled = config.sampler.sample(host)
+        if sampled is None:
             return original_send(self, prepared_request, **kwargs)
 
+        timer = _timings.PhaseTimer()
+        started_at = time.time()
         start = time.monotonic()
-        response = original_send(self, prepared_request, **kwargs)
+        previous = _timings.activate(timer)
+        try:
+            response = original_send(self, prepared_request, **kwargs)
+        finally:
+            _timings.restore(previous)
         duration = time.monotonic() - start
 
-        try:
-            payload = serialize_request_response(
-                config=config,
-                method=prepared_request.method or "GET",
-                url=prepared_request.url,
-                request_headers=dict(prepared_request.headers),
-                request_body=prepared_request.body,
-                status_code=response.status_code,
-                response_headers=dict(response.headers),
-                response_body=response.text,
-                duration_s=duration,
-                library="requests",
-            )
-            send(payload)
-        except Exception as err:
-            logger.debug("Failed to capture request: %s", err)
+        rate = config.sampler.keep(host, sampled, response.status_code, duration)
+        if rate is not None and kwargs.get("stream"):
+            # Capture once the application has read (or closed) the body.
+            def on_done(head: bytes, size: int) -> None:
+                timer.stop("download")
+                _send_capture(
+                    config,
+                    prepared_request,
+                    response,
+                    time.monotonic() - start,
+                    body=head,
+                    body_size=size,
+                    timestamp=started_at,
+                    sample_rate=rate,
+                    timer=timer,
+                    session=self,
+                )
 
+            try:
+                limit = head_limit(config, response.headers.get("content-type"))
+                _tee_response(response, BodyTee(limit, on_done))
+            except Exception as err:
+                logger.debug("Failed to capture request: %s", err)
+        elif rate is not None:
+            timer.stop("download")
+            _send_capture(
+                config,
+                prepared_request,
+                response,
+                duration,
+                sample_rate=rate,
+                timer=timer,
+                session=self,
+            )
+        _stats.observe("patch_overhead", time.monotonic() - entered - duration)
         return response
 
     requests.Session.send = patched_send  # type: ignore[assignment]
+
+
+_urllib3_hooked = False
+
+
+def _hook_urllib3() -> None:
+    """Report connection phases of urllib3 to the current phase timer.
+
+    The hooks time the wait for a pooled connection, name resolution,
+    the TCP connect, the TLS handshake and the wait for the response
+    headers.  They do nothing on threads
+    without a call in progress, and are installed once.
+    """
+    global _urllib3_hooked
+    if _urllib3_hooked:
+        return
+    try:
+        from urllib3 import (  # noqa: PLC0415 -- comes with requests
+            connection,
+            connectionpool,
+        )
+        from urllib3.util import connection as util_connection  # noqa: PLC0415
+    except ImportError:
+        return
+    _urllib3_hooked = True
+
+    pool = connectionpool.HTTPConnectionPool
+    get_conn = pool._get_conn
+    http_connection = connection.HTTPConnection
+    new_conn = http_connection._new_conn
+    getresponse = http_connection.getresponse
+    tls_connect = connection.HTTPSConnection.connect
+
+    def timed_get_conn(self, *args, **kwargs):
+        # Waits only for pools created with block=True; other pools open
+        # an extra connection instead.
+        timer = _timings.current()
+        if timer is None:
+            return get_conn(self, *args, **kwargs)
+        start = time.monotonic()
+        try:
+            return get_conn(self, *args, **kwargs)
+        finally:
+            timer.add("pool_wait", time.monotonic() - start)
+
+    def timed_new_conn(self):
+        timer = _timings.current()
+        if timer is None:
+            return new_conn(self)
+        timer.new_connection()
+        dns = timer.dns or 0.0
+        start = time.monotonic()
+        try:
+            return new_conn(self)
+        finally:
+            # Name resolution happens inside; it is timed on its own.
+            timer.add("connect", time.monotonic() - start - ((timer.dns or 0.0) - dns))
+
+    def timed_tls_connect(self):
+        timer = _timings.current()
+        if timer is None:
+            return tls_connect(self)
+        before = (timer.dns or 0.0) + (timer.connect or 0.0)
+        start = time.monotonic()
+        try:
+            return tls_connect(self)
+        finally:
+            opened = (timer.dns or 0.0) + (timer.connect or 0.0) - before
+            timer.add("tls", time.monotonic() - start - opened)
+
+    def timed_getresponse(self, *args, **kwargs):
+        timer = _timings.current()
+        if timer is None:
+            return getresponse(self, *args, **kwargs)
+        start = time.monotonic()
+        response = getresponse(self, *args, **kwargs)
+        timer.add("ttfb", time.monotonic() - start)
+        timer.response_started()
+        timer.start("download")
+        return response
+
+    pool._get_conn = timed_get_conn
+    http_connection._new_conn = timed_new_conn
+    http_connection.getresponse = timed_getresponse
+    connection.HTTPSConnection.connect = timed_tls_connect
+    util_connection.socket = _TimedResolver()
+
+
+def _pool_size(session, url: str) -> int | None:
+    """Connections per host the session's adapter for *url* keeps."""
+    try:
+        return session.get_adapter(url)._pool_maxsize
+    except Exception:
+        return None
+
+
+class _TimedResolver:
+    """Stands in for the ``socket`` module where urllib3 resolves names."""
+
+    def __getattr__(self, name):
+        return getattr(socket, name)
+
+    def getaddrinfo(self, *args, **kwargs):
+        timer = _timings.current()
+        if timer is None:
+            return socket.getaddrinfo(*args, **kwargs)
+        start = time.monotonic()
+        try:
+            return socket.getaddrinfo(*args, **kwargs)
+        finally:
+            timer.add("dns", time.monotonic() - start)
+
+
+def _tee_response(response, tee: BodyTee) -> None:
+    """Route the body of a streamed response through *tee*.
+
+    ``iter_content`` backs ``content``, ``iter_lines`` and direct
+    iteration, so wrapping it on the instance covers all of them.  Reads
+    from ``response.raw`` bypass the tee; the capture then only has the
+    headers.
+    """
+    iter_content = response.iter_content
+    close = response.close
+
+    def tee_iter_content(*args, **kwargs):
+        for chunk in iter_content(*args, **kwargs):
+            tee.feed(chunk)
+            yield chunk
+        tee.finish()
+
+    def tee_close():
+        try:
+            close()
+        finally:
+            tee.finish()
+
+    response.iter_content = tee_iter_content
+    response.close = tee_close
+
+
+def _send_capture(
+    config: SmelloConfig,
+    prepared_request,
+    response,
+    duration_s: float,
+    body: bytes | None = None,
+    body_size: int | None = None,
+    timestamp: float | None = None,
+    sample_rate: float = 1.0,
+    timer: _timings.PhaseTimer | None = None,
+    session=None,
+) -> None:
+    """Queue a capture; *body* defaults to the (already read) response content."""
+    try:
+        if body is None:
+            body = response.content
+        capture = Capture(
+            config=config,
+            method=prepared_request.method or "GET",
+            url=prepared_request.url,
+            request_headers=prepared_request.headers,
+            request_body=prepared_request.body,
+            status_code=response.status_code,
+            response_headers=response.headers,
+            response_body=body,
+            response_encoding=response.encoding,
+            response_body_size=body_size,
+            duration_s=duration_s,
+            library="requests",
+            timestamp=timestamp,
+            sample_rate=sample_rate,
+            timings=timer.to_dict() if timer is not None else None,
+            client_id=_timings.client_id(session) if session is not None else None,
+            pool_size=_pool_size(session, prepared_request.url),
+        )
+        send(capture)
+    except Exception as err:
+        logger.debug("Failed to capture request: %s", err)
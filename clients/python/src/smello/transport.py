@@ -1,39 +1,355 @@
 """Background transport: sends captured data to the Smello server without blocking."""
 
+import http.client
 import json
 import logging
+import os
+import platform
 import queue
+import socket
 import threading
-import urllib.request
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from smello import _sampling, _stats, _timings
+from smello._breaker import CLOSED, OPEN, CircuitBreaker
+from smello._collector import Collector, UnixHTTPConnection, is_supported, serve
+from smello._compression import get_compressor
+from smello._queue import CaptureQueue, payload_size
+from smello._spool import Spool
+from smello.capture import Capture
+from smello.config import SmelloConfig
 
 logger = logging.getLogger(__name__)
 
-_queue: queue.Queue = queue.Queue(maxsize=1000)
+# How many times a capture the server reported as failed is re-sent
+# before it is dropped.
+_MAX_ATTEMPTS = 3
+# Seconds to wait before re-sending failed captures; doubles per attempt.
+_RETRY_BACKOFF = 0.5
+# Upper bound for the delay between attempts to replay the spool.
+_MAX_REPLAY_BACKOFF = 30.0
+_TIMEOUT = 5
+# The server rejects larger batches.
+_MAX_BATCH_SIZE = 1000
+# Seconds the circuit breaker stays open at first; doubles per failed probe.
+_BREAKER_BASE_DELAY = 1.0
+# What happens to captures while the circuit breaker is open
+_BREAKER_POLICIES = ("spill", "drop")
+
+# Errors that mean a kept-alive socket was closed by the server between
+# requests; the request is then repeated once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+_QUEUE_SIZE = 1000
+_QUEUE_MAX_BYTES = 64 * 1024 * 1024
+# What happens to a capture that doesn't fit into the queue
+_OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block", "spill")
+
+_queue: CaptureQueue = CaptureQueue(_QUEUE_SIZE, _QUEUE_MAX_BYTES)
+_overflow: str = "drop_newest"
+_block_timeout: float = 0.1
+# Captures lost to a full queue: policy -> [items, bytes].  The "spill"
+# entry counts captures the spool couldn't take either.
+_dropped: dict[str, list[int]] = {policy: [0, 0] for policy in _OVERFLOW_POLICIES}
+_spilled: list[int] = [0, 0]
+_stats_lock = threading.Lock()
 _server_url: str = ""
 _started: bool = False
+_start_lock = threading.Lock()
+# Process that runs the worker thread; differs from os.getpid() after a fork
+_worker_pid: int = 0
+_batch_size: int = 100
+_batch_linger: float = 0.05
+_batch_supported: bool = True
+_compressor = None
+_compress_min_bytes: int = 1024
+_spool: Spool | None = None
+_collector_path: str | None = None
+# Set when this process is the collector for ``_collector_path``
+_collector: Collector | None = None
+# The persistent connection is owned by the worker thread.  Other threads
+# only change ``_server_url``; the worker notices and reconnects itself.
+_connection: http.client.HTTPConnection | None = None
+_connection_url: str = ""
+_reconnects: int = 0
+# Heartbeats: this process's stats, sent every ``_heartbeat_interval``
+# seconds (0 disables them).  A collector also forwards the heartbeats
+# its clients posted to it.
+_heartbeat_interval: float = 60.0
+_heartbeat_supported: bool = True
+_next_heartbeat: float = 0.0
+_instance_id: str = uuid.uuid4().hex
+_started_at: float = time.time()
+_peer_heartbeats: dict[str, dict] = {}
+# Stops sending while the server is unreachable; owned by the worker thread.
+_breaker = CircuitBreaker(base_delay=_BREAKER_BASE_DELAY)
+_breaker_policy: str = "drop"
+
 
+class _ServerHTTPError(Exception):
+    """The server answered with a non-2xx status."""
 
-def start_worker(server_url: str) -> None:
-    """Start the background worker thread."""
-    global _server_url, _started
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+
+
+def start_worker(server_url: str, config: SmelloConfig | None = None) -> None:
+    """Start the background worker thread.
+
+    Batch, queue, compression, spool and collector settings are taken
+    from *config* when given; calling this again updates them for the
+    already running worker.
+    """
+    global _server_url, _batch_size, _batch_linger, _batch_supported
+    global _compressor, _compress_min_bytes, _spool, _collector_path
+    global _overflow, _block_timeout, _heartbeat_interval, _heartbeat_supported
+    global _next_heartbeat, _breaker_policy
     _server_url = server_url
+    _batch_supported = True
+    _heartbeat_supported = True
+    _breaker.reset()
+    if config is not None:
+        _batch_size = min(max(1, config.batch_size), _MAX_BATCH_SIZE)
+        _batch_linger = max(0, config.batch_linger_ms) / 1000
+        _compressor = get_compressor(config.compression)
+        _compress_min_bytes = max(0, config.compress_min_bytes)
+        _spool = _open_spool(config)
+        _queue.resize(max(1, config.queue_max_items), max(0, config.queue_max_bytes))
+        _overflow = _overflow_policy(config, _spool)
+        _block_timeout = max(0, config.queue_block_timeout_ms) / 1000
+        _heartbeat_interval = max(0, config.heartbeat_interval_s)
+        _breaker.threshold = max(0, config.breaker_threshold)
+        _breaker.max_delay = max(_BREAKER_BASE_DELAY, config.breaker_max_backoff_s)
+        _breaker_policy = _open_policy(config, _spool)
+        _collector_path = config.collector_socket or None
+        if _collector_path and not is_supported():
+            logger.warning("Collector sockets are not supported on this platform")
+            _collector_path = None
+    _next_heartbeat = time.monotonic() + _heartbeat_interval
 
-    if _started:
-        return
-    _started = True
+    _ensure_worker()
+
+
+def _overflow_policy(config: SmelloConfig, spool: Spool | None) -> str:
+    policy = config.queue_overflow or ("spill" if spool else "drop_newest")
+    if policy not in _OVERFLOW_POLICIES:
+        logger.warning("Unknown queue overflow policy %r, using drop_newest", policy)
+        return "drop_newest"
+    if policy == "spill" and spool is None:
+        logger.warning("Queue overflow policy 'spill' needs spool_dir")
+        return "drop_newest"
+    return policy
+
+
+def _open_policy(config: SmelloConfig, spool: Spool | None) -> str:
+    policy = config.breaker_open_policy or ("spill" if spool else "drop")
+    if policy not in _BREAKER_POLICIES:
+        logger.warning("Unknown circuit breaker policy %r, using drop", policy)
+        return "drop"
+    if policy == "spill" and spool is None:
+        logger.warning("Circuit breaker policy 'spill' needs spool_dir")
+        return "drop"
+    return policy
+
+
+def _ensure_worker() -> None:
+    """Start the worker thread in this process unless it's running.
+
+    Also runs the collector election when a collector socket is set.
+    """
+    global _started, _worker_pid, _collector
+    with _start_lock:
+        if _collector is not None and _collector.path != _collector_path:
+            _collector.close()
+            _collector = None
+        if _collector_path and _collector is None:
+            _elect_collector()
+        if _started:
+            return
+        _started = True
+        _worker_pid = os.getpid()
 
     thread = threading.Thread(target=_worker, daemon=True, name="smello-transport")
     thread.start()
 
 
-def send(payload: dict) -> None:
-    """Queue a capture payload for sending. Non-blocking, drops if queue is full."""
+def _after_fork_in_child() -> None:
+    """Reset transport state inherited from the parent process.
+
+    The worker thread doesn't survive ``fork()``, and the locks of the
+    queue, the samplers and the client ids may have been held by another
+    thread at that moment.  The child gets a fresh queue and starts its
+    own worker on the first capture.  The parent's connection, collector
+    socket and spool stay with the parent.
+    """
+    global _queue, _start_lock, _started, _connection, _connection_url
+    global _reconnects, _spool, _collector, _stats_lock, _overflow
+    global _instance_id, _started_at, _peer_heartbeats, _breaker, _breaker_policy
+    _queue = CaptureQueue(_queue.maxsize, _queue.max_bytes)
+    _start_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    for counter in (*_dropped.values(), _spilled):
+        counter[:] = [0, 0]
+    _stats.reset()
+    _sampling.after_fork()
+    _timings.after_fork()
+    _instance_id = uuid.uuid4().hex
+    _started_at = time.time()
+    _peer_heartbeats = {}
+    _breaker = CircuitBreaker(
+        _breaker.threshold, _BREAKER_BASE_DELAY, _breaker.max_delay
+    )
+    _started = False
+    if _connection is not None:
+        # Closes the child's copy of the socket; the parent's stays open.
+        _connection.close()
+    _connection = None
+    _connection_url = ""
+    _reconnects = 0
+    if _collector is not None:
+        _collector.forget()
+        _collector = None
+    if _spool is not None:
+        # Two processes must not append to the same segment files.
+        logger.debug("Capture spool is not used in forked child %d", os.getpid())
+        _spool.forget()
+        _spool = None
+        if _overflow == "spill":
+            _overflow = "drop_newest"
+        _breaker_policy = "drop"
+
+
+def _elect_collector() -> None:
+    """Become the collector for ``_collector_path`` if nobody else is.
+
+    Called with ``_start_lock`` held, so the worker's re-election and
+    :func:`_ensure_worker` can't both run it and replace a live collector.
+    """
+    global _collector
+    if _collector_path is None or _collector is not None:
+        return
     try:
-        _queue.put_nowait(payload)
-    except queue.Full:
+        _collector = serve(_collector_path, _enqueue, _forward_heartbeat)
+    except OSError as err:
+        logger.warning("Cannot use collector socket %s: %s", _collector_path, err)
+
+
+def _open_spool(config: SmelloConfig) -> Spool | None:
+    if not config.spool_dir:
+        return None
+    if (
+        _spool is not None
+        and _spool.directory.resolve() == Path(config.spool_dir).resolve()
+    ):
+        return _spool
+    try:
+        return Spool(config.spool_dir, config.spool_max_bytes)
+    except OSError as err:
+        logger.warning("Cannot open capture spool in %s: %s", config.spool_dir, err)
+        return None
+
+
+def send(payload: dict | Capture) -> None:
+    """Queue a capture for sending. Non-blocking.
+
+    A :class:`~smello.capture.Capture` is turned into its payload on the
+    worker thread, keeping serialization off the caller's path.  When the
+    queue is full (by count or by bytes), the overflow policy decides: the
+    payload is dropped, replaces the oldest queued one, waits for room
+    (``block``, the only policy that does block), or goes to the on-disk
+    spool.  In a process forked after the worker started, the worker is
+    restarted here.
+    """
+    if _worker_pid != os.getpid() and _server_url:
+        # Forked without running at-fork handlers (e.g. uWSGI).
+        if _started:
+            _after_fork_in_child()
+        _ensure_worker()
+    if not _enqueue(payload):
         logger.warning("Payload dropped: capture queue is full")
 
 
+def _enqueue(payload: dict | Capture) -> bool:
+    """Queue *payload*, applying the overflow policy; ``False`` if dropped."""
+    if isinstance(payload, Capture):
+        size = payload.size_hint()
+    else:
+        size = payload_size(payload)
+    try:
+        _queue.put_nowait(payload, size=size)
+        _stats.incr("captures_enqueued")
+        return True
+    except queue.Full:
+        pass
+
+    policy = _overflow
+    if policy == "block":
+        try:
+            _queue.put(payload, timeout=_block_timeout, size=size)
+            _stats.incr("captures_enqueued")
+            return True
+        except queue.Full:
+            pass
+    elif policy == "drop_oldest":
+        # An empty queue takes any item, so this ends.
+        while (evicted := _queue.pop_oldest()) is not None:
+            _count(_dropped[policy], evicted[1])
+            try:
+                _queue.put_nowait(payload, size=size)
+                _stats.incr("captures_enqueued")
+                return True
+            except queue.Full:
+                continue
+    elif policy == "spill" and _spool is not None:
+        if isinstance(payload, Capture):
+            payload = payload.to_payload()
+        if _spool.append(payload):
+            _count(_spilled, size)
+            return True
+    _count(_dropped[policy], size)
+    return False
+
+
+def _count(counter: list[int], size: int) -> None:
+    with _stats_lock:
+        counter[0] += 1
+        counter[1] += size
+
+
+def queue_stats() -> dict:
+    """Return the capture queue's fill level and overflow counters.
+
+    Byte figures are estimates of the captures' in-memory size.
+    ``dropped`` maps each overflow policy to the captures it lost:
+    ``{"drop_newest": {"items": 3, "bytes": 4096}, ...}``.
+    """
+    with _stats_lock:
+        return {
+            "policy": _overflow,
+            "queued_items": _queue.qsize(),
+            "queued_bytes": _queue.bytes,
+            "high_water_items": _queue.high_water_items,
+            "high_water_bytes": _queue.high_water_bytes,
+            "max_items": _queue.maxsize,
+            "max_bytes": _queue.max_bytes,
+            "dropped": {
+                policy: {"items": items, "bytes": size}
+                for policy, (items, size) in _dropped.items()
+            },
+            "spilled": {"items": _spilled[0], "bytes": _spilled[1]},
+        }
+
+
 def flush(timeout: float = 2.0) -> bool:
     """Block until all queued payloads are sent, or *timeout* seconds elapse.
 
@@ -64,15 +380,312 @@ def shutdown(timeout: float = 2.0) -> bool:
     return result
 
 
+def stats() -> dict:
+    """Return the client's self-metrics.
+
+    Counters (``captures_enqueued``, ``captures_sampled_out``,
+    ``captures_rate_limited``, ``captures_sent``, ``captures_failed``,
+    ``send_errors``, ``bytes_sent``), latency summaries in milliseconds
+    (``send_latency`` per request to the server, ``patch_overhead`` added
+    to each patched call), the queue's :func:`queue_stats`, the
+    :func:`reconnect_count` and the circuit breaker's state.  The same data
+    is sent to the server as a heartbeat every ``heartbeat_interval_s``
+    seconds.
+    """
+    return {
+        **_stats.snapshot(),
+        "queue": queue_stats(),
+        "reconnects": _reconnects,
+        "breaker": _breaker.stats(),
+    }
+
+
+def reconnect_count() -> int:
+    """Return how many times the transport re-opened its server connection.
+
+    Counts new connections that replace one the server closed or that
+    broke on an error.  The first connection to a server URL is not a
+    reconnect.
+    """
+    return _reconnects
+
+
 def _worker() -> None:
-    """Background worker that sends queued payloads to the server."""
+    """Background worker that sends queued payloads to the server in batches.
+
+    Each queued payload is marked done exactly once: after the server
+    accepted it, or after it was given up on (or moved to the spool).  An
+    unexpected error drops the batch in hand and the worker carries on.
+    Payloads that failed are carried over into the next batch after a
+    backoff delay, so ``flush()`` keeps waiting for them.
+
+    While the server accepts captures and the queue has nothing to send,
+    the worker replays the spool, oldest first.
+
+    While the circuit breaker is open, batches are spooled or dropped
+    without a network attempt, so the queue keeps draining; the spool
+    waits for the breaker's next probe.
+    """
+    retries: list[tuple[dict, int]] = []
+    replay_failures = 0
     while True:
-        payload = _queue.get()
+        # Taken from the queue and not marked done yet
+        batch: list[tuple[dict, int]] = []
         try:
-            _send_to_server(payload)
+            _maybe_send_heartbeat()
+            spool = _spool
+            spooled = spool is not None and spool.pending()
+            probe_in = _breaker.retry_in() if spooled else 0.0
+            batch = _next_batch(
+                retries, block=not spooled or probe_in > 0, wait=probe_in
+            )
+            if batch:
+                failed = _deliver(batch)
+                retries = failed + retries
+                for _ in range(len(batch) - len(failed)):
+                    _queue.task_done()
+                batch = []
+                if failed:
+                    if _breaker.state == CLOSED:
+                        attempts = max(attempts for _, attempts in failed)
+                        time.sleep(_RETRY_BACKOFF * 2 ** (attempts - 1))
+                    continue
+
+            if (
+                spool is not None
+                and spooled
+                and not retries
+                and _queue.empty()
+                and not _breaker.retry_in()
+            ):
+                if _replay_spool(spool):
+                    replay_failures = 0
+                else:
+                    replay_failures += 1
+                    if _breaker.state == CLOSED:
+                        time.sleep(
+                            min(
+                                _RETRY_BACKOFF * 2**replay_failures,
+                                _MAX_REPLAY_BACKOFF,
+                            )
+                        )
         except Exception as err:
-            logger.warning("Failed to send capture to %s: %s", _server_url, err)
+            logger.warning("Smello transport error: %s", err, exc_info=True)
+            for _ in batch:
+                _stats.incr("captures_failed")
+                _queue.task_done()
+            time.sleep(_RETRY_BACKOFF)
+
+
+def _next_batch(
+    retries: list[tuple[dict, int]], block: bool = True, wait: float = 0.0
+) -> list[tuple[dict, int]]:
+    """Collect up to ``_batch_size`` ``(payload, attempts)`` pairs.
+
+    Retries go first.  Then the queue is drained until the batch is full
+    or ``_batch_linger`` seconds have passed since the batch was started.
+    Without *block*, an empty list is returned if nothing arrives within
+    ``_batch_linger``; with it, when the next heartbeat is due or after
+    *wait* seconds (if not 0).
+    """
+    batch = retries[:_batch_size]
+    del retries[: len(batch)]
+    while not batch:
+        try:
+            if block:
+                item = _queue.get(timeout=_wait_timeout(wait))
+            else:
+                item = _queue.get(timeout=max(_batch_linger, 0.01))
+        except queue.Empty:
+            return batch
+        payload = _payload_of(item)
+        if payload is not None:
+            batch.append((payload, 0))
+
+    deadline = time.monotonic() + _batch_linger
+    while len(batch) < _batch_size:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining > 0:
+                item = _queue.get(timeout=remaining)
+            else:
+                item = _queue.get_nowait()
+        except queue.Empty:
+            break
+        payload = _payload_of(item)
+        if payload is not None:
+            batch.append((payload, 0))
+    return batch
+
+
+def _wait_timeout(wait: float) -> float | None:
+    """How long the worker may wait for a capture; ``None`` is forever."""
+    timeouts = [wait] if wait else []
+    if _heartbeat_interval:
+        timeouts.append(max(_next_heartbeat - time.monotonic(), 0))
+    return min(timeouts) if timeouts else None
+
+
+def _payload_of(item: dict | Capture) -> dict | None:
+    """Return the payload for a queued item, serializing captures.
+
+    A capture that can't be serialized is logged, marked done and
+    skipped (``None``).
+    """
+    if not isinstance(item, Capture):
+        return item
+    try:
+        return item.to_payload()
+    except Exception as err:
+        logger.debug("Failed to serialize capture of %s: %s", item.url, err)
         _queue.task_done()
+        return None
+
+
+def _deliver(batch: list[tuple[dict, int]]) -> list[tuple[dict, int]]:
+    """Send *batch* and return the entries that should be retried.
+
+    A failure of the whole request counts as an ``"error"`` result for
+    every entry.  While the circuit breaker is open, nothing is sent and
+    nothing is retried.
+    """
+    if not _breaker.allow():
+        _short_circuit(batch)
+        return []
+    try:
+        results = _send_batch([payload for payload, _ in batch])
+        if len(results) != len(batch):
+            raise ValueError(
+                f"server returned {len(results)} result(s) for {len(batch)} capture(s)"
+            )
+    except Exception as err:
+        _record_error(err)
+        logger.warning(
+            "Failed to send %d capture(s) to %s: %s", len(batch), _server_url, err
+        )
+        results = [{"status": "error", "error": str(err)}] * len(batch)
+    else:
+        _breaker.success()
+
+    retries = []
+    for (payload, attempts), result in zip(batch, results):
+        status = result.get("status")
+        if status == "ok":
+            _stats.incr("captures_sent")
+            continue
+        if status == "error" and attempts + 1 < _MAX_ATTEMPTS:
+            retries.append((payload, attempts + 1))
+        elif status == "error" and _spool is not None and _spool.append(payload):
+            logger.debug("Capture %s moved to the spool", payload.get("id"))
+        else:
+            _stats.incr("captures_failed")
+            logger.warning(
+                "Capture %s rejected by server: %s",
+                payload.get("id"),
+                result.get("error") or status,
+            )
+    return retries
+
+
+def _short_circuit(batch: list[tuple[dict, int]]) -> None:
+    """Spool or drop *batch* without sending it (the breaker is open)."""
+    spool = _spool if _breaker_policy == "spill" else None
+    for payload, _ in batch:
+        _stats.incr("captures_short_circuited")
+        if spool is None or not spool.append(payload):
+            _stats.incr("captures_failed")
+    logger.debug(
+        "Circuit open, %s %d capture(s)",
+        "spooled" if spool is not None else "dropped",
+        len(batch),
+    )
+
+
+def _record_error(err: Exception) -> None:
+    """Tell the breaker about a failed send.
+
+    Connection errors, timeouts and 5xx answers count as failures.  Any
+    other answer shows that the server is up.
+    """
+    if isinstance(err, _ServerHTTPError):
+        outage = err.status >= 500
+    else:
+        # A malformed answer still came from a live server.
+        outage = not isinstance(err, ValueError)
+    if outage:
+        _breaker.failure()
+    else:
+        _breaker.success()
+
+
+def _replay_spool(spool: Spool) -> bool:
+    """Send the next batch from *spool*; returns ``False`` if that failed."""
+    if not _breaker.allow():
+        return False
+    payloads, position = spool.read(_batch_size)
+    if payloads:
+        try:
+            results = _send_batch(payloads)
+            if len(results) != len(payloads):
+                raise ValueError("result count doesn't match the batch")
+        except Exception as err:
+            _record_error(err)
+            logger.debug("Spool replay to %s failed: %s", _server_url, err)
+            spool.rewind()
+            return False
+        _breaker.success()
+        for payload, result in zip(payloads, results):
+            if result.get("status") == "error":
+                if not spool.append(payload):
+                    _stats.incr("captures_failed")
+            elif result.get("status") == "ok":
+                _stats.incr("captures_sent")
+    spool.ack(position)
+    return True
+
+
+def _maybe_send_heartbeat() -> None:
+    """Post this process's heartbeat, and those of collector clients, if due."""
+    global _next_heartbeat, _heartbeat_supported, _peer_heartbeats
+    if not _heartbeat_interval or time.monotonic() < _next_heartbeat:
+        return
+    _next_heartbeat = time.monotonic() + _heartbeat_interval
+    peers, _peer_heartbeats = _peer_heartbeats, {}
+    if not _heartbeat_supported or _breaker.state == OPEN:
+        return
+    for heartbeat in [_heartbeat(), *peers.values()]:
+        try:
+            _post("/api/heartbeat", heartbeat)
+        except _ServerHTTPError as err:
+            if err.status == 404:
+                logger.debug("Server has no heartbeat endpoint")
+                _heartbeat_supported = False
+                return
+            logger.debug("Failed to send heartbeat: %s", err)
+        except Exception as err:
+            logger.debug("Failed to send heartbeat: %s", err)
+            return
+
+
+def _heartbeat() -> dict:
+    from smello import __version__  # noqa: PLC0415 -- circular import
+
+    return {
+        "instance_id": _instance_id,
+        "hostname": socket.gethostname(),
+        "pid": os.getpid(),
+        "smello_version": __version__,
+        "python_version": platform.python_version(),
+        "started_at": _started_at,
+        "stats": stats(),
+    }
+
+
+def _forward_heartbeat(heartbeat: dict) -> None:
+    """Keep a collector client's heartbeat for the next heartbeat tick."""
+    instance_id = heartbeat.get("instance_id")
+    if isinstance(instance_id, str):
+        _peer_heartbeats[instance_id] = heartbeat
 
 
 def _json_default(obj: object) -> str:
@@ -83,13 +696,177 @@ def _json_default(obj: object) -> str:
         return "<unserializable>"
 
 
+def _send_batch(payloads: list[dict]) -> list[dict]:
+    """Send payloads in one request to the batch endpoint.
+
+    Returns one ``{"status": ...}`` result per payload, in order.  Servers
+    that predate the batch endpoint answer 404; after that, payloads are
+    sent one by one.
+    """
+    global _batch_supported
+    if _batch_supported:
+        try:
+            response = _post("/api/capture/batch", {"captures": payloads})
+        except _ServerHTTPError as err:
+            if err.status != 404:
+                raise
+            logger.debug("Server has no batch endpoint, sending captures one by one")
+            _batch_supported = False
+        else:
+            return json.loads(response)["results"]
+
+    results = []
+    for payload in payloads:
+        try:
+            _send_to_server(payload)
+        except _ServerHTTPError as err:
+            status = "error" if err.status >= 500 else "invalid"
+            results.append({"status": status, "error": str(err)})
+        except Exception as err:
+            results.append({"status": "error", "error": str(err)})
+        else:
+            results.append({"status": "ok"})
+    return results
+
+
 def _send_to_server(payload: dict) -> None:
-    """Send a payload to the Smello server using urllib (to avoid recursion)."""
-    data = json.dumps(payload, default=_json_default).encode("utf-8")
-    req = urllib.request.Request(
-        f"{_server_url}/api/capture",
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    urllib.request.urlopen(req, timeout=5)
+    """Send a payload to the Smello server using http.client (to avoid recursion)."""
+    _post("/api/capture", payload)
+
+
+def _post(path: str, body: object) -> bytes:
+    """POST *body* as JSON over the persistent connection, return the response body.
+
+    A request that fails because the server dropped an idle keep-alive
+    connection is repeated once on a new connection.
+    """
+    data = json.dumps(body, default=_json_default).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    via_collector = _connection_target() != _server_url
+    if (
+        _compressor is not None
+        and not via_collector
+        and len(data) >= _compress_min_bytes
+    ):
+        headers["Content-Encoding"], compress = _compressor
+        data = compress(data)
+
+    started = time.monotonic()
+    try:
+        response_body = _post_data(path, data, headers)
+    except Exception:
+        _stats.incr("send_errors")
+        raise
+    _stats.observe("send_latency", time.monotonic() - started)
+    _stats.incr("bytes_sent", len(data))
+    return response_body
+
+
+def _post_data(path: str, data: bytes, headers: dict) -> bytes:
+    conn, reused = _get_connection()
+    try:
+        response = _request(conn, path, data, headers)
+    except _STALE_CONNECTION_ERRORS:
+        _close_connection()
+        if not reused:
+            raise
+        # Note: if the server did process the request before dropping the
+        # connection, the replay stores duplicates; the batch endpoint
+        # reports those as "invalid" and they are not retried again.
+        conn, _ = _get_connection()
+        try:
+            response = _request(conn, path, data, headers)
+        except Exception:
+            _close_connection()
+            raise
+    except Exception:
+        _close_connection()
+        raise
+
+    status, reason, response_body = response
+    if not 200 <= status < 300:
+        raise _ServerHTTPError(status, reason)
+    return response_body
+
+
+def _request(
+    conn: http.client.HTTPConnection, path: str, data: bytes, headers: dict
+) -> tuple[int, str, bytes]:
+    prefix = urlsplit(_server_url).path.rstrip("/")
+    conn.request("POST", f"{prefix}{path}", body=data, headers=headers)
+    response = conn.getresponse()
+    # Read the whole body so the connection can be reused.
+    body = response.read()
+    if response.will_close:
+        _close_connection()
+    return response.status, response.reason, body
+
+
+def _get_connection() -> tuple[http.client.HTTPConnection, bool]:
+    """Return the persistent connection and whether it has been used before."""
+    global _connection, _connection_url, _reconnects
+    target = _connection_target()
+    if _connection is not None and _connection_url != target:
+        # Pointed at a different server: start over without counting.
+        _connection.close()
+        _connection = None
+
+    if _connection is not None and _connection.sock is not None:
+        return _connection, True
+
+    if _connection is not None:
+        _reconnects += 1
+        logger.debug(
+            "Reconnecting to %s (%d reconnect(s) so far)", _server_url, _reconnects
+        )
+
+    if target != _server_url:
+        try:
+            conn = UnixHTTPConnection(target, timeout=_TIMEOUT)
+            conn.connect()
+        except OSError as err:
+            # The collector is gone; take over or fall back to the server.
+            logger.debug("Collector %s unreachable: %s", target, err)
+            with _start_lock:
+                _elect_collector()
+            if _collector is None:
+                raise
+            target = _server_url
+        else:
+            _connection = conn
+            _connection_url = target
+            return conn, False
+
+    parts = urlsplit(_server_url)
+    if parts.scheme == "https":
+        conn = http.client.HTTPSConnection(
+            parts.hostname or "", parts.port, timeout=_TIMEOUT
+        )
+    else:
+        conn = http.client.HTTPConnection(
+            parts.hostname or "", parts.port, timeout=_TIMEOUT
+        )
+    conn.connect()
+    _connection = conn
+    _connection_url = target
+    return conn, False
+
+
+def _connection_target() -> str:
+    """Return the collector socket path to send to, or the server URL."""
+    if _collector_path and _collector is None:
+        return _collector_path
+    return _server_url
+
+
+def _close_connection() -> None:
+    """Close the persistent connection; the next send opens a new one.
+
+    Only called from the worker thread.
+    """
+    if _connection is not None:
+        _connection.close()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
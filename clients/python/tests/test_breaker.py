@@ -0,0 +1,99 @@
+"""Tests for smello._breaker."""
+
+import pytest
+from smello import _breaker
+from smello._breaker import CircuitBreaker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(_breaker.time, "monotonic", clock)
+    return clock
+
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(threshold=3, base_delay=1.0)
+
+    breaker.failure()
+    breaker.failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+    breaker.failure()
+    assert breaker.state == "open"
+    assert breaker.opened == 1
+    assert not breaker.allow()
+    assert breaker.retry_in() == 1.0
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2)
+
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+
+    assert breaker.state == "closed"
+    assert breaker.failures == 1
+
+
+def test_probe_after_delay_closes_on_success(clock):
+    breaker = CircuitBreaker(threshold=1, base_delay=1.0)
+    breaker.failure()
+
+    clock.now += 1.0
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+
+    breaker.success()
+    assert breaker.state == "closed"
+    assert breaker.retry_in() == 0.0
+
+
+def test_failed_probes_back_off_exponentially(clock):
+    breaker = CircuitBreaker(threshold=1, base_delay=1.0, max_delay=5.0)
+    breaker.failure()
+
+    delays = []
+    for _ in range(4):
+        clock.now += breaker.retry_in()
+        assert breaker.allow()
+        breaker.failure()
+        delays.append(breaker.retry_in())
+
+    assert delays == [2.0, 4.0, 5.0, 5.0]
+    assert breaker.opened == 1
+
+
+def test_zero_threshold_never_opens(clock):
+    breaker = CircuitBreaker(threshold=0)
+
+    for _ in range(100):
+        breaker.failure()
+
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_reset_closes(clock):
+    breaker = CircuitBreaker(threshold=1)
+    breaker.failure()
+
+    breaker.reset()
+
+    assert breaker.allow()
+    assert breaker.stats() == {
+        "state": "closed",
+        "consecutive_failures": 0,
+        "opened": 1,
+        "retry_in_s": 0.0,
+    }
@@ -1,7 +1,9 @@
 """Tests for smello.capture serialization."""
 
+import functools
+
 import pytest
-from smello.capture import serialize_request_response
+from smello.capture import Capture, serialize_request_response
 from smello.config import SmelloConfig
 
 
@@ -153,3 +155,222 @@ def test_duration_rounding(config):
         library="requests",
     )
     assert payload["duration_ms"] == 1567
+
+
+def test_declared_response_encoding_is_used(config):
+    payload = serialize_request_response(
+        config=config,
+        method="GET",
+        url="https://example.com",
+        request_headers={},
+        request_body=None,
+        status_code=200,
+        response_headers={},
+        response_body="café".encode("latin-1"),
+        response_encoding="ISO-8859-1",
+        duration_s=0.1,
+        library="requests",
+    )
+    assert payload["response"]["body"] == "café"
+
+
+def test_unknown_response_encoding_falls_back_to_utf8(config):
+    payload = serialize_request_response(
+        config=config,
+        method="GET",
+        url="https://example.com",
+        request_headers={},
+        request_body=None,
+        status_code=200,
+        response_headers={},
+        response_body=b"ok",
+        response_encoding="no-such-charset",
+        duration_s=0.1,
+        library="requests",
+    )
+    assert payload["response"]["body"] == "ok"
+
+
+# ---------------------------------------------------------------------------
+# Capture — deferred serialization
+# ---------------------------------------------------------------------------
+
+
+def test_capture_builds_payload_lazily(config):
+    headers = {"Authorization": "Bearer secret"}
+    capture = Capture(
+        config=config,
+        method="POST",
+        url="https://example.com",
+        request_headers=headers,
+        request_body=b"data",
+        status_code=201,
+        response_headers={},
+        response_body=lambda: '{"rendered": true}',
+        duration_s=0.25,
+        library="grpc",
+    )
+
+    payload = capture.to_payload()
+
+    assert payload["request"]["headers"] == {"Authorization": "[REDACTED]"}
+    # Redaction works on a copy of the library's header mapping
+    assert headers == {"Authorization": "Bearer secret"}
+    assert payload["request"]["body"] == "data"
+    assert payload["response"]["body"] == '{"rendered": true}'
+    assert payload["duration_ms"] == 250
+
+
+def test_capture_timestamp_is_time_of_call(config, monkeypatch):
+    monkeypatch.setattr("smello.capture.time.time", lambda: 0.0)
+    capture = Capture(
+        config=config,
+        method="GET",
+        url="https://example.com",
+        request_headers={},
+        request_body=None,
+        status_code=200,
+        response_headers={},
+        response_body=None,
+        duration_s=0.1,
+        library="requests",
+    )
+    monkeypatch.undo()
+
+    assert capture.to_payload()["timestamp"] == "1970-01-01T00:00:00Z"
+
+
+def test_size_hint_counts_bodies_and_headers():
+    def capture(**overrides):
+        fields = dict(
+            config=SmelloConfig(max_body_bytes=1000),
+            method="POST",
+            url="https://example.com",
+            request_headers={},
+            request_body=None,
+            status_code=200,
+            response_headers={},
+            response_body=None,
+            duration_s=0.1,
+            library="grpc",
+        )
+        fields.update(overrides)
+        return Capture(**fields)
+
+    empty = capture().size_hint()
+    assert capture(request_body=b"x" * 100).size_hint() == empty + 100
+    # Bodies are counted after truncation
+    assert capture(response_body="x" * 5000).size_hint() == empty + 1000
+    # Deferred bodies count the bytes they render from
+    snapshot = functools.partial(bytes.decode, b"x" * 300)
+    assert capture(response_body=snapshot).size_hint() == empty + 300
+    # ...also when nested, as in a gRPC stream's messages
+    messages = functools.partial(lambda *parts: "", snapshot, snapshot)
+    assert capture(response_body=messages).size_hint() == empty + 600
+    assert capture(request_headers={"a": "1", "b": "2"}).size_hint() > empty
+
+
+# ---------------------------------------------------------------------------
+# Body limits
+# ---------------------------------------------------------------------------
+
+
+def _limited_payload(config, **overrides):
+    fields = dict(
+        config=config,
+        method="POST",
+        url="https://example.com",
+        request_headers={},
+        request_body=None,
+        status_code=200,
+        response_headers={},
+        response_body=None,
+        duration_s=0.1,
+        library="requests",
+    )
+    fields.update(overrides)
+    return serialize_request_response(**fields)
+
+
+def test_body_over_max_body_bytes_is_truncated():
+    config = SmelloConfig(max_body_bytes=4)
+
+    payload = _limited_payload(config, response_body=b"0123456789")
+
+    assert payload["response"]["body"] == "0123"
+    assert payload["response"]["body_size"] == 10
+    assert payload["response"]["truncated"] is True
+
+
+def test_body_within_max_body_bytes_is_kept(config):
+    payload = _limited_payload(config, request_body=b"small")
+
+    assert payload["request"]["body"] == "small"
+    assert payload["request"]["truncated"] is False
+
+
+def test_truncation_inside_utf8_sequence_is_not_binary():
+    config = SmelloConfig(max_body_bytes=5)
+
+    # "é" is two bytes; the cut falls between them
+    payload = _limited_payload(config, response_body="abcdé".encode())
+
+    assert payload["response"]["body"] == "abcd"
+
+
+def test_ignored_content_type_body_is_not_captured():
+    config = SmelloConfig(ignore_content_types=["image/*"])
+
+    payload = _limited_payload(
+        config,
+        response_headers={"Content-Type": "image/png"},
+        response_body=b"\x89PNG....",
+    )
+
+    assert payload["response"]["body"] is None
+    assert payload["response"]["body_size"] == 8
+    assert payload["response"]["truncated"] is True
+
+
+def test_capture_content_types_allow_list():
+    config = SmelloConfig(capture_content_types=["application/json"])
+
+    payload = _limited_payload(
+        config,
+        request_headers={"Content-Type": "text/plain"},
+        request_body="hello",
+        response_headers={"Content-Type": "application/json; charset=utf-8"},
+        response_body=b"{}",
+    )
+
+    assert payload["request"]["body"] is None
+    assert payload["response"]["body"] == "{}"
+
+
+def test_deferred_body_is_truncated_after_rendering():
+    config = SmelloConfig(max_body_bytes=3)
+    capture = Capture(
+        config=config,
+        method="POST",
+        url="grpc://host/svc/Method",
+        request_headers={},
+        request_body=lambda: '{"a": 1}',
+        status_code=200,
+        response_headers={},
+        response_body=None,
+        duration_s=0.1,
+        library="grpc",
+    )
+
+    request = capture.to_payload()["request"]
+
+    assert request["body"] == '{"a'
+    assert request["body_size"] == 8
+    assert request["truncated"] is True
+
+
+def test_streamed_request_body_is_skipped(config):
+    payload = _limited_payload(config, request_body=iter([b"chunk"]))
+
+    assert payload["request"]["body"] is None
+    assert payload["request"]["body_size"] == 0
@@ -0,0 +1,115 @@
+"""Tests for smello._collector."""
+
+import json
+import socket
+
+import pytest
+from smello._collector import UnixHTTPConnection, is_supported, serve
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason="needs Unix sockets")
+
+
+@pytest.fixture()
+def collector(tmp_path):
+    """Serve a collector that stores what it receives."""
+    received = []
+    path = str(tmp_path / "collector.sock")
+    running = serve(path, lambda payload: received.append(payload) or True)
+    yield path, received
+    running.close()
+
+
+def _post(path, url, body):
+    conn = UnixHTTPConnection(path, timeout=5)
+    try:
+        conn.request(
+            "POST", url, json.dumps(body), {"Content-Type": "application/json"}
+        )
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_batch_is_handed_to_enqueue(collector):
+    path, received = collector
+
+    status, body = _post(
+        path, "/api/capture/batch", {"captures": [{"id": "a"}, {"id": "b"}]}
+    )
+
+    assert status == 200
+    assert body == {"results": [{"status": "ok"}, {"status": "ok"}]}
+    assert [p["id"] for p in received] == ["a", "b"]
+
+
+def test_single_capture_is_accepted(collector):
+    path, received = collector
+
+    status, _ = _post(path, "/api/capture", {"id": "single"})
+
+    assert status == 201
+    assert received == [{"id": "single"}]
+
+
+def test_heartbeat_is_handed_over(tmp_path):
+    path = str(tmp_path / "collector.sock")
+    heartbeats = []
+    running = serve(path, lambda payload: True, heartbeats.append)
+    try:
+        status, _ = _post(path, "/api/heartbeat", {"instance_id": "abc"})
+    finally:
+        running.close()
+
+    assert status == 202
+    assert heartbeats == [{"instance_id": "abc"}]
+
+
+def test_unknown_path_is_rejected(collector):
+    path, received = collector
+
+    status, _ = _post(path, "/api/other", {"id": "x"})
+
+    assert status == 404
+    assert received == []
+
+
+def test_full_queue_is_reported_per_item(tmp_path):
+    path = str(tmp_path / "collector.sock")
+    running = serve(path, lambda payload: False)
+    try:
+        _, body = _post(path, "/api/capture/batch", {"captures": [{"id": "a"}]})
+    finally:
+        running.close()
+
+    assert body["results"][0]["status"] == "error"
+
+
+def test_malformed_batch_is_rejected(collector):
+    path, _received = collector
+
+    status, _ = _post(path, "/api/capture/batch", {"not": "captures"})
+
+    assert status == 400
+
+
+def test_second_process_does_not_take_over_live_collector(collector):
+    path, _received = collector
+
+    assert serve(path, lambda payload: True) is None
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "collector.sock")
+    # A socket file left behind by a collector that died
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    running = serve(path, lambda payload: True)
+    try:
+        assert running is not None
+        status, _ = _post(path, "/api/capture", {"id": "x"})
+        assert status == 201
+    finally:
+        running.close()
@@ -0,0 +1,35 @@
+"""Tests for smello._compression."""
+
+import gzip
+from unittest.mock import patch
+
+from smello._compression import get_compressor
+
+
+def test_disabled():
+    assert get_compressor(None) is None
+    assert get_compressor("none") is None
+
+
+def test_gzip_round_trip():
+    encoding, compress = get_compressor("gzip")
+    assert encoding == "gzip"
+    assert gzip.decompress(compress(b'{"a": 1}')) == b'{"a": 1}'
+
+
+def test_zstd_when_available():
+    with patch("smello._compression._load_zstd", return_value=lambda d: b"zstd:" + d):
+        encoding, compress = get_compressor("zstd")
+    assert encoding == "zstd"
+    assert compress(b"x") == b"zstd:x"
+
+
+def test_zstd_falls_back_to_gzip_when_missing():
+    with patch("smello._compression._load_zstd", return_value=None):
+        encoding, _compress = get_compressor("zstd")
+    assert encoding == "gzip"
+
+
+def test_unknown_encoding_falls_back_to_gzip():
+    encoding, _compress = get_compressor("brotli")
+    assert encoding == "gzip"
@@ -44,3 +44,34 @@ def test_ignore_takes_precedence_over_capture_all():
     config = SmelloConfig(capture_all=True, ignore_hosts=["secret.internal"])
     assert config.should_capture("secret.internal") is False
     assert config.should_capture("anything.else") is True
+
+
+def test_all_bodies_captured_by_default(default_config):
+    assert default_config.should_capture_body("image/png") is True
+    assert default_config.should_capture_body(None) is True
+
+
+def test_ignore_content_types_with_wildcard():
+    config = SmelloConfig(ignore_content_types=["image/*", "application/octet-stream"])
+    assert config.should_capture_body("image/png") is False
+    assert config.should_capture_body("application/octet-stream") is False
+    assert config.should_capture_body("Application/JSON; charset=utf-8") is True
+
+
+def test_capture_content_types_allow_list_only():
+    config = SmelloConfig(capture_content_types=["application/json", "text/*"])
+    assert config.should_capture_body("application/json") is True
+    assert config.should_capture_body("text/html; charset=utf-8") is True
+    assert config.should_capture_body("application/xml") is False
+    assert config.should_capture_body(None) is False
+
+
+def test_host_rules_support_wildcards_and_paths():
+    config = SmelloConfig(
+        capture_all=False,
+        capture_hosts=["*.openai.com", "api.stripe.com/v1/charges"],
+    )
+    assert config.should_capture("api.openai.com") is True
+    assert config.should_capture("api.stripe.com", "/v1/charges/ch_1") is True
+    assert config.should_capture("api.stripe.com", "/v1/customers") is False
+    assert SmelloConfig(ignore_hosts=["10.0.0.0/8"]).should_capture("10.0.0.5") is False
@@ -5,7 +5,14 @@ from unittest.mock import patch
 
 import pytest
 import smello
-from smello._env import _env_bool, _env_list, _env_str
+from smello._env import (
+    _env_bool,
+    _env_float,
+    _env_int,
+    _env_list,
+    _env_rates,
+    _env_str,
+)
 
 # --- _env_str ---
 
@@ -92,6 +99,43 @@ class TestEnvList:
             assert _env_list("CAPTURE_HOSTS") == ["api.stripe.com"]
 
 
+# --- _env_int ---
+
+
+class TestEnvFloat:
+    def test_returns_value(self):
+        with patch.dict(os.environ, {"SMELLO_SAMPLE_RATE": " 0.25 "}):
+            assert _env_float("SAMPLE_RATE") == 0.25
+
+    def test_returns_none_for_invalid(self):
+        with patch.dict(os.environ, {"SMELLO_SAMPLE_RATE": "half"}):
+            assert _env_float("SAMPLE_RATE") is None
+
+
+class TestEnvRates:
+    def test_pairs(self):
+        with patch.dict(os.environ, {"SMELLO_HOST_SAMPLE_RATES": "a=0.5,b=1"}):
+            assert _env_rates("HOST_SAMPLE_RATES") == {"a": 0.5, "b": 1.0}
+
+    def test_returns_none_without_valid_pairs(self):
+        with patch.dict(os.environ, {"SMELLO_HOST_SAMPLE_RATES": "a,b=x"}):
+            assert _env_rates("HOST_SAMPLE_RATES") is None
+
+
+class TestEnvInt:
+    def test_returns_value(self):
+        with patch.dict(os.environ, {"SMELLO_BATCH_SIZE": " 250 "}):
+            assert _env_int("BATCH_SIZE") == 250
+
+    def test_returns_none_when_unset(self):
+        with patch.dict(os.environ, {}, clear=True):
+            assert _env_int("BATCH_SIZE") is None
+
+    def test_returns_none_for_invalid(self):
+        with patch.dict(os.environ, {"SMELLO_BATCH_SIZE": "lots"}):
+            assert _env_int("BATCH_SIZE") is None
+
+
 # --- init() env var integration ---
 
 
@@ -201,6 +245,173 @@ class TestInitEnvVars:
             smello.init()
             assert smello._config.capture_all is False
 
+    def test_batch_settings_from_env(self):
+        with (
+            patch.dict(
+                os.environ,
+                {"SMELLO_BATCH_SIZE": "25", "SMELLO_BATCH_LINGER_MS": "0"},
+            ),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.batch_size == 25
+            assert smello._config.batch_linger_ms == 0
+
+    def test_explicit_batch_size_overrides_env(self):
+        with (
+            patch.dict(os.environ, {"SMELLO_BATCH_SIZE": "25"}),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init(batch_size=5)
+            assert smello._config.batch_size == 5
+
+    def test_zero_batch_size_from_env_is_clamped(self):
+        with (
+            patch.dict(os.environ, {"SMELLO_BATCH_SIZE": "0"}),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.batch_size == 1
+
+    def test_negative_batch_settings_are_clamped(self):
+        with (
+            patch.dict(os.environ, {}, clear=True),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init(batch_size=-5, batch_linger_ms=-1)
+            assert smello._config.batch_size == 1
+            assert smello._config.batch_linger_ms == 0
+
+    def test_compression_from_env(self):
+        with (
+            patch.dict(
+                os.environ,
+                {"SMELLO_COMPRESSION": "GZIP", "SMELLO_COMPRESS_MIN_BYTES": "512"},
+            ),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.compression == "gzip"
+            assert smello._config.compress_min_bytes == 512
+
+    def test_collector_socket_from_env(self):
+        with (
+            patch.dict(os.environ, {"SMELLO_COLLECTOR_SOCKET": "/tmp/smello.sock"}),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.collector_socket == "/tmp/smello.sock"
+
+    def test_body_limits_from_env(self):
+        with (
+            patch.dict(
+                os.environ,
+                {
+                    "SMELLO_MAX_BODY_BYTES": "2048",
+                    "SMELLO_CAPTURE_CONTENT_TYPES": "application/json",
+                    "SMELLO_IGNORE_CONTENT_TYPES": "Image/*,application/octet-stream",
+                },
+            ),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.max_body_bytes == 2048
+            assert smello._config.capture_content_types == ["application/json"]
+            assert smello._config.ignore_content_types == [
+                "image/*",
+                "application/octet-stream",
+            ]
+
+    def test_queue_settings_from_env(self):
+        with (
+            patch.dict(
+                os.environ,
+                {
+                    "SMELLO_QUEUE_MAX_ITEMS": "50",
+                    "SMELLO_QUEUE_MAX_BYTES": "1048576",
+                    "SMELLO_QUEUE_OVERFLOW": "Drop-Oldest",
+                    "SMELLO_QUEUE_BLOCK_TIMEOUT_MS": "250",
+                    "SMELLO_HEARTBEAT_INTERVAL_S": "0",
+                },
+            ),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.queue_max_items == 50
+            assert smello._config.queue_max_bytes == 1048576
+            assert smello._config.queue_overflow == "drop_oldest"
+            assert smello._config.queue_block_timeout_ms == 250
+            assert smello._config.heartbeat_interval_s == 0
+
+    def test_breaker_settings_from_env(self):
+        with (
+            patch.dict(
+                os.environ,
+                {
+                    "SMELLO_BREAKER_THRESHOLD": "3",
+                    "SMELLO_BREAKER_MAX_BACKOFF_S": "7.5",
+                    "SMELLO_BREAKER_OPEN_POLICY": "Drop",
+                },
+            ),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.breaker_threshold == 3
+            assert smello._config.breaker_max_backoff_s == 7.5
+            assert smello._config.breaker_open_policy == "drop"
+
+    def test_sampling_from_env(self):
+        with (
+            patch.dict(
+                os.environ,
+                {
+                    "SMELLO_SAMPLE_RATE": "0.1",
+                    "SMELLO_HOST_SAMPLE_RATES": "api.openai.com=0.5, bad, x=y",
+                    "SMELLO_KEEP_ERRORS": "false",
+                    "SMELLO_SLOW_THRESHOLD_MS": "2000",
+                    "SMELLO_RATE_LIMIT_PER_HOST": "20",
+                },
+            ),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init()
+            assert smello._config.sample_rate == 0.1
+            assert smello._config.host_sample_rates == {"api.openai.com": 0.5}
+            assert smello._config.keep_errors is False
+            assert smello._config.slow_threshold_ms == 2000
+            assert smello._config.rate_limit_per_host == 20
+
+    def test_sample_rates_are_clamped(self):
+        with (
+            patch.dict(os.environ, {}, clear=True),
+            patch("smello._start_worker"),
+            patch("smello._apply_all"),
+        ):
+            smello._config = None
+            smello.init(sample_rate=2, host_sample_rates={"a.example.com": -1})
+            assert smello._config.sample_rate == 1.0
+            assert smello._config.host_sample_rates == {"a.example.com": 0.0}
+
     def test_defaults_without_env(self):
         """With no env vars and no explicit params, hardcoded defaults apply."""
 
@@ -216,3 +427,15 @@ class TestInitEnvVars:
             assert smello._config.capture_hosts == []
             assert smello._config.ignore_hosts == ["localhost"]  # auto-added
             assert smello._config.redact_headers == ["authorization", "x-api-key"]
+            assert smello._config.batch_size == 100
+            assert smello._config.batch_linger_ms == 50
+            assert smello._config.compression is None
+            assert smello._config.compress_min_bytes == 1024
+            assert smello._config.collector_socket is None
+            assert smello._config.max_body_bytes == 1024 * 1024
+            assert smello._config.sample_rate == 1.0
+            assert smello._config.keep_errors is True
+            assert smello._config.queue_max_items == 1000
+            assert smello._config.queue_overflow is None
+            assert smello._config.heartbeat_interval_s == 60
+            assert smello._config.slow_threshold_ms is None
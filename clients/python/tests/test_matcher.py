@@ -0,0 +1,88 @@
+"""Tests for smello._matcher.HostMatcher."""
+
+import pytest
+from smello._matcher import HostMatcher
+
+
+@pytest.mark.parametrize(
+    ("host", "expected"),
+    [
+        ("api.example.com", True),
+        ("API.Example.com", True),
+        ("example.com", False),
+        ("other.example.com", False),
+    ],
+)
+def test_exact_host(host, expected):
+    assert HostMatcher(["api.example.com"]).match(host) is expected
+
+
+@pytest.mark.parametrize(
+    ("host", "expected"),
+    [
+        ("a.example.com", True),
+        ("a.b.example.com", True),
+        ("example.com", False),
+        ("badexample.com", False),
+        ("example.com.evil.net", False),
+    ],
+)
+def test_wildcard_matches_subdomains_only(host, expected):
+    assert HostMatcher(["*.example.com"]).match(host) is expected
+
+
+@pytest.mark.parametrize(
+    ("host", "expected"),
+    [
+        ("10.1.2.3", True),
+        ("11.0.0.1", False),
+        ("fd00::1", True),
+        ("10.example.com", False),
+    ],
+)
+def test_cidr_ranges(host, expected):
+    assert HostMatcher(["10.0.0.0/8", "fd00::/8"]).match(host) is expected
+
+
+def test_bare_ip_is_an_exact_host():
+    matcher = HostMatcher(["127.0.0.1"])
+    assert matcher.match("127.0.0.1") is True
+    assert matcher.match("127.0.0.2") is False
+
+
+@pytest.mark.parametrize(
+    ("rule", "host"),
+    [
+        ("api.example.com/v1/", "api.example.com"),
+        ("*.example.com/v1/", "api.example.com"),
+        ("10.0.0.0/8/v1/", "10.0.0.1"),
+    ],
+)
+def test_path_prefix(rule, host):
+    matcher = HostMatcher([rule])
+    assert matcher.match(host, "/v1/users") is True
+    assert matcher.match(host, "/v2/users") is False
+    assert matcher.match(host) is False
+
+
+def test_rule_without_path_wins_over_path_rules():
+    matcher = HostMatcher(["api.example.com/v1/", "*.example.com"])
+    assert matcher.match("api.example.com", "/v2/") is True
+
+
+def test_invalid_rules_are_skipped():
+    matcher = HostMatcher(["10.0.0.0/99", "", "api.example.com"])
+    assert matcher.match("10.0.0.1") is False
+    assert matcher.match("api.example.com") is True
+
+
+def test_empty_matcher_is_falsy():
+    assert not HostMatcher([])
+    assert HostMatcher(["*.example.com"])
+
+
+def test_decisions_are_cached():
+    matcher = HostMatcher([f"host{i}.example.com" for i in range(500)])
+    for _ in range(3):
+        assert matcher.match("host250.example.com") is True
+    assert matcher._prefixes.cache_info().hits == 2
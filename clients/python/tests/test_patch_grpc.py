@@ -1,5 +1,6 @@
 """Tests for smello.patches.patch_grpc — gRPC interception."""
 
+import asyncio
 import sys
 import types
 from unittest.mock import MagicMock, patch
@@ -8,11 +9,19 @@ import pytest
 from smello.config import SmelloConfig
 from smello.patches.patch_grpc import (
     _GRPC_STATUS_TO_HTTP,
+    _STREAM_SAMPLE_MESSAGES,
     _extract_host,
     _grpc_status_to_http,
+    _intercept_stream_stream,
+    _intercept_stream_unary,
+    _intercept_unary_stream,
     _intercept_unary_unary,
+    _json_format,
+    _make_aio_interceptor_classes,
     _make_interceptor_class,
+    _message_class,
     _metadata_to_dict,
+    _proto_snapshot,
     _proto_to_json,
     _send_capture,
     patch_grpc,
@@ -35,7 +44,13 @@ def _make_mock_grpc():
     mock_grpc.insecure_channel = MagicMock(name="insecure_channel")
     mock_grpc.secure_channel = MagicMock(name="secure_channel")
     mock_grpc.intercept_channel = MagicMock(name="intercept_channel")
-    mock_grpc.UnaryUnaryClientInterceptor = type("UnaryUnaryClientInterceptor", (), {})
+    for name in (
+        "UnaryUnaryClientInterceptor",
+        "UnaryStreamClientInterceptor",
+        "StreamUnaryClientInterceptor",
+        "StreamStreamClientInterceptor",
+    ):
+        setattr(mock_grpc, name, type(name, (), {}))
     return mock_grpc
 
 
@@ -133,13 +148,52 @@ def test_make_interceptor_class_delegates_to_intercept(config):
     mock_fn.assert_called_once_with(config, "host:443", "cont", "details", "req")
 
 
+def test_make_interceptor_class_inherits_all_bases():
+    bases = [type(f"Base{i}", (), {}) for i in range(4)]
+    cls = _make_interceptor_class(*bases)
+    assert all(issubclass(cls, base) for base in bases)
+
+
+@pytest.mark.parametrize(
+    ("name", "target"),
+    [
+        ("intercept_unary_stream", "_intercept_unary_stream"),
+        ("intercept_stream_unary", "_intercept_stream_unary"),
+        ("intercept_stream_stream", "_intercept_stream_stream"),
+    ],
+)
+def test_make_interceptor_class_delegates_streaming_calls(config, name, target):
+    interceptor = _make_interceptor_class(object)(config, "host:443")
+
+    with patch(f"smello.patches.patch_grpc.{target}") as mock_fn:
+        mock_fn.return_value = "result"
+        result = getattr(interceptor, name)("cont", "details", "req")
+
+    assert result == "result"
+    mock_fn.assert_called_once_with(config, "host:443", "cont", "details", "req")
+
+
 # ---------------------------------------------------------------------------
 # _intercept_unary_unary() — success path
 # ---------------------------------------------------------------------------
 
 
+def _future(result=None, error=None, trailing=()):
+    """A finished grpc call future; runs done-callbacks right away."""
+    future = MagicMock()
+    future.cancelled.return_value = False
+    future.exception.return_value = error
+    if error is not None:
+        future.result.side_effect = error
+    else:
+        future.result.return_value = result
+    future.trailing_metadata.return_value = list(trailing)
+    future.add_done_callback.side_effect = lambda fn: fn(future)
+    return future
+
+
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_interceptor_captures_successful_call(mock_serialize, mock_send, config):
     call_details = MagicMock()
     call_details.method = "/pkg.Service/Method"
@@ -148,11 +202,9 @@ def test_interceptor_captures_successful_call(mock_serialize, mock_send, config)
     mock_request = MagicMock()
     mock_request.__str__ = lambda self: "request_str"
 
-    mock_response = MagicMock()
     mock_result = MagicMock()
     mock_result.__str__ = lambda self: "result_str"
-    mock_response.result.return_value = mock_result
-    mock_response.trailing_metadata.return_value = []
+    mock_response = _future(mock_result)
 
     continuation = MagicMock(return_value=mock_response)
     mock_serialize.return_value = {"id": "test"}
@@ -176,7 +228,7 @@ def test_interceptor_captures_successful_call(mock_serialize, mock_send, config)
 
 
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_trailing_metadata_merged_into_response_headers(
     mock_serialize, mock_send, config
 ):
@@ -185,12 +237,9 @@ def test_trailing_metadata_merged_into_response_headers(
     call_details.method = "/pkg.Service/Method"
     call_details.metadata = None
 
-    mock_response = MagicMock()
-    mock_response.result.return_value = MagicMock()
-    mock_response.trailing_metadata.return_value = [
-        ("x-trace-id", "abc123"),
-        ("x-request-id", "def456"),
-    ]
+    mock_response = _future(
+        MagicMock(), trailing=[("x-trace-id", "abc123"), ("x-request-id", "def456")]
+    )
 
     continuation = MagicMock(return_value=mock_response)
     mock_serialize.return_value = {"id": "test"}
@@ -205,7 +254,7 @@ def test_trailing_metadata_merged_into_response_headers(
 
 
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_success_still_returned_when_send_capture_fails(
     mock_serialize, mock_send, config
 ):
@@ -214,9 +263,7 @@ def test_success_still_returned_when_send_capture_fails(
     call_details.method = "/svc/Method"
     call_details.metadata = None
 
-    mock_response = MagicMock()
-    mock_response.result.return_value = MagicMock()
-    mock_response.trailing_metadata.return_value = []
+    mock_response = _future(MagicMock())
     continuation = MagicMock(return_value=mock_response)
 
     mock_serialize.side_effect = RuntimeError("serialize boom")
@@ -228,13 +275,115 @@ def test_success_still_returned_when_send_capture_fails(
     assert result is mock_response
 
 
+# ---------------------------------------------------------------------------
+# _intercept_unary_unary() — futures
+# ---------------------------------------------------------------------------
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_future_returned_before_call_completes(mock_serialize, mock_send, config):
+    """The interceptor must not wait for the call (stub.Method.future())."""
+    call_details = MagicMock()
+    call_details.method = "/svc/Method"
+    call_details.metadata = None
+
+    callbacks = []
+    mock_response = MagicMock()
+    mock_response.add_done_callback.side_effect = callbacks.append
+    continuation = MagicMock(return_value=mock_response)
+
+    result = _intercept_unary_unary(
+        config, "host:443", continuation, call_details, MagicMock()
+    )
+
+    assert result is mock_response
+    mock_response.result.assert_not_called()
+    mock_serialize.assert_not_called()
+
+    # grpc completes the call later, on its own thread
+    mock_response.cancelled.return_value = False
+    mock_response.exception.return_value = None
+    mock_response.trailing_metadata.return_value = []
+    callbacks[0](mock_response)
+
+    assert mock_serialize.call_args[1]["status_code"] == 200
+    mock_send.assert_called_once()
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_cancelled_future_captured_as_cancelled(mock_serialize, mock_send, config):
+    call_details = MagicMock()
+    call_details.method = "/svc/Method"
+    call_details.metadata = None
+    mock_response = _future()
+    mock_response.cancelled.return_value = True
+
+    _intercept_unary_unary(
+        config, "host:443", MagicMock(return_value=mock_response), call_details, None
+    )
+
+    kw = mock_serialize.call_args[1]
+    assert kw["status_code"] == 499
+    assert kw["response_headers"]["grpc-status-name"] == "CANCELLED"
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_concurrent_futures_through_real_channel(mock_serialize, mock_send, config):
+    grpc = pytest.importorskip("grpc")
+    wrappers_pb2 = pytest.importorskip("google.protobuf.wrappers_pb2")
+    import threading  # noqa: PLC0415 -- test-only
+    from concurrent import futures  # noqa: PLC0415 -- test-only
+
+    StringValue = wrappers_pb2.StringValue
+    fanout = 4
+    barrier = threading.Barrier(fanout, timeout=5)
+
+    def wait_for_all(request, context):
+        # Only returns once all calls are in flight at the same time
+        barrier.wait()
+        return StringValue(value=request.value.upper())
+
+    handler = grpc.method_handlers_generic_handler(
+        "test.Futures",
+        {
+            "Wait": grpc.unary_unary_rpc_method_handler(
+                wait_for_all, StringValue.FromString, StringValue.SerializeToString
+            )
+        },
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=fanout))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        Interceptor = _make_interceptor_class(grpc.UnaryUnaryClientInterceptor)
+        target = f"127.0.0.1:{port}"
+        with grpc.insecure_channel(target) as raw_channel:
+            channel = grpc.intercept_channel(raw_channel, Interceptor(config, target))
+            wait = channel.unary_unary(
+                "/test.Futures/Wait",
+                request_serializer=StringValue.SerializeToString,
+                response_deserializer=StringValue.FromString,
+            )
+            calls = [wait.future(StringValue(value=str(i))) for i in range(fanout)]
+            results = [call.result(timeout=5).value for call in calls]
+    finally:
+        server.stop(None)
+
+    assert results == ["0", "1", "2", "3"]
+    assert mock_serialize.call_count == fanout
+
+
 # ---------------------------------------------------------------------------
 # _intercept_unary_unary() — error path
 # ---------------------------------------------------------------------------
 
 
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_interceptor_captures_error_call(mock_serialize, mock_send, config):
     call_details = MagicMock()
     call_details.method = "/pkg.Service/Method"
@@ -248,16 +397,19 @@ def test_interceptor_captures_error_call(mock_serialize, mock_send, config):
     rpc_error = Exception("not found")
     rpc_error.code = MagicMock(return_value=mock_code)
 
-    mock_response = MagicMock()
-    mock_response.result.side_effect = rpc_error
+    mock_response = _future(error=rpc_error)
 
     continuation = MagicMock(return_value=mock_response)
     mock_serialize.return_value = {"id": "err"}
 
+    result = _intercept_unary_unary(
+        config, "api.example.com:443", continuation, call_details, mock_request
+    )
+
+    # The error reaches the application through the returned call
+    assert result is mock_response
     with pytest.raises(Exception, match="not found"):
-        _intercept_unary_unary(
-            config, "api.example.com:443", continuation, call_details, mock_request
-        )
+        result.result()
 
     mock_serialize.assert_called_once()
     kw = mock_serialize.call_args[1]
@@ -268,7 +420,7 @@ def test_interceptor_captures_error_call(mock_serialize, mock_send, config):
 
 
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_error_without_code_attr_falls_back_to_unknown(
     mock_serialize, mock_send, config
 ):
@@ -279,15 +431,11 @@ def test_error_without_code_attr_falls_back_to_unknown(
 
     plain_error = ValueError("something broke")
 
-    mock_response = MagicMock()
-    mock_response.result.side_effect = plain_error
+    mock_response = _future(error=plain_error)
     continuation = MagicMock(return_value=mock_response)
     mock_serialize.return_value = {"id": "unk"}
 
-    with pytest.raises(ValueError, match="something broke"):
-        _intercept_unary_unary(
-            config, "host:443", continuation, call_details, MagicMock()
-        )
+    _intercept_unary_unary(config, "host:443", continuation, call_details, MagicMock())
 
     kw = mock_serialize.call_args[1]
     assert kw["status_code"] == 500
@@ -297,32 +445,49 @@ def test_error_without_code_attr_falls_back_to_unknown(
 
 
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_error_still_raised_when_send_capture_fails(mock_serialize, mock_send, config):
-    """If _send_capture raises on the error path, the original error is still re-raised."""
+    """If _send_capture raises on the error path, the original error still surfaces."""
     call_details = MagicMock()
     call_details.method = "/svc/Method"
     call_details.metadata = None
 
     rpc_error = Exception("original error")
-    mock_response = MagicMock()
-    mock_response.result.side_effect = rpc_error
+    mock_response = _future(error=rpc_error)
     continuation = MagicMock(return_value=mock_response)
 
     mock_serialize.side_effect = RuntimeError("capture boom")
 
+    result = _intercept_unary_unary(
+        config, "host:443", continuation, call_details, MagicMock()
+    )
+
     with pytest.raises(Exception, match="original error"):
+        result.result()
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_continuation_error_captured_and_raised(mock_serialize, mock_send, config):
+    call_details = MagicMock()
+    call_details.method = "/svc/Method"
+    call_details.metadata = None
+    continuation = MagicMock(side_effect=ValueError("no channel"))
+
+    with pytest.raises(ValueError, match="no channel"):
         _intercept_unary_unary(
             config, "host:443", continuation, call_details, MagicMock()
         )
 
+    assert mock_serialize.call_args[1]["status_code"] == 500
+
 
 # ---------------------------------------------------------------------------
 # _intercept_unary_unary() — skip path
 # ---------------------------------------------------------------------------
 
 
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_interceptor_skips_ignored_host(mock_serialize, config):
     config.ignore_hosts = ["ignored.example.com"]
 
@@ -338,18 +503,17 @@ def test_interceptor_skips_ignored_host(mock_serialize, config):
 
     assert result is mock_response
     mock_serialize.assert_not_called()
+    mock_response.add_done_callback.assert_not_called()
 
 
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_bytes_method_decoded(mock_serialize, mock_send, config):
     call_details = MagicMock()
     call_details.method = b"/pkg.Service/Method"
     call_details.metadata = None
 
-    mock_response = MagicMock()
-    mock_response.result.return_value = MagicMock()
-    mock_response.trailing_metadata.return_value = []
+    mock_response = _future(MagicMock())
     continuation = MagicMock(return_value=mock_response)
     mock_serialize.return_value = {"id": "test"}
 
@@ -359,13 +523,56 @@ def test_bytes_method_decoded(mock_serialize, mock_send, config):
     assert kw["url"] == "grpc://host:443/pkg.Service/Method"
 
 
+# ---------------------------------------------------------------------------
+# _intercept_unary_unary() — sampling
+# ---------------------------------------------------------------------------
+
+
+@patch("smello.patches.patch_grpc._proto_snapshot")
+@patch("smello.patches.patch_grpc.send")
+def test_unsampled_call_is_not_copied(mock_send, mock_snapshot):
+    config = SmelloConfig(sample_rate=0)
+    call_details = MagicMock()
+    call_details.method = "/svc/Method"
+    call_details.metadata = None
+    mock_response = _future(MagicMock())
+    continuation = MagicMock(return_value=mock_response)
+
+    result = _intercept_unary_unary(
+        config, "host:443", continuation, call_details, MagicMock()
+    )
+
+    assert result is mock_response
+    mock_snapshot.assert_not_called()
+    mock_send.assert_not_called()
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_unsampled_error_is_kept(mock_capture, mock_send):
+    config = SmelloConfig(sample_rate=0)
+    call_details = MagicMock()
+    call_details.method = "/svc/Method"
+    call_details.metadata = None
+    mock_response = _future(error=ValueError("boom"))
+    continuation = MagicMock(return_value=mock_response)
+
+    _intercept_unary_unary(config, "host:443", continuation, call_details, MagicMock())
+
+    kw = mock_capture.call_args[1]
+    assert kw["status_code"] == 500
+    assert kw["sample_rate"] == 1.0
+    assert kw["request_body"] is not None
+    mock_send.assert_called_once()
+
+
 # ---------------------------------------------------------------------------
 # _send_capture()
 # ---------------------------------------------------------------------------
 
 
 @patch("smello.patches.patch_grpc.send")
-@patch("smello.patches.patch_grpc.serialize_request_response")
+@patch("smello.patches.patch_grpc.Capture")
 def test_send_capture(mock_serialize, mock_send, config):
     mock_serialize.return_value = {"id": "payload"}
 
@@ -392,6 +599,9 @@ def test_send_capture(mock_serialize, mock_send, config):
         response_body='{"b": 2}',
         duration_s=0.5,
         library="grpc",
+        request_content_type="application/grpc",
+        response_content_type="application/grpc",
+        sample_rate=1.0,
     )
     mock_send.assert_called_once_with({"id": "payload"})
 
@@ -442,7 +652,7 @@ def test_proto_to_json_fallback():
     obj = MagicMock()
     obj.__str__ = lambda self: "mock_string_repr"
 
-    with patch.dict(sys.modules, {"google.protobuf.json_format": None}):
+    with patch("smello.patches.patch_grpc._json_format", return_value=None):
         result = _proto_to_json(obj)
 
     assert result == "mock_string_repr"
@@ -452,14 +662,7 @@ def test_proto_to_json_with_protobuf():
     mock_json_format = MagicMock()
     mock_json_format.MessageToJson.return_value = '{"field": "value"}'
 
-    with patch.dict(
-        sys.modules,
-        {
-            "google": MagicMock(),
-            "google.protobuf": MagicMock(),
-            "google.protobuf.json_format": mock_json_format,
-        },
-    ):
+    with patch("smello.patches.patch_grpc._json_format", return_value=mock_json_format):
         msg = MagicMock()
         del msg._pb  # ensure no _pb attr — raw protobuf
         result = _proto_to_json(msg)
@@ -473,14 +676,7 @@ def test_proto_to_json_unwraps_proto_plus():
     mock_json_format = MagicMock()
     mock_json_format.MessageToJson.return_value = '{"unwrapped": true}'
 
-    with patch.dict(
-        sys.modules,
-        {
-            "google": MagicMock(),
-            "google.protobuf": MagicMock(),
-            "google.protobuf.json_format": mock_json_format,
-        },
-    ):
+    with patch("smello.patches.patch_grpc._json_format", return_value=mock_json_format):
         inner_pb = MagicMock()
         wrapper = MagicMock()
         wrapper._pb = inner_pb
@@ -490,6 +686,13 @@ def test_proto_to_json_unwraps_proto_plus():
     mock_json_format.MessageToJson.assert_called_once_with(inner_pb)
 
 
+def test_json_format_imported_once():
+    pytest.importorskip("google.protobuf.json_format")
+
+    assert _json_format() is _json_format()
+    assert _json_format() is sys.modules["google.protobuf.json_format"]
+
+
 # ---------------------------------------------------------------------------
 # _metadata_to_dict()
 # ---------------------------------------------------------------------------
@@ -513,3 +716,507 @@ def test_metadata_to_dict_preserves_bytes():
     result = _metadata_to_dict(metadata)
     assert result["x-trace-id"] == "abc123"
     assert result["pc-low-bwd-bin"] == b"\n\x02 \x10"
+
+
+# ---------------------------------------------------------------------------
+# _proto_snapshot()
+# ---------------------------------------------------------------------------
+
+
+def test_proto_snapshot_renders_state_at_capture_time():
+    wrappers_pb2 = pytest.importorskip("google.protobuf.wrappers_pb2")
+    message = wrappers_pb2.StringValue(value="page-1")
+
+    snapshot = _proto_snapshot(message)
+    # Callers often reuse request messages, e.g. for the next page
+    message.value = "page-2"
+
+    assert callable(snapshot)
+    assert snapshot() == '"page-1"'
+
+
+def test_proto_snapshot_keeps_type_name_and_bytes():
+    wrappers_pb2 = pytest.importorskip("google.protobuf.wrappers_pb2")
+    message = wrappers_pb2.StringValue(value="hello")
+
+    snapshot = _proto_snapshot(message)
+
+    assert snapshot.args == ("google.protobuf.StringValue", b"\n\x05hello")
+    assert _message_class("google.protobuf.StringValue") is wrappers_pb2.StringValue
+
+
+def test_proto_snapshot_of_unknown_type_renders_placeholder():
+    pytest.importorskip("google.protobuf")
+    message = MagicMock()
+    del message._pb
+    message.SerializeToString.return_value = b"abc"
+    message.DESCRIPTOR.full_name = "pkg.NotRegistered"
+
+    assert _proto_snapshot(message)() == "<protobuf pkg.NotRegistered: 3 bytes>"
+
+
+def test_proto_snapshot_skips_messages_over_max_body_bytes():
+    wrappers_pb2 = pytest.importorskip("google.protobuf.wrappers_pb2")
+    message = wrappers_pb2.BytesValue(value=b"x" * 100)
+
+    snapshot = _proto_snapshot(message, max_bytes=10)
+
+    assert snapshot == "<protobuf: 102 bytes, larger than max_body_bytes>"
+
+
+def test_proto_snapshot_falls_back_to_str():
+    obj = MagicMock()
+    obj._pb.SerializeToString.side_effect = TypeError("not a message")
+    obj.__str__ = lambda self: "mock_string_repr"
+
+    assert _proto_snapshot(obj) == "mock_string_repr"
+
+
+# ---------------------------------------------------------------------------
+# Streaming calls
+# ---------------------------------------------------------------------------
+
+
+class _FakeStreamCall:
+    """A response-streaming call: an iterator that is also a grpc.Call."""
+
+    def __init__(self, messages, error=None, code=(0, "OK")):
+        self._messages = iter(messages)
+        self._error = error
+        self._code = MagicMock(value=code)
+        self._code.name = code[1]
+        self.cancelled = False
+
+    def __next__(self):
+        try:
+            return next(self._messages)
+        except StopIteration:
+            if self._error is not None:
+                raise self._error from None
+            raise
+
+    def code(self):
+        return self._code
+
+    def trailing_metadata(self):
+        return [("x-trace-id", "abc")]
+
+    def cancel(self):
+        self.cancelled = True
+        self._code = MagicMock(value=(1, "CANCELLED"))
+        self._code.name = "CANCELLED"
+        return True
+
+
+def _details(method="/pkg.Service/Stream"):
+    details = MagicMock()
+    details.method = method
+    details.metadata = [("x-custom", "val")]
+    return details
+
+
+def _message(size):
+    message = MagicMock()
+    del message._pb
+    message.ByteSize.return_value = size
+    message.SerializeToString.return_value = b"x" * size
+    return message
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_unary_stream_captured_when_exhausted(mock_capture, mock_send, config):
+    messages = [_message(10), _message(20), _message(30)]
+    call = _FakeStreamCall(messages)
+    continuation = MagicMock(return_value=call)
+
+    stream = _intercept_unary_stream(
+        config, "host:443", continuation, _details(), _message(5)
+    )
+
+    assert next(stream) is messages[0]
+    mock_capture.assert_not_called()
+    assert list(stream) == messages[1:]
+
+    mock_capture.assert_called_once()
+    kw = mock_capture.call_args[1]
+    assert kw["url"] == "grpc://host:443/pkg.Service/Stream"
+    assert kw["status_code"] == 200
+    headers = kw["response_headers"]
+    assert headers["grpc-status"] == "0"
+    assert headers["x-trace-id"] == "abc"
+    assert headers["smello-stream-responses"] == "3"
+    assert headers["smello-stream-response-bytes"] == "60"
+    assert "smello-stream-first-response-ms" in headers
+    assert "smello-stream-max-gap-ms" in headers
+    assert "smello-stream-requests" not in headers
+    assert callable(kw["request_body"])
+    assert callable(kw["response_body"])
+    mock_send.assert_called_once()
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_stream_delegates_call_methods(mock_capture, mock_send, config):
+    call = _FakeStreamCall([])
+    call.initial_metadata = MagicMock(return_value=[("k", "v")])
+
+    stream = _intercept_unary_stream(
+        config, "host:443", MagicMock(return_value=call), _details(), _message(1)
+    )
+
+    assert stream.initial_metadata() == [("k", "v")]
+    assert iter(stream) is stream
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_stream_stream_error_captured_and_raised(mock_capture, mock_send, config):
+    code = MagicMock(value=(14,))
+    code.name = "UNAVAILABLE"
+    error = Exception("connection lost")
+    error.code = MagicMock(return_value=code)
+    call = _FakeStreamCall([_message(10)], error=error)
+
+    def continuation(details, request_iterator):
+        # grpc consumes the request iterator on its own thread
+        list(request_iterator)
+        return call
+
+    stream = _intercept_stream_stream(
+        config, "host:443", continuation, _details(), iter([_message(3), _message(4)])
+    )
+    next(stream)
+    with pytest.raises(Exception, match="connection lost"):
+        next(stream)
+
+    kw = mock_capture.call_args[1]
+    assert kw["status_code"] == 503
+    headers = kw["response_headers"]
+    assert headers["grpc-status-name"] == "UNAVAILABLE"
+    assert headers["smello-stream-requests"] == "2"
+    assert headers["smello-stream-request-bytes"] == "7"
+    assert headers["smello-stream-responses"] == "1"
+    mock_send.assert_called_once()
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_cancelled_stream_captured_once(mock_capture, mock_send, config):
+    call = _FakeStreamCall([_message(1), _message(1)])
+
+    stream = _intercept_unary_stream(
+        config, "host:443", MagicMock(return_value=call), _details(), _message(1)
+    )
+    next(stream)
+    assert stream.cancel() is True
+    with pytest.raises(StopIteration):
+        # The rest of the stream doesn't produce a second capture
+        while True:
+            next(stream)
+
+    assert call.cancelled
+    mock_capture.assert_called_once()
+    kw = mock_capture.call_args[1]
+    assert kw["status_code"] == 499
+    assert kw["response_headers"]["smello-stream-responses"] == "1"
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_stream_unary_counts_requests(mock_capture, mock_send, config):
+    response = _future(_message(8))
+
+    def continuation(details, request_iterator):
+        assert list(request_iterator) == requests
+        return response
+
+    requests = [_message(5) for _ in range(4)]
+    returned = _intercept_stream_unary(
+        config, "host:443", continuation, _details(), iter(requests)
+    )
+
+    assert returned is response
+    kw = mock_capture.call_args[1]
+    assert kw["status_code"] == 200
+    assert kw["response_headers"]["smello-stream-requests"] == "4"
+    assert kw["response_headers"]["smello-stream-request-bytes"] == "20"
+    assert "smello-stream-responses" not in kw["response_headers"]
+
+
+@patch("smello.patches.patch_grpc._proto_snapshot")
+@patch("smello.patches.patch_grpc.Capture")
+def test_stream_samples_are_bounded(mock_capture, mock_snapshot, config):
+    mock_snapshot.return_value = "message"
+    count = _STREAM_SAMPLE_MESSAGES + 5
+    call = _FakeStreamCall([_message(1) for _ in range(count)])
+
+    stream = _intercept_stream_stream(
+        config, "host:443", lambda d, it: call, _details(), iter([])
+    )
+    with patch("smello.patches.patch_grpc.send"):
+        assert len(list(stream)) == count
+
+    assert mock_snapshot.call_count == _STREAM_SAMPLE_MESSAGES
+    body = mock_capture.call_args[1]["response_body"]
+    assert body() == "[" + ", ".join(['"message"'] * _STREAM_SAMPLE_MESSAGES) + "]"
+
+
+@patch("smello.patches.patch_grpc._proto_snapshot")
+@patch("smello.patches.patch_grpc.send")
+def test_unsampled_stream_is_not_copied(mock_send, mock_snapshot):
+    config = SmelloConfig(sample_rate=0)
+    call = _FakeStreamCall([_message(1), _message(1)])
+
+    stream = _intercept_unary_stream(
+        config, "host:443", MagicMock(return_value=call), _details(), _message(1)
+    )
+
+    assert len(list(stream)) == 2
+    mock_snapshot.assert_not_called()
+    mock_send.assert_not_called()
+
+
+def test_ignored_stream_is_not_wrapped(config):
+    config.ignore_hosts = ["ignored.example.com"]
+    call = _FakeStreamCall([])
+
+    result = _intercept_unary_stream(
+        config,
+        "ignored.example.com:443",
+        MagicMock(return_value=call),
+        _details(),
+        _message(1),
+    )
+
+    assert result is call
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_streaming_calls_through_real_channel(mock_capture, mock_send, config):
+    grpc = pytest.importorskip("grpc")
+    wrappers_pb2 = pytest.importorskip("google.protobuf.wrappers_pb2")
+    from concurrent import futures  # noqa: PLC0415 -- test-only
+
+    StringValue = wrappers_pb2.StringValue
+
+    def count_up(request, context):
+        for i in range(3):
+            yield StringValue(value=f"{request.value}-{i}")
+
+    def echo(request_iterator, context):
+        for request in request_iterator:
+            yield StringValue(value=request.value.upper())
+
+    handler = grpc.method_handlers_generic_handler(
+        "test.Streams",
+        {
+            "CountUp": grpc.unary_stream_rpc_method_handler(
+                count_up, StringValue.FromString, StringValue.SerializeToString
+            ),
+            "Echo": grpc.stream_stream_rpc_method_handler(
+                echo, StringValue.FromString, StringValue.SerializeToString
+            ),
+        },
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        Interceptor = _make_interceptor_class(
+            grpc.UnaryUnaryClientInterceptor,
+            grpc.UnaryStreamClientInterceptor,
+            grpc.StreamUnaryClientInterceptor,
+            grpc.StreamStreamClientInterceptor,
+        )
+        target = f"127.0.0.1:{port}"
+        with grpc.insecure_channel(target) as raw_channel:
+            channel = grpc.intercept_channel(raw_channel, Interceptor(config, target))
+            count_up_rpc = channel.unary_stream(
+                "/test.Streams/CountUp",
+                request_serializer=StringValue.SerializeToString,
+                response_deserializer=StringValue.FromString,
+            )
+            echo_rpc = channel.stream_stream(
+                "/test.Streams/Echo",
+                request_serializer=StringValue.SerializeToString,
+                response_deserializer=StringValue.FromString,
+            )
+
+            counted = [m.value for m in count_up_rpc(StringValue(value="n"))]
+            requests = iter([StringValue(value="a"), StringValue(value="b")])
+            echoed = [m.value for m in echo_rpc(requests)]
+    finally:
+        server.stop(None)
+
+    assert counted == ["n-0", "n-1", "n-2"]
+    assert echoed == ["A", "B"]
+    assert mock_capture.call_count == 2
+
+    count_up_kw, echo_kw = (c[1] for c in mock_capture.call_args_list)
+    assert count_up_kw["status_code"] == 200
+    assert count_up_kw["response_headers"]["smello-stream-responses"] == "3"
+    assert count_up_kw["request_body"]() == '"n"'
+    assert count_up_kw["response_body"]() == '["n-0", "n-1", "n-2"]'
+    assert echo_kw["response_headers"]["smello-stream-requests"] == "2"
+    assert echo_kw["request_body"]() == '["a", "b"]'
+    assert echo_kw["response_body"]() == '["A", "B"]'
+
+
+# ---------------------------------------------------------------------------
+# grpc.aio
+# ---------------------------------------------------------------------------
+
+
+def test_aio_channels_get_interceptor(config):
+    mock_grpc = _make_mock_grpc()
+    aio = types.SimpleNamespace(
+        insecure_channel=MagicMock(name="insecure_channel"),
+        secure_channel=MagicMock(name="secure_channel"),
+        UnaryUnaryClientInterceptor=type("UU", (), {}),
+        UnaryStreamClientInterceptor=type("US", (), {}),
+        StreamUnaryClientInterceptor=type("SU", (), {}),
+        StreamStreamClientInterceptor=type("SS", (), {}),
+    )
+    original_insecure = aio.insecure_channel
+    original_secure = aio.secure_channel
+    mock_grpc.aio = aio
+
+    with patch.dict(sys.modules, {"grpc": mock_grpc}):
+        patch_grpc(config)
+
+    own = object()
+    aio.insecure_channel("localhost:50051", interceptors=[own])
+    aio.secure_channel("host:443", "creds")
+
+    interceptors = original_insecure.call_args[1]["interceptors"]
+    assert interceptors[0] is own
+    # One interceptor per kind of call: grpc.aio files each under one kind
+    assert [type(i).__mro__[2] for i in interceptors[1:]] == [
+        aio.UnaryUnaryClientInterceptor,
+        aio.UnaryStreamClientInterceptor,
+        aio.StreamUnaryClientInterceptor,
+        aio.StreamStreamClientInterceptor,
+    ]
+    args, kw = original_secure.call_args
+    assert args == ("host:443", "creds")
+    assert len(kw["interceptors"]) == 4
+
+
+@patch("smello.patches.patch_grpc.send")
+@patch("smello.patches.patch_grpc.Capture")
+def test_aio_calls_through_real_channel(mock_capture, mock_send, config):
+    grpc = pytest.importorskip("grpc")
+    wrappers_pb2 = pytest.importorskip("google.protobuf.wrappers_pb2")
+    StringValue = wrappers_pb2.StringValue
+
+    async def upper(request, context):
+        if request.value == "fail":
+            await context.abort(grpc.StatusCode.NOT_FOUND, "no such value")
+        return StringValue(value=request.value.upper())
+
+    async def count_up(request, context):
+        for i in range(3):
+            yield StringValue(value=f"{request.value}-{i}")
+
+    async def join(request_iterator, context):
+        return StringValue(value="+".join([r.value async for r in request_iterator]))
+
+    async def echo(request_iterator, context):
+        async for request in request_iterator:
+            yield StringValue(value=request.value.upper())
+
+    def handler(kind, fn):
+        return getattr(grpc, f"{kind}_rpc_method_handler")(
+            fn, StringValue.FromString, StringValue.SerializeToString
+        )
+
+    interceptor_classes = _make_aio_interceptor_classes(
+        grpc.aio.UnaryUnaryClientInterceptor,
+        grpc.aio.UnaryStreamClientInterceptor,
+        grpc.aio.StreamUnaryClientInterceptor,
+        grpc.aio.StreamStreamClientInterceptor,
+    )
+
+    async def main():
+        server = grpc.aio.server()
+        server.add_generic_rpc_handlers(
+            (
+                grpc.method_handlers_generic_handler(
+                    "test.Aio",
+                    {
+                        "Upper": handler("unary_unary", upper),
+                        "CountUp": handler("unary_stream", count_up),
+                        "Join": handler("stream_unary", join),
+                        "Echo": handler("stream_stream", echo),
+                    },
+                ),
+            )
+        )
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        target = f"127.0.0.1:{port}"
+        try:
+            async with grpc.aio.insecure_channel(
+                target,
+                interceptors=[cls(config, target) for cls in interceptor_classes],
+            ) as channel:
+
+                def rpc(kind, name):
+                    return getattr(channel, kind)(
+                        f"/test.Aio/{name}",
+                        request_serializer=StringValue.SerializeToString,
+                        response_deserializer=StringValue.FromString,
+                    )
+
+                upper_rpc = rpc("unary_unary", "Upper")
+                results = [(await upper_rpc(StringValue(value="a"))).value]
+                with pytest.raises(grpc.aio.AioRpcError):
+                    await upper_rpc(StringValue(value="fail"))
+                call = rpc("unary_stream", "CountUp")(StringValue(value="n"))
+                results.append([m.value async for m in call])
+                results.append(await call.code())
+
+                requests = [StringValue(value="x"), StringValue(value="y")]
+                joined = await rpc("stream_unary", "Join")(iter(requests))
+                results.append(joined.value)
+
+                call = rpc("stream_stream", "Echo")()
+                await call.write(StringValue(value="p"))
+                results.append((await call.read()).value)
+                await call.done_writing()
+                results.append(await call.read())
+            # Let the capture tasks finish
+            await asyncio.sleep(0.05)
+            return results
+        finally:
+            await server.stop(None)
+
+    results = asyncio.run(main())
+
+    assert results == [
+        "A",
+        ["n-0", "n-1", "n-2"],
+        grpc.StatusCode.OK,
+        "x+y",
+        "P",
+        grpc.aio.EOF,
+    ]
+    captures = {
+        kw["url"].rsplit("/", 1)[-1] + ":" + kw["response_headers"]["grpc-status"]: kw
+        for kw in (c[1] for c in mock_capture.call_args_list)
+    }
+    assert set(captures) == {"Upper:0", "Upper:5", "CountUp:0", "Join:0", "Echo:0"}
+    assert captures["Upper:0"]["response_body"]() == '"A"'
+    assert captures["Upper:5"]["status_code"] == 404
+    assert "no such value" in captures["Upper:5"]["response_body"]
+    streamed = captures["CountUp:0"]
+    assert streamed["response_headers"]["smello-stream-responses"] == "3"
+    assert streamed["response_body"]() == '["n-0", "n-1", "n-2"]'
+    assert captures["Join:0"]["request_body"]() == '["x", "y"]'
+    assert captures["Join:0"]["response_headers"]["smello-stream-requests"] == "2"
+    bidi = captures["Echo:0"]
+    assert bidi["request_body"]() == '["p"]'
+    assert bidi["response_body"]() == '["P"]'
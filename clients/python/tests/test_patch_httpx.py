@@ -0,0 +1,190 @@
+"""Tests for smello.patches.patch_httpx."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from smello._timings import PhaseTimer
+from smello.config import SmelloConfig
+from smello.patches.patch_httpx import _on_trace, patch_httpx
+
+httpx = pytest.importorskip("httpx")
+
+_BODY = b"0123456789" * 100
+
+
+class _ChunkedStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __iter__(self):
+        for i in range(0, len(_BODY), 100):
+            yield _BODY[i : i + 100]
+
+    async def __aiter__(self):
+        for i in range(0, len(_BODY), 100):
+            yield _BODY[i : i + 100]
+
+
+def _handler(request):
+    return httpx.Response(
+        200, headers={"Content-Type": "text/plain"}, stream=_ChunkedStream()
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(_BODY)))
+        self.end_headers()
+        self.wfile.write(_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/download"
+    server.shutdown()
+
+
+@pytest.fixture()
+def captures(monkeypatch):
+    """Patch httpx with a small body limit; return the queued captures."""
+    monkeypatch.setattr(httpx.Client, "send", httpx.Client.send)
+    monkeypatch.setattr(httpx.AsyncClient, "send", httpx.AsyncClient.send)
+    sent = []
+    with patch("smello.patches.patch_httpx.send", sent.append):
+        patch_httpx(SmelloConfig(max_body_bytes=250))
+        yield sent
+
+
+def test_regular_response_is_captured_right_away(captures):
+    with httpx.Client(transport=httpx.MockTransport(_handler)) as client:
+        response = client.get("https://api.example.com/download")
+
+    assert response.content == _BODY
+    payload = captures[0].to_payload()
+    assert payload["response"]["body"] == _BODY[:250].decode()
+    assert payload["response"]["body_size"] == len(_BODY)
+    assert payload["response"]["truncated"] is True
+
+
+def test_streamed_response_is_captured_when_stream_ends(captures):
+    with httpx.Client(transport=httpx.MockTransport(_handler)) as client:
+        with client.stream("GET", "https://api.example.com/download") as response:
+            assert captures == []
+            received = b"".join(response.iter_bytes())
+
+    assert received == _BODY
+    [capture] = captures
+    payload = capture.to_payload()
+    assert payload["response"]["body"] == _BODY[:250].decode()
+    assert payload["response"]["body_size"] == len(_BODY)
+    assert payload["response"]["truncated"] is True
+
+
+def test_streamed_response_closed_unread_is_captured(captures):
+    with httpx.Client(transport=httpx.MockTransport(_handler)) as client:
+        with client.stream("GET", "https://api.example.com/download"):
+            pass
+
+    [capture] = captures
+    payload = capture.to_payload()
+    assert payload["response"]["status_code"] == 200
+    assert payload["response"]["body_size"] == 0
+
+
+def test_async_streamed_response_is_captured(captures):
+    async def main():
+        transport = httpx.MockTransport(_handler)
+        async with httpx.AsyncClient(transport=transport) as client:
+            url = "https://api.example.com/download"
+            async with client.stream("GET", url) as response:
+                return b"".join([chunk async for chunk in response.aiter_bytes()])
+
+    received = asyncio.run(main())
+
+    assert received == _BODY
+    [capture] = captures
+    assert capture.to_payload()["response"]["body_size"] == len(_BODY)
+
+
+def test_phase_timings_are_recorded(server_url, captures):
+    with httpx.Client() as client:
+        client.get(server_url)
+        client.get(server_url)
+
+    first, second = (c.to_payload()["timings"] for c in captures)
+    assert first["connection_reused"] is False
+    assert first["dns_ms"] is None  # part of connect_tcp in httpcore
+    assert first["connect_ms"] >= 0
+    assert first["ttfb_ms"] >= 0
+    assert first["download_ms"] >= 0
+    assert second["connection_reused"] is True
+    assert second["connect_ms"] is None
+
+
+def test_async_phase_timings_keep_the_applications_trace(server_url, captures):
+    events = []
+
+    async def trace(name, info):
+        events.append(name)
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            await client.get(server_url, extensions={"trace": trace})
+
+    asyncio.run(main())
+
+    assert "connection.connect_tcp.started" in events
+    assert captures[0].to_payload()["timings"]["connection_reused"] is False
+
+
+def test_mock_transport_has_no_timings(captures):
+    with httpx.Client(transport=httpx.MockTransport(_handler)) as client:
+        client.get("https://api.example.com/download")
+
+    assert captures[0].to_payload()["timings"] is None
+
+
+def test_trace_events_map_to_phases():
+    timer = PhaseTimer()
+    for name in (
+        "connection.connect_tcp.started",
+        "connection.connect_tcp.complete",
+        "connection.start_tls.started",
+        "connection.start_tls.complete",
+        "http11.receive_response_headers.started",
+        "http11.receive_response_headers.complete",
+        "http11.receive_response_body.started",
+        "http11.receive_response_body.failed",
+        "http11.response_closed.started",
+    ):
+        _on_trace(timer, name)
+
+    timings = timer.to_dict()
+    assert timings["connection_reused"] is False
+    assert timings["dns_ms"] is None
+    for phase in ("connect_ms", "tls_ms", "ttfb_ms", "download_ms"):
+        assert timings[phase] >= 0
+
+
+def test_client_identity_and_pool_are_recorded(server_url, captures):
+    limits = httpx.Limits(max_connections=3)
+    with httpx.Client(limits=limits) as client:
+        client.get(server_url)
+        client.get(server_url)
+    with httpx.Client() as client:
+        client.get(server_url)
+
+    first, second, third = (c.to_payload() for c in captures)
+    assert first["meta"]["client_id"] == second["meta"]["client_id"]
+    assert third["meta"]["client_id"] != first["meta"]["client_id"]
+    assert first["meta"]["pool_size"] == 3
+    assert first["timings"]["pool_wait_ms"] >= 0
@@ -0,0 +1,159 @@
+"""Tests for smello.patches.patch_requests."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from smello import _stats
+from smello.config import SmelloConfig
+from smello.patches.patch_requests import patch_requests
+
+requests = pytest.importorskip("requests")
+
+_BODY = b"0123456789" * 100
+
+
+class _ChunkedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(0, len(_BODY), 100):
+            chunk = _BODY[i : i + 100]
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChunkedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/download"
+    server.shutdown()
+
+
+@pytest.fixture()
+def captures(monkeypatch):
+    """Patch requests with a small body limit; return the queued captures."""
+    monkeypatch.setattr(requests.Session, "send", requests.Session.send)
+    sent = []
+    with patch("smello.patches.patch_requests.send", sent.append):
+        patch_requests(SmelloConfig(max_body_bytes=250))
+        yield sent
+
+
+def test_regular_response_is_captured_right_away(server_url, captures):
+    response = requests.get(server_url)
+
+    assert response.content == _BODY
+    payload = captures[0].to_payload()
+    assert payload["response"]["body"] == _BODY[:250].decode()
+    assert payload["response"]["body_size"] == len(_BODY)
+    assert payload["response"]["truncated"] is True
+
+
+def test_streamed_response_is_captured_after_reading(server_url, captures):
+    response = requests.get(server_url, stream=True)
+    assert captures == []
+
+    received = b"".join(response.iter_content(chunk_size=64))
+
+    assert received == _BODY
+    [capture] = captures
+    payload = capture.to_payload()
+    assert payload["response"]["body"] == _BODY[:250].decode()
+    assert payload["response"]["body_size"] == len(_BODY)
+    assert payload["response"]["truncated"] is True
+
+
+def test_streamed_response_closed_early_is_captured(server_url, captures):
+    response = requests.get(server_url, stream=True)
+    first = next(response.iter_content(chunk_size=100))
+    response.close()
+
+    assert first == _BODY[:100]
+    [capture] = captures
+    payload = capture.to_payload()
+    assert payload["response"]["body"] == _BODY[:100].decode()
+    assert payload["response"]["body_size"] == 100
+
+
+def test_streamed_response_is_captured_once(server_url, captures):
+    with requests.get(server_url, stream=True) as response:
+        assert response.text == _BODY.decode()
+
+    assert len(captures) == 1
+
+
+def test_unsampled_call_is_not_captured(server_url, monkeypatch):
+    monkeypatch.setattr(requests.Session, "send", requests.Session.send)
+    sent = []
+    with patch("smello.patches.patch_requests.send", sent.append):
+        patch_requests(SmelloConfig(sample_rate=0))
+        response = requests.get(server_url)
+
+    assert response.content == _BODY
+    assert sent == []
+
+
+def test_sample_rate_is_recorded(server_url, monkeypatch):
+    monkeypatch.setattr(requests.Session, "send", requests.Session.send)
+    monkeypatch.setattr("smello._sampling.random.random", lambda: 0.0)
+    sent = []
+    with patch("smello.patches.patch_requests.send", sent.append):
+        patch_requests(SmelloConfig(sample_rate=0.5))
+        requests.get(server_url)
+
+    assert sent[0].to_payload()["meta"]["sample_rate"] == 0.5
+
+
+def test_patch_overhead_is_recorded(server_url, captures):
+    before = _stats.snapshot()["patch_overhead"]["count"]
+    requests.get(server_url)
+    assert _stats.snapshot()["patch_overhead"]["count"] == before + 1
+
+
+def test_phase_timings_are_recorded(server_url, captures):
+    with requests.Session() as session:
+        session.get(server_url)
+        session.get(server_url)
+
+    first, second = (c.to_payload()["timings"] for c in captures)
+    assert first["connection_reused"] is False
+    assert first["dns_ms"] >= 0
+    assert first["connect_ms"] >= 0
+    assert first["tls_ms"] is None  # plain HTTP
+    assert first["ttfb_ms"] >= 0
+    assert first["download_ms"] >= 0
+    assert second["connection_reused"] is True
+    assert second["connect_ms"] is None
+
+
+def test_streamed_response_download_ends_when_read(server_url, captures):
+    response = requests.get(server_url, stream=True)
+    response.content
+
+    [capture] = captures
+    assert capture.to_payload()["timings"]["download_ms"] >= 0
+
+
+def test_session_identity_and_pool_are_recorded(server_url, captures):
+    with requests.Session() as session:
+        session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=4))
+        session.get(server_url)
+        session.get(server_url)
+    requests.get(server_url)
+
+    first, second, third = (c.to_payload() for c in captures)
+    assert first["meta"]["client_id"] == second["meta"]["client_id"]
+    assert third["meta"]["client_id"] != first["meta"]["client_id"]
+    assert first["meta"]["pool_size"] == 4
+    assert first["timings"]["pool_wait_ms"] >= 0
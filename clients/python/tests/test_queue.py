@@ -0,0 +1,72 @@
+"""Tests for smello._queue."""
+
+import queue
+import threading
+
+import pytest
+from smello._queue import CaptureQueue, payload_size
+
+
+def test_bounded_by_items():
+    q = CaptureQueue(maxsize=2, max_bytes=1000)
+    q.put_nowait("a", size=1)
+    q.put_nowait("b", size=1)
+    with pytest.raises(queue.Full):
+        q.put_nowait("c", size=1)
+
+
+def test_bounded_by_bytes():
+    q = CaptureQueue(maxsize=100, max_bytes=1000)
+    q.put_nowait("a", size=600)
+    with pytest.raises(queue.Full):
+        q.put_nowait("b", size=600)
+    q.put_nowait("c", size=400)
+    assert q.bytes == 1000
+
+    assert q.get_nowait() == "a"
+    assert q.bytes == 400
+
+
+def test_oversized_item_fits_into_empty_queue():
+    q = CaptureQueue(maxsize=100, max_bytes=1000)
+    q.put_nowait("huge", size=5000)
+    with pytest.raises(queue.Full):
+        q.put_nowait("small", size=1)
+
+
+def test_blocking_put_waits_for_room():
+    q = CaptureQueue(maxsize=1, max_bytes=1000)
+    q.put_nowait("a", size=1)
+    with pytest.raises(queue.Full):
+        q.put("b", timeout=0.01, size=1)
+
+    threading.Timer(0.05, q.get).start()
+    q.put("b", timeout=5, size=1)
+    assert q.get_nowait() == "b"
+
+
+def test_pop_oldest_counts_as_done():
+    q = CaptureQueue(maxsize=10, max_bytes=1000)
+    q.put_nowait("a", size=10)
+    q.put_nowait("b", size=20)
+
+    assert q.pop_oldest() == ("a", 10)
+    assert q.bytes == 20
+    assert q.unfinished_tasks == 1
+    q.get_nowait()
+    q.task_done()
+    q.join()  # doesn't wait for the popped item
+    assert q.pop_oldest() is None
+
+
+def test_resize():
+    q = CaptureQueue(maxsize=1, max_bytes=1000)
+    q.put_nowait("a", size=1)
+    q.resize(2, 1000)
+    q.put_nowait("b", size=1)
+    assert q.qsize() == 2
+
+
+def test_payload_size_counts_bodies():
+    payload = {"request": {"body": "x" * 100}, "response": {"body": None}}
+    assert payload_size(payload) == payload_size({}) + 100
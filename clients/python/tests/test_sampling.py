@@ -0,0 +1,107 @@
+"""Tests for smello._sampling."""
+
+import pytest
+from smello import _stats
+from smello._sampling import Sampler
+from smello.config import SmelloConfig
+
+
+@pytest.fixture()
+def draws(monkeypatch):
+    """Make random.random() return the values appended to the list."""
+    values = []
+    monkeypatch.setattr("smello._sampling.random.random", lambda: values.pop(0))
+    return values
+
+
+def test_everything_sampled_by_default():
+    sampler = Sampler(SmelloConfig())
+    assert sampler.sample("api.example.com") is True
+    assert sampler.keep("api.example.com", True, 200, 0.01) == 1.0
+
+
+def test_head_sampling_draws_against_rate(draws):
+    sampler = Sampler(SmelloConfig(sample_rate=0.25, keep_errors=False))
+    draws.extend([0.1, 0.9])
+
+    assert sampler.sample("api.example.com") is True
+    assert sampler.sample("api.example.com") is None
+
+
+def test_host_rate_overrides_global_rate(draws):
+    config = SmelloConfig(sample_rate=1.0, host_sample_rates={"noisy.example.com": 0})
+    sampler = Sampler(config)
+
+    assert sampler.sample("noisy.example.com") is False  # tail rules still apply
+    assert sampler.sample("api.example.com") is True
+
+
+def test_sampled_capture_records_rate(draws):
+    sampler = Sampler(SmelloConfig(sample_rate=0.1))
+    draws.append(0.05)
+
+    assert sampler.sample("api.example.com") is True
+    assert sampler.keep("api.example.com", True, 200, 0.01) == 0.1
+
+
+def test_unsampled_success_is_dropped():
+    sampler = Sampler(SmelloConfig(sample_rate=0))
+    assert sampler.sample("api.example.com") is False
+    assert sampler.keep("api.example.com", False, 200, 0.01) is None
+
+
+@pytest.mark.parametrize(
+    ("status_code", "error"),
+    [(404, False), (503, False), (200, True)],
+)
+def test_errors_are_always_kept(status_code, error):
+    sampler = Sampler(SmelloConfig(sample_rate=0))
+    assert sampler.keep("api.example.com", False, status_code, 0.01, error) == 1.0
+
+
+def test_errors_follow_sampling_without_keep_errors():
+    sampler = Sampler(SmelloConfig(sample_rate=0, keep_errors=False))
+    assert sampler.sample("api.example.com") is None
+
+
+def test_slow_calls_are_kept():
+    sampler = Sampler(SmelloConfig(sample_rate=0, slow_threshold_ms=500))
+    assert sampler.keep("api.example.com", False, 200, 0.499) is None
+    assert sampler.keep("api.example.com", False, 200, 0.5) == 1.0
+
+
+def test_rate_limit_per_host(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("smello._sampling.time.monotonic", lambda: now[0])
+    sampler = Sampler(SmelloConfig(rate_limit_per_host=2))
+
+    kept = [sampler.keep("api.example.com", True, 200, 0.01) for _ in range(3)]
+    assert kept == [1.0, 1.0, None]
+    # Other hosts have their own bucket
+    assert sampler.keep("other.example.com", True, 200, 0.01) == 1.0
+
+    now[0] += 0.5  # refills one token
+    assert sampler.keep("api.example.com", True, 200, 0.01) == 1.0
+    assert sampler.keep("api.example.com", True, 200, 0.01) is None
+
+
+def test_config_shares_one_sampler():
+    config = SmelloConfig()
+    assert config.sampler is config.sampler
+
+
+def test_dropped_calls_are_counted(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("smello._sampling.time.monotonic", lambda: now[0])
+    _stats.reset()
+
+    assert Sampler(SmelloConfig(sample_rate=0, keep_errors=False)).sample("a") is None
+    assert Sampler(SmelloConfig(sample_rate=0)).keep("a", False, 200, 0.01) is None
+    limited = Sampler(SmelloConfig(rate_limit_per_host=1))
+    limited.keep("a", True, 200, 0.01)
+    assert limited.keep("a", True, 200, 0.01) is None
+
+    snapshot = _stats.snapshot()
+    assert snapshot["captures_sampled_out"] == 2
+    assert snapshot["captures_rate_limited"] == 1
+    _stats.reset()
@@ -0,0 +1,150 @@
+"""Tests for smello._spool."""
+
+import shutil
+
+import pytest
+from smello._spool import Spool, SpoolInUseError
+
+
+@pytest.fixture()
+def spool(tmp_path):
+    s = Spool(tmp_path / "spool", max_bytes=1024 * 1024)
+    yield s
+    s.close()
+
+
+def test_read_returns_payloads_in_order(spool):
+    for i in range(5):
+        assert spool.append({"id": i}) is True
+
+    payloads, _position = spool.read(10)
+    assert [p["id"] for p in payloads] == [0, 1, 2, 3, 4]
+    assert spool.pending() is False
+
+
+def test_read_respects_max_items(spool):
+    for i in range(5):
+        spool.append({"id": i})
+
+    first, _ = spool.read(2)
+    second, _ = spool.read(10)
+    assert [p["id"] for p in first] == [0, 1]
+    assert [p["id"] for p in second] == [2, 3, 4]
+
+
+def test_rewind_returns_unacknowledged_payloads_again(spool):
+    spool.append({"id": "a"})
+    spool.append({"id": "b"})
+    spool.read(10)
+
+    spool.rewind()
+
+    payloads, _ = spool.read(10)
+    assert [p["id"] for p in payloads] == ["a", "b"]
+
+
+def test_replay_resumes_from_last_ack_after_reopen(tmp_path):
+    spool = Spool(tmp_path, max_bytes=1024 * 1024)
+    for i in range(4):
+        spool.append({"id": i})
+    _, position = spool.read(2)
+    spool.ack(position)
+    spool.close()
+
+    reopened = Spool(tmp_path, max_bytes=1024 * 1024)
+    assert reopened.pending() is True
+    payloads, _ = reopened.read(10)
+    assert [p["id"] for p in payloads] == [2, 3]
+
+    reopened.append({"id": 4})
+    payloads, _ = reopened.read(10)
+    assert [p["id"] for p in payloads] == [4]
+    reopened.close()
+
+
+def test_unacknowledged_payloads_survive_reopen(tmp_path):
+    spool = Spool(tmp_path, max_bytes=1024 * 1024)
+    spool.append({"id": "kept"})
+    spool.read(10)  # read but never acknowledged
+    spool.close()
+
+    reopened = Spool(tmp_path, max_bytes=1024 * 1024)
+    payloads, _ = reopened.read(10)
+    assert [p["id"] for p in payloads] == ["kept"]
+    reopened.close()
+
+
+def test_torn_record_is_treated_as_end_of_data(tmp_path):
+    spool = Spool(tmp_path, max_bytes=1024 * 1024)
+    spool.append({"id": "good"})
+    spool.append({"id": "torn"})
+    segment = spool._segments[-1]
+    # Corrupt the last byte of the second record
+    _, end = spool._write
+    segment.map[end - 1] ^= 0xFF
+    spool.close()
+
+    reopened = Spool(tmp_path, max_bytes=1024 * 1024)
+    payloads, _ = reopened.read(10)
+    assert [p["id"] for p in payloads] == ["good"]
+    reopened.append({"id": "next"})
+    payloads, _ = reopened.read(10)
+    assert [p["id"] for p in payloads] == ["next"]
+    reopened.close()
+
+
+def test_total_size_is_bounded(tmp_path):
+    spool = Spool(tmp_path, max_bytes=128 * 1024)
+    body = "x" * 1000
+    accepted = 0
+    while spool.append({"body": body}):
+        accepted += 1
+        assert accepted < 1000
+
+    assert 100 < accepted < 140
+    files = list(tmp_path.glob("segment-*.log"))
+    assert sum(f.stat().st_size for f in files) <= 128 * 1024
+    spool.close()
+
+
+def test_acknowledged_segments_are_deleted_and_space_reused(tmp_path):
+    spool = Spool(tmp_path, max_bytes=128 * 1024)
+    while spool.append({"body": "x" * 1000}):
+        pass
+
+    while spool.pending():
+        _, position = spool.read(50)
+        spool.ack(position)
+
+    assert len(list(tmp_path.glob("segment-*.log"))) == 1
+    assert spool.append({"body": "after"}) is True
+    spool.close()
+
+
+def test_oversized_payload_is_rejected(tmp_path):
+    spool = Spool(tmp_path, max_bytes=128 * 1024)
+    assert spool.append({"body": "x" * 200_000}) is False
+    assert spool.pending() is False
+    spool.close()
+
+
+def test_removed_directory_fails_appends_but_not_acks(spool, caplog):
+    spool.append({"id": "first"})
+    _, position = spool.read(10)
+    shutil.rmtree(spool.directory)
+
+    spool.ack(position)
+    appended = [spool.append({"id": "x", "body": "x" * 1000}) for _ in range(1000)]
+
+    assert appended[-1] is False
+    assert caplog.text.count("Capture spool in") == 1
+
+
+def test_directory_can_be_open_only_once(tmp_path):
+    spool = Spool(tmp_path, max_bytes=1024 * 1024)
+
+    with pytest.raises(SpoolInUseError):
+        Spool(tmp_path, max_bytes=1024 * 1024)
+
+    spool.close()
+    Spool(tmp_path, max_bytes=1024 * 1024).close()
@@ -0,0 +1,61 @@
+"""Tests for smello._stats."""
+
+import pytest
+from smello import _stats
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    _stats.reset()
+    yield
+    _stats.reset()
+
+
+def test_counters():
+    _stats.incr("captures_enqueued")
+    _stats.incr("bytes_sent", 512)
+
+    snapshot = _stats.snapshot()
+    assert snapshot["captures_enqueued"] == 1
+    assert snapshot["bytes_sent"] == 512
+    assert snapshot["captures_failed"] == 0
+
+
+def test_histogram_summary():
+    for _ in range(98):
+        _stats.observe("send_latency", 0.002)
+    _stats.observe("send_latency", 0.3)
+    _stats.observe("send_latency", 4.0)
+
+    summary = _stats.snapshot()["send_latency"]
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 2.5  # upper bound of the 2.5 ms bucket
+    assert summary["p99_ms"] == 500.0
+    assert summary["max_ms"] == 4000.0
+    assert summary["mean_ms"] == pytest.approx((0.196 + 4.3) / 100 * 1000)
+
+
+def test_histogram_beyond_last_bucket_reports_max():
+    histogram = _stats.Histogram()
+    histogram.observe(30.0)
+    assert histogram.percentile(50) == 30.0
+
+
+def test_empty_histogram():
+    assert _stats.snapshot()["patch_overhead"] == {
+        "count": 0,
+        "mean_ms": 0.0,
+        "p50_ms": 0.0,
+        "p99_ms": 0.0,
+        "max_ms": 0.0,
+    }
+
+
+def test_reset():
+    _stats.incr("captures_sent", 3)
+    _stats.observe("patch_overhead", 0.001)
+    _stats.reset()
+
+    snapshot = _stats.snapshot()
+    assert snapshot["captures_sent"] == 0
+    assert snapshot["patch_overhead"]["count"] == 0
@@ -0,0 +1,91 @@
+"""Tests for smello._timings."""
+
+import os
+
+import pytest
+from smello import _timings
+from smello._timings import PhaseTimer
+
+
+def test_nothing_observed_has_no_timings():
+    assert PhaseTimer().to_dict() is None
+
+
+def test_repeated_phases_add_up():
+    timer = PhaseTimer()
+    timer.add("ttfb", 0.25)
+    timer.add("ttfb", 0.5)
+
+    assert timer.to_dict()["ttfb_ms"] == 750
+
+
+def test_response_without_new_connection_reused_one():
+    timer = PhaseTimer()
+    timer.add("ttfb", 0.1)
+    timer.response_started()
+
+    timings = timer.to_dict()
+    assert timings["connection_reused"] is True
+    assert timings["connect_ms"] is None
+
+
+def test_new_connection_is_not_reused():
+    timer = PhaseTimer()
+    timer.new_connection()
+    timer.response_started()
+
+    assert timer.to_dict()["connection_reused"] is False
+
+
+def test_stop_without_start_is_ignored():
+    timer = PhaseTimer()
+    timer.stop("download")
+
+    assert timer.download is None
+
+
+def test_nested_call_ends_outer_download():
+    outer, inner = PhaseTimer(), PhaseTimer()
+    previous = _timings.activate(outer)
+    outer.start("download")
+    try:
+        _timings.restore(_timings.activate(inner))
+        assert outer.download is not None
+        assert _timings.current() is outer
+    finally:
+        _timings.restore(previous)
+
+    assert _timings.current() is previous
+
+
+def test_client_id_is_stable_per_object():
+    class Client:
+        pass
+
+    one, other = Client(), Client()
+
+    assert _timings.client_id(one) == _timings.client_id(one)
+    assert _timings.client_id(one) != _timings.client_id(other)
+
+
+def test_client_id_of_unreferenceable_object_is_none():
+    assert _timings.client_id(object()) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_forked_child_gets_a_fresh_client_id_lock():
+    class Client:
+        pass
+
+    # Fork while another thread is assigning a client id
+    with _timings._client_ids_lock:
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            if not _timings._client_ids_lock.acquire(timeout=5):
+                os._exit(1)
+            _timings._client_ids_lock.release()
+            os._exit(0 if _timings.client_id(Client()) else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -1,38 +1,136 @@
 """Tests for smello.transport."""
 
+import gzip
 import json
+import os
+import shutil
 import threading
 import time
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
-from smello.transport import _json_default, flush, send, shutdown, start_worker
+from smello import transport
+from smello._breaker import CircuitBreaker
+from smello._queue import CaptureQueue
+from smello._spool import Spool
+from smello.capture import Capture
+from smello.config import SmelloConfig
+from smello.transport import (
+    _json_default,
+    flush,
+    queue_stats,
+    reconnect_count,
+    send,
+    shutdown,
+    start_worker,
+    stats,
+)
 
 
 class _CaptureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
     captured: list = []
+    paths: list = []
+    # Client (host, port) pairs, one entry per request
+    peers: list = []
+    # Content-Encoding header of each request (None when absent)
+    encodings: list = []
+    # Capture ids the batch endpoint reports as failed (once each)
+    fail_once: set = set()
+    # Number of upcoming batch requests answered with a 500
+    batch_errors: int = 0
+    # Drop this many results from the next batch response
+    short_results: int = 0
+    batch_supported: bool = True
 
     def do_POST(self):
         length = int(self.headers.get("Content-Length", 0))
-        body = json.loads(self.rfile.read(length))
+        data = self.rfile.read(length)
+        encoding = self.headers.get("Content-Encoding")
+        _CaptureHandler.encodings.append(encoding)
+        if encoding == "gzip":
+            data = gzip.decompress(data)
+        body = json.loads(data)
+        _CaptureHandler.paths.append(self.path)
+        _CaptureHandler.peers.append(self.client_address)
+
+        if self.path == "/api/capture/batch":
+            if not _CaptureHandler.batch_supported:
+                self._reply(404, {"detail": "Not Found"})
+                return
+            if _CaptureHandler.batch_errors:
+                _CaptureHandler.batch_errors -= 1
+                self._reply(500, {"detail": "Internal Server Error"})
+                return
+            results = []
+            for item in body["captures"]:
+                if item.get("id") in _CaptureHandler.fail_once:
+                    _CaptureHandler.fail_once.discard(item["id"])
+                    results.append({"id": item["id"], "status": "error"})
+                else:
+                    _CaptureHandler.captured.append(item)
+                    results.append({"id": item.get("id"), "status": "ok"})
+            if _CaptureHandler.short_results:
+                dropped = results[-_CaptureHandler.short_results :]
+                results = results[: -_CaptureHandler.short_results]
+                _CaptureHandler.short_results = 0
+                # Pretend the server never stored the items it didn't report
+                del _CaptureHandler.captured[-len(dropped) :]
+            self._reply(200, {"results": results})
+            return
+
         _CaptureHandler.captured.append(body)
-        self.send_response(201)
+        self._reply(201, {"status": "ok"})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
         self.end_headers()
-        self.wfile.write(b'{"status":"ok"}')
+        self.wfile.write(data)
 
     def log_message(self, format, *args):
         pass
 
 
 @pytest.fixture()
-def capture_server():
-    """Start a minimal HTTP server that records POSTed payloads."""
+def capture_server(monkeypatch):
+    """Start a minimal HTTP server that records POSTed payloads.
+
+    Transport settings changed by a test are restored afterwards.
+    """
+    monkeypatch.setattr(transport, "_batch_size", transport._batch_size)
+    monkeypatch.setattr(transport, "_batch_linger", transport._batch_linger)
+    monkeypatch.setattr(transport, "_batch_supported", True)
+    monkeypatch.setattr(transport, "_compressor", None)
+    monkeypatch.setattr(transport, "_spool", None)
+    monkeypatch.setattr(transport, "_collector_path", None)
+    monkeypatch.setattr(transport, "_compress_min_bytes", transport._compress_min_bytes)
+    monkeypatch.setattr(transport, "_RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(transport, "_overflow", "drop_newest")
+    monkeypatch.setattr(transport, "_heartbeat_interval", 60.0)
+    monkeypatch.setattr(transport, "_breaker", CircuitBreaker())
+    monkeypatch.setattr(transport, "_breaker_policy", "drop")
+    monkeypatch.setattr(transport, "_block_timeout", transport._block_timeout)
+    monkeypatch.setattr(transport._queue, "maxsize", transport._queue.maxsize)
+    monkeypatch.setattr(transport._queue, "max_bytes", transport._queue.max_bytes)
     _CaptureHandler.captured = []
-    server = HTTPServer(("127.0.0.1", 0), _CaptureHandler)
+    _CaptureHandler.paths = []
+    _CaptureHandler.peers = []
+    _CaptureHandler.encodings = []
+    _CaptureHandler.protocol_version = "HTTP/1.1"
+    _CaptureHandler.fail_once = set()
+    _CaptureHandler.batch_errors = 0
+    _CaptureHandler.short_results = 0
+    _CaptureHandler.batch_supported = True
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CaptureHandler)
     port = server.server_address[1]
     thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
     yield f"http://127.0.0.1:{port}", _CaptureHandler.captured
+    if transport._collector is not None:
+        transport._collector.close()
+        transport._collector = None
     server.shutdown()
 
 
@@ -88,6 +186,663 @@ def test_shutdown_flushes(capture_server):
     assert len(captured) == 1
 
 
+# ---------------------------------------------------------------------------
+# Batching
+# ---------------------------------------------------------------------------
+
+
+def test_payloads_are_sent_in_batches(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_size=10, batch_linger_ms=200))
+
+    for i in range(20):
+        send({"id": f"batch-{i}", "request": {}, "response": {}})
+
+    assert flush(timeout=5.0) is True
+    assert [p["id"] for p in captured] == [f"batch-{i}" for i in range(20)]
+    assert set(_CaptureHandler.paths) == {"/api/capture/batch"}
+    assert len(_CaptureHandler.paths) < 20
+
+
+def test_batch_size_and_linger_are_configurable(capture_server):
+    url, _captured = capture_server
+    start_worker(url, SmelloConfig(batch_size=7, batch_linger_ms=0))
+
+    assert transport._batch_size == 7
+    assert transport._batch_linger == 0
+
+
+def test_only_failed_items_are_retried(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_size=10, batch_linger_ms=100))
+    _CaptureHandler.fail_once = {"retry-1"}
+
+    for i in range(3):
+        send({"id": f"retry-{i}", "request": {}, "response": {}})
+
+    assert flush(timeout=5.0) is True
+    ids = [p["id"] for p in captured]
+    assert sorted(ids) == ["retry-0", "retry-1", "retry-2"]
+
+
+def test_whole_batch_is_retried_after_server_error(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_size=10, batch_linger_ms=100))
+    _CaptureHandler.batch_errors = 1
+
+    for i in range(3):
+        send({"id": f"err500-{i}", "request": {}, "response": {}})
+
+    assert flush(timeout=5.0) is True
+    assert sorted(p["id"] for p in captured) == ["err500-0", "err500-1", "err500-2"]
+    assert _CaptureHandler.paths.count("/api/capture/batch") >= 2
+
+
+def test_batch_is_retried_when_results_are_missing(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_size=10, batch_linger_ms=100))
+    _CaptureHandler.short_results = 1
+
+    for i in range(3):
+        send({"id": f"short-{i}", "request": {}, "response": {}})
+
+    assert flush(timeout=5.0) is True
+    assert "short-2" in [p["id"] for p in captured]
+
+
+def test_falls_back_to_single_endpoint_without_batch_support(capture_server):
+    url, captured = capture_server
+    _CaptureHandler.batch_supported = False
+    start_worker(url, SmelloConfig(batch_size=10, batch_linger_ms=100))
+
+    send({"id": "legacy-1", "request": {}, "response": {}})
+    send({"id": "legacy-2", "request": {}, "response": {}})
+
+    assert flush(timeout=5.0) is True
+    assert [p["id"] for p in captured] == ["legacy-1", "legacy-2"]
+    assert _CaptureHandler.paths.count("/api/capture") == 2
+
+
+# ---------------------------------------------------------------------------
+# Persistent connection
+# ---------------------------------------------------------------------------
+
+
+def test_connection_is_kept_alive_between_batches(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+
+    for i in range(3):
+        send({"id": f"keepalive-{i}", "request": {}, "response": {}})
+        assert flush(timeout=5.0) is True
+
+    assert len(captured) == 3
+    assert len(_CaptureHandler.peers) == 3
+    assert len(set(_CaptureHandler.peers)) == 1
+
+
+def test_reconnects_when_server_closes_connection(capture_server):
+    url, captured = capture_server
+    # HTTP/1.0 handlers close the connection after every response
+    _CaptureHandler.protocol_version = "HTTP/1.0"
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+    reconnects_before = reconnect_count()
+
+    for i in range(3):
+        send({"id": f"reconnect-{i}", "request": {}, "response": {}})
+        assert flush(timeout=5.0) is True
+
+    assert [p["id"] for p in captured] == [f"reconnect-{i}" for i in range(3)]
+    assert len(set(_CaptureHandler.peers)) == 3
+    assert reconnect_count() - reconnects_before == 2
+
+
+def test_keep_alive_connection_is_not_counted_as_reconnect(capture_server):
+    url, _captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+    send({"id": "warmup", "request": {}, "response": {}})
+    flush(timeout=5.0)
+    reconnects_before = reconnect_count()
+
+    for i in range(3):
+        send({"id": f"warm-{i}", "request": {}, "response": {}})
+        assert flush(timeout=5.0) is True
+
+    assert reconnect_count() == reconnects_before
+
+
+def test_server_url_path_prefix_is_kept(capture_server):
+    url, captured = capture_server
+    start_worker(f"{url}/smello", SmelloConfig(batch_linger_ms=0))
+
+    send({"id": "prefixed", "request": {}, "response": {}})
+    flush(timeout=5.0)
+
+    assert _CaptureHandler.paths[-1] == "/smello/api/capture/batch"
+
+
+# ---------------------------------------------------------------------------
+# Compression
+# ---------------------------------------------------------------------------
+
+
+def test_large_bodies_are_gzip_compressed(capture_server):
+    url, captured = capture_server
+    start_worker(
+        url,
+        SmelloConfig(batch_linger_ms=0, compression="gzip", compress_min_bytes=100),
+    )
+
+    send({"id": "big", "request": {}, "response": {"body": "x" * 1000}})
+    assert flush(timeout=5.0) is True
+
+    assert _CaptureHandler.encodings == ["gzip"]
+    assert captured[0]["response"]["body"] == "x" * 1000
+
+
+def test_small_bodies_are_sent_uncompressed(capture_server):
+    url, captured = capture_server
+    start_worker(
+        url,
+        SmelloConfig(batch_linger_ms=0, compression="gzip", compress_min_bytes=10_000),
+    )
+
+    send({"id": "small", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    assert _CaptureHandler.encodings == [None]
+    assert captured[0]["id"] == "small"
+
+
+def test_compression_is_off_by_default(capture_server):
+    url, _captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0, compress_min_bytes=0))
+
+    send({"id": "plain", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    assert _CaptureHandler.encodings == [None]
+
+
+# ---------------------------------------------------------------------------
+# Queue overflow policies
+# ---------------------------------------------------------------------------
+
+
+def _payload(capture_id: str, body_bytes: int = 0) -> dict:
+    return {"id": capture_id, "request": {"body": "x" * body_bytes}, "response": {}}
+
+
+@pytest.fixture()
+def small_queue(capture_server, monkeypatch):
+    """Replace the queue with one the worker doesn't drain."""
+    start_worker(capture_server[0])
+    q = CaptureQueue(maxsize=2, max_bytes=4096)
+    monkeypatch.setattr(transport, "_queue", q)
+    for counter in (*transport._dropped.values(), transport._spilled):
+        counter[:] = [0, 0]
+    return q
+
+
+def _ids(q: CaptureQueue) -> list[str]:
+    return [item["id"] for item, _ in q.queue]
+
+
+def test_drop_newest(small_queue):
+    for i in range(3):
+        send(_payload(f"c{i}"))
+
+    assert _ids(small_queue) == ["c0", "c1"]
+    dropped = queue_stats()["dropped"]["drop_newest"]
+    assert dropped["items"] == 1
+    assert dropped["bytes"] == transport.payload_size(_payload("c2"))
+
+
+def test_queue_is_bounded_by_bytes(small_queue):
+    send(_payload("big", body_bytes=3000))
+    send(_payload("also-big", body_bytes=3000))
+
+    assert _ids(small_queue) == ["big"]
+    assert queue_stats()["queued_bytes"] == transport.payload_size(
+        _payload("big", 3000)
+    )
+
+
+def test_drop_oldest(small_queue, monkeypatch):
+    monkeypatch.setattr(transport, "_overflow", "drop_oldest")
+    for i in range(4):
+        send(_payload(f"c{i}"))
+
+    assert _ids(small_queue) == ["c2", "c3"]
+    assert queue_stats()["dropped"]["drop_oldest"]["items"] == 2
+    assert small_queue.unfinished_tasks == 2
+
+
+def test_drop_oldest_makes_room_by_bytes(small_queue, monkeypatch):
+    monkeypatch.setattr(transport, "_overflow", "drop_oldest")
+    send(_payload("small"))
+    send(_payload("big", body_bytes=3500))
+
+    assert _ids(small_queue) == ["big"]
+
+
+def test_block_waits_for_room(small_queue, monkeypatch):
+    monkeypatch.setattr(transport, "_overflow", "block")
+    monkeypatch.setattr(transport, "_block_timeout", 5)
+    send(_payload("c0"))
+    send(_payload("c1"))
+
+    threading.Timer(0.05, small_queue.get).start()
+    send(_payload("c2"))
+    assert _ids(small_queue) == ["c1", "c2"]
+
+
+def test_block_drops_after_timeout(small_queue, monkeypatch):
+    monkeypatch.setattr(transport, "_overflow", "block")
+    monkeypatch.setattr(transport, "_block_timeout", 0.01)
+    for i in range(3):
+        send(_payload(f"c{i}"))
+
+    assert queue_stats()["dropped"]["block"]["items"] == 1
+
+
+def test_spill_without_spool_falls_back(capture_server):
+    start_worker(capture_server[0], SmelloConfig(queue_overflow="spill"))
+    assert transport._overflow == "drop_newest"
+
+
+def test_queue_limits_from_config(capture_server):
+    start_worker(
+        capture_server[0],
+        SmelloConfig(queue_max_items=5, queue_max_bytes=1234, queue_overflow="block"),
+    )
+    stats = queue_stats()
+    assert stats["max_items"] == 5
+    assert stats["max_bytes"] == 1234
+    assert stats["policy"] == "block"
+
+
+# ---------------------------------------------------------------------------
+# Self-metrics and heartbeats
+# ---------------------------------------------------------------------------
+
+
+def test_stats_count_sent_captures(capture_server):
+    url, _captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+    before = stats()
+
+    send({"id": "counted", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    after = stats()
+    assert after["captures_enqueued"] == before["captures_enqueued"] + 1
+    assert after["captures_sent"] == before["captures_sent"] + 1
+    assert after["bytes_sent"] > before["bytes_sent"]
+    assert after["send_latency"]["count"] > before["send_latency"]["count"]
+    assert after["queue"]["high_water_items"] >= 1
+    assert "reconnects" in after
+
+
+def test_stats_count_failed_sends(capture_server):
+    url, _captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+    _CaptureHandler.batch_errors = 3  # every attempt fails
+    before = stats()
+
+    send({"id": "lost", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    after = stats()
+    assert after["captures_failed"] == before["captures_failed"] + 1
+    assert after["send_errors"] == before["send_errors"] + 3
+
+
+def test_heartbeat_is_sent_periodically(capture_server, monkeypatch):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(heartbeat_interval_s=0.05))
+    # Wakes the worker up if it waits for the previous heartbeat time
+    send({"id": "wake-up", "request": {}, "response": {}})
+
+    deadline = time.monotonic() + 5
+    while "/api/heartbeat" not in _CaptureHandler.paths:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    start_worker(url)  # back to the default interval
+
+    heartbeat = next(p for p in captured if "instance_id" in p)
+    assert heartbeat["instance_id"] == transport._instance_id
+    assert heartbeat["pid"] == os.getpid()
+    assert "captures_enqueued" in heartbeat["stats"]
+    assert "queue" in heartbeat["stats"]
+
+
+def test_heartbeats_stop_when_server_lacks_endpoint(capture_server, monkeypatch):
+    url, _captured = capture_server
+    monkeypatch.setattr(transport, "_heartbeat_supported", True)
+    monkeypatch.setattr(transport, "_heartbeat_interval", 0.01)
+    monkeypatch.setattr(transport, "_next_heartbeat", 0.0)
+    monkeypatch.setattr(
+        transport, "_post", _raise(transport._ServerHTTPError(404, "Not Found"))
+    )
+
+    transport._maybe_send_heartbeat()
+
+    assert transport._heartbeat_supported is False
+
+
+def _raise(err):
+    def post(path, body):
+        raise err
+
+    return post
+
+
+def test_collector_forwards_client_heartbeats(capture_server, monkeypatch):
+    url, _captured = capture_server
+    posted = []
+    monkeypatch.setattr(transport, "_post", lambda path, body: posted.append(body))
+    monkeypatch.setattr(transport, "_heartbeat_supported", True)
+    monkeypatch.setattr(transport, "_next_heartbeat", 0.0)
+    monkeypatch.setattr(transport, "_peer_heartbeats", {})
+
+    transport._forward_heartbeat({"instance_id": "peer", "stats": {}})
+    transport._maybe_send_heartbeat()
+
+    assert [h["instance_id"] for h in posted] == [transport._instance_id, "peer"]
+    assert transport._peer_heartbeats == {}
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+
+def test_breaker_opens_and_drops_without_network(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0, breaker_threshold=2))
+    _CaptureHandler.batch_errors = 100  # the server is down
+
+    send({"id": "first", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+    assert transport._breaker.state == "open"
+    requests_made = len(_CaptureHandler.paths)
+
+    started = time.monotonic()
+    for i in range(20):
+        send({"id": f"skipped-{i}", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    assert time.monotonic() - started < 0.5
+    assert len(_CaptureHandler.paths) == requests_made
+    assert captured == []
+    after = stats()
+    assert after["breaker"]["state"] == "open"
+    assert after["breaker"]["opened"] == 1
+    assert after["captures_short_circuited"] >= 20
+
+
+def test_breaker_spills_to_spool_while_open(capture_server, tmp_path):
+    url, _captured = capture_server
+    start_worker(
+        url,
+        SmelloConfig(batch_linger_ms=0, breaker_threshold=1, spool_dir=str(tmp_path)),
+    )
+    assert transport._breaker_policy == "spill"
+    transport._breaker.failure()
+
+    send({"id": "spilled", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    payloads, _ = transport._spool.read(10)
+    assert [p["id"] for p in payloads] == ["spilled"]
+
+
+def test_breaker_closes_after_successful_probe(capture_server, monkeypatch):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0, breaker_threshold=1))
+    monkeypatch.setattr(transport._breaker, "base_delay", 0.05)
+    transport._breaker.failure()
+    assert transport._breaker.state == "open"
+
+    time.sleep(0.1)
+    send({"id": "probe", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    assert [p["id"] for p in captured] == ["probe"]
+    assert transport._breaker.state == "closed"
+
+
+def test_client_errors_do_not_open_the_breaker(capture_server):
+    transport._breaker.threshold = 1
+
+    transport._record_error(transport._ServerHTTPError(413, "Too Large"))
+    assert transport._breaker.state == "closed"
+
+    transport._record_error(ConnectionRefusedError())
+    assert transport._breaker.state == "open"
+
+
+def test_open_breaker_policy_needs_spool():
+    assert transport._open_policy(SmelloConfig(breaker_open_policy="spill"), None) == (
+        "drop"
+    )
+    assert transport._open_policy(SmelloConfig(breaker_open_policy="bogus"), None) == (
+        "drop"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Spool
+# ---------------------------------------------------------------------------
+
+
+def test_queue_overflow_goes_to_spool(capture_server, tmp_path, monkeypatch):
+    url, _captured = capture_server
+    start_worker(url, SmelloConfig(spool_dir=str(tmp_path)))
+    assert transport._overflow == "spill"
+    # Swapping the queue would hand the running worker foreign items
+    monkeypatch.setattr(transport._queue, "_has_room", lambda size: False)
+
+    send({"id": "overflow", "request": {}, "response": {}})
+
+    payloads, _ = transport._spool.read(10)
+    assert [p["id"] for p in payloads] == ["overflow"]
+    assert queue_stats()["spilled"]["items"] >= 1
+
+
+def test_spool_is_replayed_when_server_is_reachable(capture_server, tmp_path):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0, spool_dir=str(tmp_path)))
+    for i in range(3):
+        transport._spool.append({"id": f"spooled-{i}", "request": {}, "response": {}})
+
+    # A live capture wakes up the worker, which then drains the spool
+    send({"id": "live", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    deadline = time.monotonic() + 5
+    while len(captured) < 4 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert [p["id"] for p in captured] == [
+        "live",
+        "spooled-0",
+        "spooled-1",
+        "spooled-2",
+    ]
+    assert transport._spool.pending() is False
+
+
+def test_undeliverable_batch_moves_to_spool(capture_server, tmp_path):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0, spool_dir=str(tmp_path)))
+    _CaptureHandler.batch_errors = 3  # every attempt fails
+
+    send({"id": "stubborn", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    # Once the server recovers, the spooled capture is replayed
+    send({"id": "wake-up", "request": {}, "response": {}})
+    deadline = time.monotonic() + 5
+    while "stubborn" not in [p["id"] for p in captured]:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_removed_spool_directory_does_not_stop_delivery(capture_server, tmp_path):
+    url, captured = capture_server
+    spool_dir = tmp_path / "spool"
+    start_worker(url, SmelloConfig(batch_linger_ms=0, spool_dir=str(spool_dir)))
+    shutil.rmtree(spool_dir)
+    _CaptureHandler.batch_errors = 3  # every attempt fails
+
+    send({"id": "lost", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    send({"id": "later", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+    assert [p["id"] for p in captured] == ["later"]
+    assert stats()["captures_failed"] >= 1
+
+
+def test_spool_held_by_another_process_is_not_shared(capture_server, tmp_path, caplog):
+    url, _captured = capture_server
+    held = Spool(tmp_path, max_bytes=1 << 20)  # as another worker would
+    try:
+        start_worker(url, SmelloConfig(spool_dir=str(tmp_path)))
+    finally:
+        held.close()
+
+    assert transport._spool is None
+    assert transport._overflow == "drop_newest"
+    assert "in use by another process" in caplog.text
+
+
+# ---------------------------------------------------------------------------
+# Fork safety and the per-host collector
+# ---------------------------------------------------------------------------
+
+
+def _run_in_child(func):
+    """Fork, run *func* in the child and return the child's exit status."""
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child
+        try:
+            code = 0 if func() else 1
+        except BaseException:
+            code = 2
+        os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def test_after_fork_resets_worker_state(capture_server, monkeypatch):
+    url, _captured = capture_server
+    start_worker(url)
+    monkeypatch.setattr(transport, "_queue", transport._queue)
+    monkeypatch.setattr(transport, "_start_lock", transport._start_lock)
+    monkeypatch.setattr(transport, "_started", True)
+    monkeypatch.setattr(transport, "_connection", None)
+    parent_queue = transport._queue
+
+    transport._after_fork_in_child()
+
+    assert transport._queue is not parent_queue
+    assert transport._started is False
+    assert transport._connection is None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_forked_child_delivers_its_own_captures(capture_server):
+    url, captured = capture_server
+    config = SmelloConfig(batch_linger_ms=0, rate_limit_per_host=100)
+    start_worker(url, config)
+    send({"id": "parent", "request": {}, "response": {}})
+    assert flush(timeout=5.0) is True
+
+    def child():
+        # The parent's lock is still held in the child unless it was replaced
+        if not config.sampler._lock.acquire(timeout=5):
+            return False
+        config.sampler._lock.release()
+        assert config.sampler.keep("a.com", True, 200, 0.1) == 1.0
+        send({"id": "child", "request": {}, "response": {}})
+        return flush(timeout=5.0)
+
+    # Fork while another thread is inside the rate limiter
+    with config.sampler._lock:
+        status = _run_in_child(child)
+    assert status == 0
+    assert [p["id"] for p in captured] == ["parent", "child"]
+
+
+def test_send_restarts_worker_when_pid_changed(capture_server, monkeypatch):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+    # Simulate a fork that skipped the at-fork handlers
+    monkeypatch.setattr(transport, "_worker_pid", -1)
+    monkeypatch.setattr(transport, "_queue", transport._queue)
+    monkeypatch.setattr(transport, "_start_lock", transport._start_lock)
+
+    send({"id": "after-fork", "request": {}, "response": {}})
+
+    assert transport._worker_pid == os.getpid()
+    assert flush(timeout=5.0) is True
+    assert [p["id"] for p in captured] == ["after-fork"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_forked_child_sends_through_collector(capture_server, tmp_path):
+    url, captured = capture_server
+    path = str(tmp_path / "collector.sock")
+    start_worker(url, SmelloConfig(batch_linger_ms=0, collector_socket=path))
+    assert transport._collector is not None
+
+    def child():
+        send({"id": "via-collector", "request": {}, "response": {}})
+        return flush(timeout=5.0) and transport._connection_target() == path
+
+    assert _run_in_child(child) == 0
+    # The collector (this process) forwards the child's capture
+    assert flush(timeout=5.0) is True
+    deadline = time.monotonic() + 5
+    while not captured:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert [p["id"] for p in captured] == ["via-collector"]
+
+
+def test_collector_election_keeps_a_live_collector(capture_server, tmp_path):
+    url, _captured = capture_server
+    path = str(tmp_path / "collector.sock")
+    start_worker(url, SmelloConfig(collector_socket=path))
+    live = transport._collector
+
+    with transport._start_lock:
+        transport._elect_collector()
+
+    assert transport._collector is live
+
+
+def test_reelection_after_lost_collector_holds_start_lock(tmp_path, monkeypatch):
+    locked = []
+
+    def serve(*args):
+        locked.append(transport._start_lock.locked())
+        return None  # another process won
+
+    monkeypatch.setattr(transport, "serve", serve)
+    monkeypatch.setattr(transport, "_collector_path", str(tmp_path / "gone.sock"))
+    monkeypatch.setattr(transport, "_connection", None)
+
+    with pytest.raises(OSError):
+        transport._get_connection()
+
+    assert locked == [True]
+
+
 # ---------------------------------------------------------------------------
 # _json_default() — fallback serializer
 # ---------------------------------------------------------------------------
@@ -133,3 +888,55 @@ def test_send_delivers_payload_with_bytes(capture_server):
 
     assert len(captured) == 1
     assert captured[0]["id"] == "bytes-test"
+
+
+# ---------------------------------------------------------------------------
+# Capture records — serialized on the worker
+# ---------------------------------------------------------------------------
+
+
+def _capture(**overrides):
+    fields = dict(
+        config=SmelloConfig(),
+        method="GET",
+        url="https://example.com/",
+        request_headers={},
+        request_body=None,
+        status_code=200,
+        response_headers={},
+        response_body=b"hello",
+        duration_s=0.01,
+        library="requests",
+    )
+    fields.update(overrides)
+    return Capture(**fields)
+
+
+def test_send_serializes_capture_on_worker(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+    callers = []
+
+    def render():
+        callers.append(threading.current_thread().name)
+        return "rendered"
+
+    send(_capture(response_body=render))
+
+    assert flush(timeout=5.0) is True
+    assert captured[0]["response"]["body"] == "rendered"
+    assert callers == ["smello-transport"]
+
+
+def test_unserializable_capture_is_skipped(capture_server):
+    url, captured = capture_server
+    start_worker(url, SmelloConfig(batch_linger_ms=0))
+
+    def broken():
+        raise RuntimeError("boom")
+
+    send(_capture(response_body=broken))
+    send(_capture(url="https://example.com/ok"))
+
+    assert flush(timeout=5.0) is True
+    assert [p["request"]["url"] for p in captured] == ["https://example.com/ok"]
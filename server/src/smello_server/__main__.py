@@ -5,7 +5,14 @@ import os
 
 import uvicorn
 
-from smello_server.app import create_app
+from smello_server.app import DEFAULT_MAX_REQUEST_BYTES, create_app
+from smello_server.database import SqliteSettings
+from smello_server.ingest import (
+    DEFAULT_BUFFER_SIZE,
+    DEFAULT_FLUSH_INTERVAL_MS,
+    DEFAULT_FLUSH_ROWS,
+)
+from smello_server.search import DEFAULT_MAX_BODY_CHARS
 
 
 def main():
@@ -24,20 +31,114 @@ def main():
     run_parser.add_argument(
         "--db-path", default=None, help="Path to SQLite database file"
     )
+    run_parser.add_argument(
+        "--max-request-bytes",
+        type=int,
+        default=DEFAULT_MAX_REQUEST_BYTES,
+        help="Largest accepted request body after decompression (default: 64 MiB)",
+    )
+    run_parser.add_argument(
+        "--buffer-ingest",
+        action="store_true",
+        help="Acknowledge captures with 202 and write them in groups",
+    )
+    run_parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=DEFAULT_BUFFER_SIZE,
+        help=f"Captures held before ingest answers 503 (default: {DEFAULT_BUFFER_SIZE})",
+    )
+    run_parser.add_argument(
+        "--flush-interval-ms",
+        type=int,
+        default=DEFAULT_FLUSH_INTERVAL_MS,
+        help=f"Longest a buffered capture waits (default: {DEFAULT_FLUSH_INTERVAL_MS})",
+    )
+    run_parser.add_argument(
+        "--flush-rows",
+        type=int,
+        default=DEFAULT_FLUSH_ROWS,
+        help=f"Captures per commit (default: {DEFAULT_FLUSH_ROWS})",
+    )
+
+    run_parser.add_argument(
+        "--search-max-body-chars",
+        type=int,
+        default=DEFAULT_MAX_BODY_CHARS,
+        help="Characters of each body the full-text search covers "
+        "(default: 0, the whole body)",
+    )
+
+    sqlite_defaults = SqliteSettings()
+    run_parser.add_argument(
+        "--db-readers",
+        type=int,
+        default=sqlite_defaults.readers,
+        help="Read-only connections for the dashboard and API queries "
+        f"(default: {sqlite_defaults.readers}; 0 reads through the writer)",
+    )
+    run_parser.add_argument(
+        "--sqlite-journal-mode",
+        type=str.upper,
+        choices=["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"],
+        default=sqlite_defaults.journal_mode,
+        help=f"SQLite journal_mode (default: {sqlite_defaults.journal_mode})",
+    )
+    run_parser.add_argument(
+        "--sqlite-synchronous",
+        type=str.upper,
+        choices=["OFF", "NORMAL", "FULL", "EXTRA"],
+        default=sqlite_defaults.synchronous,
+        help=f"SQLite synchronous (default: {sqlite_defaults.synchronous})",
+    )
+    run_parser.add_argument(
+        "--sqlite-cache-mb",
+        type=int,
+        default=sqlite_defaults.cache_size_mb,
+        help="Page cache per connection, in MiB "
+        f"(default: {sqlite_defaults.cache_size_mb})",
+    )
+    run_parser.add_argument(
+        "--sqlite-mmap-mb",
+        type=int,
+        default=sqlite_defaults.mmap_size_mb,
+        help="Memory-mapped I/O size, in MiB; 0 disables it "
+        f"(default: {sqlite_defaults.mmap_size_mb})",
+    )
+    run_parser.add_argument(
+        "--sqlite-temp-store",
+        type=str.upper,
+        choices=["DEFAULT", "FILE", "MEMORY"],
+        default=sqlite_defaults.temp_store,
+        help=f"SQLite temp_store (default: {sqlite_defaults.temp_store})",
+    )
 
     args = parser.parse_args()
 
     if args.command is None:
+        args = run_parser.parse_args([], namespace=args)
         args.command = "run"
-        args.host = "0.0.0.0"
-        args.port = 5110
-        args.db_path = None
 
     if args.command == "run":
         if args.db_path:
             os.environ["SMELLO_DB_PATH"] = args.db_path
 
-        app = create_app()
+        app = create_app(
+            max_request_bytes=args.max_request_bytes,
+            buffer_ingest=args.buffer_ingest,
+            buffer_size=args.buffer_size,
+            flush_interval_ms=args.flush_interval_ms,
+            flush_rows=args.flush_rows,
+            sqlite=SqliteSettings(
+                journal_mode=args.sqlite_journal_mode,
+                synchronous=args.sqlite_synchronous,
+                cache_size_mb=args.sqlite_cache_mb,
+                mmap_size_mb=args.sqlite_mmap_mb,
+                temp_store=args.sqlite_temp_store,
+                readers=args.db_readers,
+            ),
+            search_max_body_chars=args.search_max_body_chars,
+        )
         uvicorn.run(
             app,
             host=args.host,
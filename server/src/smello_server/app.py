@@ -1,18 +1,110 @@
 """FastAPI application setup with Tortoise ORM."""
 
 import os
+import zlib
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from tortoise.contrib.fastapi import register_tortoise
 
+from smello_server.database import SqliteSettings, tortoise_config
+from smello_server.ingest import (
+    DEFAULT_BUFFER_SIZE,
+    DEFAULT_FLUSH_INTERVAL_MS,
+    DEFAULT_FLUSH_ROWS,
+    IngestBuffer,
+)
 from smello_server.routes.api import router as api_router
 from smello_server.routes.web import router as web_router
+from smello_server.schema import MigrationOptions, migrate
+from smello_server.search import DEFAULT_MAX_BODY_CHARS, install_trigger
 
 PACKAGE_DIR = Path(__file__).parent
 STATIC_DIR = PACKAGE_DIR / "static"
 
+# Upper bound for a decompressed request body.
+DEFAULT_MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+
+class RequestDecompressionMiddleware:
+    """Decompress request bodies sent with ``Content-Encoding: gzip`` or ``zstd``.
+
+    Bodies are decompressed chunk by chunk as the app reads them, and a
+    body that inflates beyond *max_bytes* is rejected with 413 without
+    being held in memory.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int = DEFAULT_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = headers.get(b"content-encoding", b"").decode("latin-1").lower()
+        if encoding in ("", "identity"):
+            await self.app(scope, receive, send)
+            return
+
+        decompressor = _make_decompressor(encoding)
+        if decompressor is None:
+            response = JSONResponse(
+                {"detail": f"Unsupported Content-Encoding: {encoding}"},
+                status_code=415,
+            )
+            await response(scope, receive, send)
+            return
+
+        # The body the app sees is no longer encoded and has a new length.
+        scope = dict(scope)
+        scope["headers"] = [
+            (k, v)
+            for k, v in scope["headers"]
+            if k not in (b"content-encoding", b"content-length")
+        ]
+        total = 0
+
+        async def receive_decompressed() -> Message:
+            nonlocal total
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                # Ask for one byte more than allowed to detect overflow.
+                body = decompressor.decompress(
+                    message.get("body", b""), self.max_bytes - total + 1
+                )
+            except Exception:
+                raise HTTPException(400, "Malformed compressed request body")
+            total += len(body)
+            if total > self.max_bytes:
+                raise HTTPException(413, "Request body too large")
+            if not message.get("more_body", False) and not decompressor.eof:
+                raise HTTPException(400, "Truncated compressed request body")
+            return {**message, "body": body}
+
+        await self.app(scope, receive_decompressed, send)
+
+
+def _make_decompressor(encoding: str):
+    if encoding == "gzip":
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if encoding == "zstd" and zstd is not None:
+        return zstd.ZstdDecompressor()
+    return None
+
 
 def _get_db_url() -> str:
     db_path = os.environ.get("SMELLO_DB_PATH")
@@ -24,9 +116,51 @@ def _get_db_url() -> str:
     return f"sqlite://{default_dir / 'smello.db'}"
 
 
-def create_app(db_url: str | None = None) -> FastAPI:
-    """Create and configure the FastAPI application."""
-    application = FastAPI(title="Smello")
+@asynccontextmanager
+async def _lifespan(application: FastAPI):
+    # Runs inside Tortoise's lifespan, after it was initialized and
+    # before the connections are closed.
+    max_body_chars = application.state.search_max_body_chars
+    await migrate(MigrationOptions(search_max_body_chars=max_body_chars))
+    await install_trigger(max_body_chars)
+    ingest: IngestBuffer | None = application.state.ingest
+    if ingest is not None:
+        ingest.start()
+    try:
+        yield
+    finally:
+        if ingest is not None:
+            await ingest.stop()
+
+
+def create_app(
+    db_url: str | None = None,
+    max_request_bytes: int = DEFAULT_MAX_REQUEST_BYTES,
+    buffer_ingest: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS,
+    flush_rows: int = DEFAULT_FLUSH_ROWS,
+    sqlite: SqliteSettings | None = None,
+    search_max_body_chars: int = DEFAULT_MAX_BODY_CHARS,
+) -> FastAPI:
+    """Create and configure the FastAPI application.
+
+    With *buffer_ingest*, captures are acknowledged with 202 and written
+    behind in groups (see :mod:`smello_server.ingest`).  *sqlite* sets
+    the pragmas and the number of reader connections (see
+    :mod:`smello_server.database`).  *search_max_body_chars* caps how
+    much of each body the full-text index covers (0 for all of it).
+    """
+    application = FastAPI(title="Smello", lifespan=_lifespan)
+    application.state.ingest = (
+        IngestBuffer(buffer_size, flush_interval_ms / 1000, flush_rows)
+        if buffer_ingest
+        else None
+    )
+    application.state.search_max_body_chars = search_max_body_chars
+    application.add_middleware(
+        RequestDecompressionMiddleware, max_bytes=max_request_bytes
+    )
 
     application.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
     application.include_router(api_router)
@@ -34,9 +168,9 @@ def create_app(db_url: str | None = None) -> FastAPI:
 
     register_tortoise(
         application,
-        db_url=db_url or _get_db_url(),
-        modules={"models": ["smello_server.models"]},
-        generate_schemas=True,
+        config=tortoise_config(db_url or _get_db_url(), sqlite or SqliteSettings()),
+        # The schema is managed by smello_server.schema migrations
+        generate_schemas=False,
         add_exception_handlers=True,
     )
 
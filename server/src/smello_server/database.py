@@ -0,0 +1,81 @@
+"""SQLite connection profile: pragmas and separate writer and reader connections.
+
+Tortoise runs every query of a connection through one aiosqlite thread
+behind a lock.  Writes go through the ``default`` connection; list and
+detail queries use a small pool of read-only connections, so with WAL
+they read the last committed state without queuing behind inserts.
+"""
+
+import itertools
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+DEFAULT_READERS = 2
+
+
+@dataclass(frozen=True)
+class SqliteSettings:
+    """Pragmas applied to every connection, and the number of readers."""
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    # Page cache per connection
+    cache_size_mb: int = 64
+    mmap_size_mb: int = 256
+    temp_store: str = "MEMORY"
+    readers: int = DEFAULT_READERS
+
+    def pragmas(self) -> dict:
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            # Negative sizes are in KiB
+            "cache_size": -self.cache_size_mb * 1024,
+            "mmap_size": self.mmap_size_mb * 1024 * 1024,
+            "temp_store": self.temp_store,
+        }
+
+
+# Names of the reader connections, in turn; set by tortoise_config
+_readers: Iterator[str] = iter(())
+
+
+def tortoise_config(db_url: str, settings: SqliteSettings) -> dict:
+    """Tortoise config for *db_url* with a writer and ``settings.readers`` readers."""
+    global _readers
+    file_path = db_url.removeprefix("sqlite://")
+    pragmas = settings.pragmas()
+    readers = settings.readers if file_path != ":memory:" else 0
+
+    config = {
+        "default": {
+            "engine": "tortoise.backends.sqlite",
+            "credentials": {"file_path": file_path, **pragmas},
+        }
+    }
+    for i in range(readers):
+        config[f"reader{i}"] = {
+            "engine": "tortoise.backends.sqlite",
+            "credentials": {"file_path": file_path, **pragmas, "query_only": "ON"},
+        }
+    _readers = itertools.cycle([name for name in config if name != "default"])
+    return {
+        "connections": config,
+        "apps": {
+            "models": {
+                "models": ["smello_server.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+
+
+def reader() -> BaseDBAsyncClient:
+    """A read-only connection for queries, taking the readers in turn.
+
+    Falls back to the writer when no readers are configured.
+    """
+    return connections.get(next(_readers, "default"))
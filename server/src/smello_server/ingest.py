@@ -0,0 +1,153 @@
+"""Write-behind buffer for captures.
+
+In buffered mode the capture endpoints validate a payload, add its row
+to an in-memory buffer and answer 202 right away.  A background task
+inserts buffered rows in one transaction whenever ``flush_rows`` rows
+are waiting or the oldest one has waited ``flush_interval_s``, so one
+commit (and one fsync) covers many captures.
+"""
+
+import asyncio
+import logging
+import time
+
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
+
+from smello_server.models import CapturedRequest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 10_000
+DEFAULT_FLUSH_INTERVAL_MS = 50
+DEFAULT_FLUSH_ROWS = 500
+
+
+class IngestBuffer:
+    """Bounded buffer of ``CapturedRequest`` rows, committed in groups."""
+
+    def __init__(
+        self,
+        max_rows: int = DEFAULT_BUFFER_SIZE,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_MS / 1000,
+        flush_rows: int = DEFAULT_FLUSH_ROWS,
+    ):
+        self.max_rows = max_rows
+        self.flush_interval_s = flush_interval_s
+        self.flush_rows = flush_rows
+        self._rows: list[dict] = []
+        self._first_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        # Counters reported by stats()
+        self.committed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._rows)
+
+    def put(self, fields: dict) -> bool:
+        """Buffer one row; returns False if the buffer is full or closed."""
+        if self._closed or len(self._rows) >= self.max_rows:
+            self.rejected += 1
+            return False
+        if not self._rows:
+            self._first_at = time.monotonic()
+            self._wakeup.set()
+        # Stored as received, not as committed
+        self._rows.append({**fields, "timestamp": timezone.now()})
+        if len(self._rows) >= self.flush_rows:
+            self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting rows and commit the ones still buffered.
+
+        A flush in progress is allowed to finish rather than cancelled, so
+        its rows are neither rolled back nor lost.
+        """
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        while self._rows:
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "mode": "buffered",
+            "depth": self.depth,
+            "capacity": self.max_rows,
+            "committed": self.committed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+    async def _run(self) -> None:
+        while not self._closed:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                break  # stop() commits what is left
+            if not self._rows:
+                continue
+            wait = self._first_at + self.flush_interval_s - time.monotonic()
+            if len(self._rows) < self.flush_rows and wait > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to commit buffered captures")
+            if self._rows:
+                self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Commit up to ``flush_rows`` buffered rows in one transaction."""
+        rows = self._rows[: self.flush_rows]
+        del self._rows[: len(rows)]
+        if self._rows:
+            self._first_at = time.monotonic()
+        if not rows:
+            return
+        start = time.monotonic()
+        try:
+            async with in_transaction("default"):
+                await CapturedRequest.bulk_create(
+                    [CapturedRequest(**fields) for fields in rows]
+                )
+        except IntegrityError:
+            # A duplicate id fails the whole insert; store the rest one by one.
+            await self._insert_each(rows)
+        except Exception:
+            self.failed += len(rows)
+            raise
+        else:
+            self.committed += len(rows)
+        self.flushes += 1
+        self.last_flush_ms = round((time.monotonic() - start) * 1000, 3)
+
+    async def _insert_each(self, rows: list[dict]) -> None:
+        for fields in rows:
+            try:
+                await CapturedRequest.create(**fields)
+            except IntegrityError as err:
+                self.failed += 1
+                logger.warning("Dropped buffered capture %s: %s", fields["id"], err)
+            else:
+                self.committed += 1
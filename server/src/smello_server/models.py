@@ -1,10 +1,16 @@
-"""Tortoise ORM models for captured HTTP requests."""
+"""Tortoise ORM models for captured HTTP requests and client heartbeats."""
 
 from tortoise import fields
 from tortoise.models import Model
 
 
 class CapturedRequest(Model):
+    """One captured call.
+
+    Tables and indexes are created by the migrations in
+    :mod:`smello_server.schema`, not from these models.
+    """
+
     id = fields.UUIDField(pk=True)
     timestamp = fields.DatetimeField(auto_now_add=True)
     duration_ms = fields.IntField()
@@ -15,17 +21,53 @@ class CapturedRequest(Model):
     request_headers: dict = fields.JSONField()
     request_body = fields.TextField(null=True)
     request_body_size = fields.IntField(default=0)
+    # The client stored only the head of the body (or none of it)
+    request_body_truncated = fields.BooleanField(default=False)
 
     # Response
     status_code = fields.IntField()
     response_headers: dict = fields.JSONField()
     response_body = fields.TextField(null=True)
     response_body_size = fields.IntField(default=0)
+    response_body_truncated = fields.BooleanField(default=False)
 
     # Meta
-    host = fields.CharField(max_length=255, index=True)
+    host = fields.CharField(max_length=255)
     library = fields.CharField(max_length=50)
+    # Probability that the client captured a call like this one
+    sample_rate = fields.FloatField(default=1.0)
+
+    # Phase timings; null when the client library doesn't expose a phase
+    pool_wait_ms = fields.FloatField(null=True)
+    dns_ms = fields.FloatField(null=True)
+    connect_ms = fields.FloatField(null=True)
+    tls_ms = fields.FloatField(null=True)
+    ttfb_ms = fields.FloatField(null=True)
+    download_ms = fields.FloatField(null=True)
+    connection_reused = fields.BooleanField(null=True)
+    # The session/client object that made the call, and its pool size
+    client_id = fields.CharField(max_length=64, null=True)
+    pool_size = fields.IntField(null=True)
 
     class Meta:
         table = "captured_requests"
-        ordering = ["-timestamp"]
+        # id breaks ties, so list cursors see every row exactly once
+        ordering = ["-timestamp", "-id"]
+
+
+class ClientHeartbeat(Model):
+    """The latest heartbeat of one instrumented process."""
+
+    instance_id = fields.CharField(max_length=64, pk=True)
+    hostname = fields.CharField(max_length=255)
+    pid = fields.IntField()
+    smello_version = fields.CharField(max_length=50)
+    python_version = fields.CharField(max_length=50)
+    started_at = fields.DatetimeField(null=True)
+    last_seen = fields.DatetimeField(auto_now=True, index=True)
+    # The client's smello.stats() at the time of the heartbeat
+    stats: dict = fields.JSONField()
+
+    class Meta:
+        table = "client_heartbeats"
+        ordering = ["-last_seen"]
@@ -1,16 +1,38 @@
 """API routes: ingestion endpoint and JSON API."""
 
+import base64
+import json
 import uuid
 from datetime import datetime
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field, ValidationError
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Q
+from tortoise.functions import Avg, Count, Max
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
 
-from smello_server.models import CapturedRequest
+from smello_server.database import reader
+from smello_server.ingest import IngestBuffer
+from smello_server.models import CapturedRequest, ClientHeartbeat
+from smello_server.search import clear_index, search_requests
 
 router = APIRouter(prefix="/api")
 
+# Upper bound on captures per batch request, so one request can't hold
+# the write transaction open indefinitely.
+MAX_BATCH_SIZE = 1000
+
+# GET /api/hosts flags a host when, over at least MIN_FLAGGED_CALLS calls,
+# more than this share opened a new connection (a client created per
+# call, or a pool too small to keep connections) ...
+NEW_CONNECTION_RATIO_THRESHOLD = 0.5
+# ... or calls waited this long for a free pooled connection on average.
+POOL_WAIT_THRESHOLD_MS = 10.0
+MIN_FLAGGED_CALLS = 10
+
 
 # --- Input models ---
 
@@ -21,6 +43,7 @@ class RequestData(BaseModel):
     headers: dict[str, str]
     body: str | None = None
     body_size: int = 0
+    truncated: bool = False
 
 
 class ResponseData(BaseModel):
@@ -28,23 +51,54 @@ class ResponseData(BaseModel):
     headers: dict[str, str]
     body: str | None = None
     body_size: int = 0
+    truncated: bool = False
 
 
 class MetaData(BaseModel):
     library: str = "unknown"
     python_version: str = ""
     smello_version: str = ""
+    sample_rate: float = Field(1.0, gt=0, le=1)
+    client_id: str | None = Field(None, max_length=64)
+    pool_size: int | None = None
+
+
+class TimingsData(BaseModel):
+    pool_wait_ms: float | None = None
+    dns_ms: float | None = None
+    connect_ms: float | None = None
+    tls_ms: float | None = None
+    ttfb_ms: float | None = None
+    download_ms: float | None = None
+    connection_reused: bool | None = None
 
 
 class CapturePayload(BaseModel):
-    id: str | None = None
+    id: uuid.UUID | None = None
     timestamp: str | None = None
     duration_ms: int = 0
+    timings: TimingsData | None = None
     request: RequestData
     response: ResponseData
     meta: MetaData = MetaData()
 
 
+class BatchCapturePayload(BaseModel):
+    # Items are validated one by one so a single malformed capture
+    # doesn't reject the whole batch.
+    captures: list[dict] = Field(max_length=MAX_BATCH_SIZE)
+
+
+class HeartbeatPayload(BaseModel):
+    instance_id: str = Field(min_length=1, max_length=64)
+    hostname: str = Field("", max_length=255)
+    pid: int = 0
+    smello_version: str = Field("", max_length=50)
+    python_version: str = Field("", max_length=50)
+    started_at: datetime | None = None
+    stats: dict = {}
+
+
 # --- Output models ---
 
 
@@ -52,6 +106,29 @@ class CaptureResponse(BaseModel):
     status: str
 
 
+class BatchItemResult(BaseModel):
+    id: str | None
+    # "ok": stored (or buffered); "invalid": malformed or duplicate, don't
+    # retry; "error": not stored (the ingest buffer is full), retry later
+    status: str
+    error: str | None = None
+
+
+class BatchCaptureResponse(BaseModel):
+    results: list[BatchItemResult]
+
+
+class IngestStats(BaseModel):
+    mode: str  # "direct" or "buffered"
+    depth: int = 0
+    capacity: int = 0
+    committed: int = 0
+    rejected: int = 0
+    failed: int = 0
+    flushes: int = 0
+    last_flush_ms: float = 0.0
+
+
 class RequestSummary(BaseModel):
     id: str
     timestamp: datetime
@@ -60,26 +137,55 @@ class RequestSummary(BaseModel):
     host: str
     status_code: int
     duration_ms: int
+    sample_rate: float
 
 
 class RequestDetail(RequestSummary):
     library: str
+    timings: TimingsData | None
+    client_id: str | None
+    pool_size: int | None
     request_headers: dict[str, str]
     request_body: str | None
     request_body_size: int
+    request_body_truncated: bool
     response_headers: dict[str, str]
     response_body: str | None
     response_body_size: int
+    response_body_truncated: bool
+
+
+class HostSummary(BaseModel):
+    host: str
+    calls: int
+    new_connections: int
+    new_connection_ratio: float
+    clients: int
+    avg_pool_wait_ms: float | None
+    max_pool_wait_ms: float | None
+    flags: list[str]
+
+
+class ClientSummary(BaseModel):
+    instance_id: str
+    hostname: str
+    pid: int
+    smello_version: str
+    python_version: str
+    started_at: datetime | None
+    last_seen: datetime
+    stats: dict
 
 
 # --- Routes ---
 
 
-@router.post("/capture", status_code=201, response_model=CaptureResponse)
-async def capture(payload: CapturePayload) -> CaptureResponse:
+def _record_fields(payload: CapturePayload) -> dict:
+    """Map a capture payload to ``CapturedRequest`` fields."""
     host = urlparse(payload.request.url).hostname or "unknown"
+    timings = payload.timings.model_dump() if payload.timings else {}
 
-    await CapturedRequest.create(
+    return dict(
         id=payload.id or uuid.uuid4(),
         duration_ms=payload.duration_ms,
         method=payload.request.method.upper(),
@@ -87,25 +193,91 @@ async def capture(payload: CapturePayload) -> CaptureResponse:
         request_headers=payload.request.headers,
         request_body=payload.request.body,
         request_body_size=payload.request.body_size,
+        request_body_truncated=payload.request.truncated,
         status_code=payload.response.status_code,
         response_headers=payload.response.headers,
         response_body=payload.response.body,
         response_body_size=payload.response.body_size,
+        response_body_truncated=payload.response.truncated,
         host=host,
         library=payload.meta.library,
+        sample_rate=payload.meta.sample_rate,
+        client_id=payload.meta.client_id,
+        pool_size=payload.meta.pool_size,
+        **timings,
     )
+
+
+@router.post("/capture", status_code=201, response_model=CaptureResponse)
+async def capture(
+    payload: CapturePayload, request: Request, response: Response
+) -> CaptureResponse:
+    ingest = request.app.state.ingest
+    if ingest is None:
+        await CapturedRequest.create(**_record_fields(payload))
+        return CaptureResponse(status="ok")
+    if not ingest.put(_record_fields(payload)):
+        raise HTTPException(status_code=503, detail="Ingest buffer is full")
+    response.status_code = 202
     return CaptureResponse(status="ok")
 
 
-@router.get("/requests", response_model=list[RequestSummary])
-async def list_requests(
-    host: str | None = Query(None),
-    method: str | None = Query(None),
-    status: int | None = Query(None),
-    search: str | None = Query(None),
-    limit: int = Query(50, le=200),
-) -> list[RequestSummary]:
-    qs = CapturedRequest.all()
+@router.post("/capture/batch", response_model=BatchCaptureResponse)
+async def capture_batch(
+    batch: BatchCapturePayload, request: Request, response: Response
+) -> BatchCaptureResponse:
+    """Store several captures in one transaction.
+
+    Returns one result per item, in order, so the client can retry only
+    the items that failed.  Any database error other than a constraint
+    violation aborts the whole transaction, and the client retries the
+    batch.  In buffered mode valid items are buffered and the response
+    is 202; items that don't fit into the buffer get an ``error`` result.
+    """
+    ingest = request.app.state.ingest
+    if ingest is not None:
+        response.status_code = 202
+        return BatchCaptureResponse(
+            results=[_buffer_item(ingest, item) for item in batch.captures]
+        )
+
+    results = []
+    async with in_transaction("default"):
+        for item in batch.captures:
+            try:
+                payload = CapturePayload.model_validate(item)
+            except ValidationError as err:
+                item_id = item.get("id")
+                results.append(
+                    BatchItemResult(
+                        id=str(item_id) if item_id is not None else None,
+                        status="invalid",
+                        error=str(err),
+                    )
+                )
+                continue
+
+            fields = _record_fields(payload)
+            item_id = str(fields["id"])
+            try:
+                await CapturedRequest.create(**fields)
+            except IntegrityError as err:
+                results.append(
+                    BatchItemResult(id=item_id, status="invalid", error=str(err))
+                )
+            else:
+                results.append(BatchItemResult(id=item_id, status="ok"))
+    return BatchCaptureResponse(results=results)
+
+
+def filter_requests(
+    qs: QuerySet[CapturedRequest],
+    host: str | None = None,
+    method: str | None = None,
+    status: int | None = None,
+    search: str | None = None,
+) -> QuerySet[CapturedRequest]:
+    """Apply the list filters shared by the API and the dashboard."""
     if host:
         qs = qs.filter(host=host)
     if method:
@@ -114,8 +286,105 @@ async def list_requests(
         qs = qs.filter(status_code=status)
     if search:
         qs = qs.filter(url__icontains=search)
+    return qs
+
 
-    requests = await qs.limit(limit)
+def encode_cursor(r: CapturedRequest) -> str:
+    """An opaque cursor pointing past *r* in the newest-first list."""
+    key = json.dumps([r.timestamp.isoformat(), str(r.id)])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def after_cursor(
+    qs: QuerySet[CapturedRequest], cursor: str
+) -> QuerySet[CapturedRequest]:
+    """Keep the rows that come after *cursor* in ``(timestamp, id)`` order.
+
+    Raises 400 if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, request_id = json.loads(base64.urlsafe_b64decode(padded))
+        timestamp = datetime.fromisoformat(timestamp)
+        request_id = uuid.UUID(request_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # The range on timestamp lets SQLite seek in the index; the id
+    # comparison only filters rows that share the cursor's timestamp.
+    return qs.filter(timestamp__lte=timestamp).filter(
+        Q(timestamp__lt=timestamp) | Q(id__lt=request_id)
+    )
+
+
+async def paginate(
+    qs: QuerySet[CapturedRequest], cursor: str | None, limit: int
+) -> tuple[list[CapturedRequest], str | None]:
+    """One page of *qs* and the cursor of the next page (None on the last)."""
+    if cursor:
+        qs = after_cursor(qs, cursor)
+    rows = await qs.limit(limit + 1)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
+
+
+def _buffer_item(ingest: IngestBuffer, item: dict) -> BatchItemResult:
+    try:
+        payload = CapturePayload.model_validate(item)
+    except ValidationError as err:
+        item_id = item.get("id")
+        return BatchItemResult(
+            id=str(item_id) if item_id is not None else None,
+            status="invalid",
+            error=str(err),
+        )
+    fields = _record_fields(payload)
+    item_id = str(fields["id"])
+    if not ingest.put(fields):
+        return BatchItemResult(
+            id=item_id, status="error", error="Ingest buffer is full"
+        )
+    return BatchItemResult(id=item_id, status="ok")
+
+
+@router.get("/ingest", response_model=IngestStats)
+async def ingest_stats(request: Request) -> IngestStats:
+    """Depth and counters of the write-behind buffer."""
+    ingest = request.app.state.ingest
+    if ingest is None:
+        return IngestStats(mode="direct")
+    return IngestStats(**ingest.stats())
+
+
+@router.get("/requests", response_model=list[RequestSummary])
+async def list_requests(
+    response: Response,
+    host: str | None = Query(None),
+    method: str | None = Query(None),
+    status: int | None = Query(None),
+    search: str | None = Query(None),
+    q: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+) -> list[RequestSummary]:
+    """List captures, newest first, or best match first with ``q``.
+
+    ``search`` matches a substring of the URL; ``q`` runs a full-text
+    query over URLs, header values and bodies.  Without ``q``, the
+    ``X-Next-Cursor`` response header holds the ``cursor`` of the next
+    page; it is absent on the last page.
+    """
+    db = reader()
+    if q:
+        requests = await search_requests(q, host, method, status, search, limit, db=db)
+    else:
+        qs = filter_requests(
+            CapturedRequest.all(using_db=db), host, method, status, search
+        )
+        requests, next_cursor = await paginate(qs, cursor, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     return [
         RequestSummary(
             id=str(r.id),
@@ -125,6 +394,7 @@ async def list_requests(
             host=r.host,
             status_code=r.status_code,
             duration_ms=r.duration_ms,
+            sample_rate=r.sample_rate,
         )
         for r in requests
     ]
@@ -133,7 +403,7 @@ async def list_requests(
 @router.get("/requests/{request_id}", response_model=RequestDetail)
 async def get_request(request_id: str) -> RequestDetail:
     try:
-        r = await CapturedRequest.get(id=request_id)
+        r = await CapturedRequest.get(id=request_id, using_db=reader())
     except Exception:
         raise HTTPException(status_code=404, detail="Request not found")
 
@@ -145,16 +415,113 @@ async def get_request(request_id: str) -> RequestDetail:
         host=r.host,
         status_code=r.status_code,
         duration_ms=r.duration_ms,
+        sample_rate=r.sample_rate,
         library=r.library,
+        timings=_timings(r),
+        client_id=r.client_id,
+        pool_size=r.pool_size,
         request_headers=r.request_headers,
         request_body=r.request_body,
         request_body_size=r.request_body_size,
+        request_body_truncated=r.request_body_truncated,
         response_headers=r.response_headers,
         response_body=r.response_body,
         response_body_size=r.response_body_size,
+        response_body_truncated=r.response_body_truncated,
     )
 
 
+def _timings(r: CapturedRequest) -> TimingsData | None:
+    fields = {name: getattr(r, name) for name in TimingsData.model_fields}
+    if all(value is None for value in fields.values()):
+        return None
+    return TimingsData(**fields)
+
+
 @router.delete("/requests", status_code=204)
 async def clear_requests() -> None:
-    await CapturedRequest.all().delete()
+    async with in_transaction("default") as conn:
+        await CapturedRequest.all(using_db=conn).delete()
+        await clear_index(conn)
+
+
+@router.get("/hosts", response_model=list[HostSummary])
+async def list_hosts(limit: int = Query(50, le=200)) -> list[HostSummary]:
+    """Connection reuse and pool wait per host, flagged hosts first.
+
+    Only captures that report whether their connection was reused count.
+    """
+    db = reader()
+    rows = (
+        await CapturedRequest.filter(connection_reused__isnull=False)
+        .using_db(db)
+        .annotate(
+            calls=Count("id"),
+            clients=Count("client_id", distinct=True),
+            avg_pool_wait=Avg("pool_wait_ms"),
+            max_pool_wait=Max("pool_wait_ms"),
+        )
+        .group_by("host")
+        .values("host", "calls", "clients", "avg_pool_wait", "max_pool_wait")
+    )
+    new_counts = dict(
+        await CapturedRequest.filter(connection_reused=False)
+        .using_db(db)
+        .annotate(new=Count("id"))
+        .group_by("host")
+        .values_list("host", "new")
+    )
+    hosts = []
+    for row in rows:
+        new = new_counts.get(row["host"], 0)
+        ratio = new / row["calls"]
+        avg_wait = row["avg_pool_wait"]
+        flags = []
+        if row["calls"] >= MIN_FLAGGED_CALLS:
+            if ratio > NEW_CONNECTION_RATIO_THRESHOLD:
+                flags.append("new_connections")
+            if avg_wait is not None and avg_wait > POOL_WAIT_THRESHOLD_MS:
+                flags.append("pool_wait")
+        hosts.append(
+            HostSummary(
+                host=row["host"],
+                calls=row["calls"],
+                new_connections=new,
+                new_connection_ratio=round(ratio, 3),
+                clients=row["clients"],
+                avg_pool_wait_ms=avg_wait,
+                max_pool_wait_ms=row["max_pool_wait"],
+                flags=flags,
+            )
+        )
+    hosts.sort(key=lambda h: (not h.flags, -h.new_connection_ratio, h.host))
+    return hosts[:limit]
+
+
+@router.post("/heartbeat", status_code=202, response_model=CaptureResponse)
+async def heartbeat(payload: HeartbeatPayload) -> CaptureResponse:
+    """Record a client's self-metrics, replacing its previous heartbeat."""
+    await ClientHeartbeat.update_or_create(
+        instance_id=payload.instance_id,
+        defaults=payload.model_dump(exclude={"instance_id"}),
+    )
+    return CaptureResponse(status="ok")
+
+
+@router.get("/clients", response_model=list[ClientSummary])
+async def list_clients(limit: int = Query(50, le=200)) -> list[ClientSummary]:
+    """Return the latest heartbeat of each client, most recent first."""
+    clients = await ClientHeartbeat.all(using_db=reader()).limit(limit)
+    return [
+        ClientSummary(
+            instance_id=c.instance_id,
+            hostname=c.hostname,
+            pid=c.pid,
+            smello_version=c.smello_version,
+            python_version=c.python_version,
+            started_at=c.started_at,
+            last_seen=c.last_seen,
+            stats=c.stats,
+        )
+        for c in clients
+    ]
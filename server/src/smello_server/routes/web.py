@@ -1,18 +1,25 @@
 """Web UI routes: request list and detail pages."""
 
 from pathlib import Path
+from urllib.parse import urlencode
 
 from fastapi import APIRouter, Query, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
+from smello_server.database import reader
 from smello_server.models import CapturedRequest
+from smello_server.routes.api import filter_requests, paginate
+from smello_server.search import search_requests
 
 _TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
 templates = Jinja2Templates(directory=str(_TEMPLATES_DIR))
 
 router = APIRouter(include_in_schema=False)
 
+# Requests per page of the list; scrolling to the end loads the next one
+PAGE_SIZE = 100
+
 
 @router.get("/", response_class=HTMLResponse)
 async def request_list(
@@ -21,22 +28,40 @@ async def request_list(
     method: str | None = Query(None),
     status: int | None = Query(None),
     search: str | None = Query(None),
+    q: str | None = Query(None),
+    cursor: str | None = Query(None),
     _partial: str | None = Query(None),
 ):
-    qs = CapturedRequest.all()
-    if host:
-        qs = qs.filter(host=host)
-    if method:
-        qs = qs.filter(method=method.upper())
-    if status:
-        qs = qs.filter(status_code=status)
-    if search:
-        qs = qs.filter(url__icontains=search)
-
-    requests_list = await qs.limit(100)
-
-    hosts = await CapturedRequest.all().distinct().values_list("host", flat=True)
-    methods = await CapturedRequest.all().distinct().values_list("method", flat=True)
+    db = reader()
+    next_url = ""
+    if q:
+        requests_list = await search_requests(
+            q, host, method, status, search, PAGE_SIZE, db=db
+        )
+    else:
+        qs = filter_requests(
+            CapturedRequest.all(using_db=db), host, method, status, search
+        )
+        requests_list, next_cursor = await paginate(qs, cursor, PAGE_SIZE)
+        if next_cursor:
+            filters = {
+                "host": host,
+                "method": method,
+                "status": status,
+                "search": search,
+            }
+            params = {name: value for name, value in filters.items() if value}
+            params.update(cursor=next_cursor, _partial="list")
+            next_url = "/?" + urlencode(params)
+
+    hosts = (
+        await CapturedRequest.all(using_db=db).distinct().values_list("host", flat=True)
+    )
+    methods = (
+        await CapturedRequest.all(using_db=db)
+        .distinct()
+        .values_list("method", flat=True)
+    )
 
     context = {
         "request": request,
@@ -47,7 +72,9 @@ async def request_list(
         "filter_method": method or "",
         "filter_status": status or "",
         "filter_search": search or "",
+        "filter_q": q or "",
         "selected_id": "",
+        "next_url": next_url,
     }
 
     if _partial == "list":
@@ -58,7 +85,7 @@ async def request_list(
 
 @router.get("/requests/{request_id}", response_class=HTMLResponse)
 async def request_detail(request: Request, request_id: str):
-    captured = await CapturedRequest.get(id=request_id)
+    captured = await CapturedRequest.get(id=request_id, using_db=reader())
 
     return templates.TemplateResponse(
         "request_detail.html",
@@ -71,7 +98,7 @@ async def request_detail(request: Request, request_id: str):
 
 @router.get("/requests/{request_id}/partial", response_class=HTMLResponse)
 async def request_detail_partial(request: Request, request_id: str):
-    captured = await CapturedRequest.get(id=request_id)
+    captured = await CapturedRequest.get(id=request_id, using_db=reader())
 
     return templates.TemplateResponse(
         "partials/request_detail_partial.html",
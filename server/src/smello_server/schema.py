@@ -0,0 +1,207 @@
+"""Database schema migrations.
+
+The schema version is kept in SQLite's ``PRAGMA user_version``.  On
+startup :func:`migrate` applies the migrations the database hasn't seen
+yet, each in its own transaction, so ``~/.smello/smello.db`` files
+created by any earlier version are upgraded in place.
+
+To change the schema, append a migration to ``MIGRATIONS``; never edit
+one that was released.
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from smello_server.search import DEFAULT_MAX_BODY_CHARS, index_existing
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MigrationOptions:
+    """Server settings that decide how migrations treat existing rows."""
+
+    search_max_body_chars: int = DEFAULT_MAX_BODY_CHARS
+
+
+# The tables as generate_schemas created them before migrations existed
+_BASELINE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS "captured_requests" (
+        "id" CHAR(36) NOT NULL PRIMARY KEY,
+        "timestamp" TIMESTAMP NOT NULL,
+        "duration_ms" INT NOT NULL,
+        "method" VARCHAR(10) NOT NULL,
+        "url" TEXT NOT NULL,
+        "request_headers" JSON NOT NULL,
+        "request_body" TEXT,
+        "request_body_size" INT NOT NULL,
+        "request_body_truncated" INT NOT NULL,
+        "status_code" INT NOT NULL,
+        "response_headers" JSON NOT NULL,
+        "response_body" TEXT,
+        "response_body_size" INT NOT NULL,
+        "response_body_truncated" INT NOT NULL,
+        "host" VARCHAR(255) NOT NULL,
+        "library" VARCHAR(50) NOT NULL,
+        "sample_rate" REAL NOT NULL,
+        "pool_wait_ms" REAL,
+        "dns_ms" REAL,
+        "connect_ms" REAL,
+        "tls_ms" REAL,
+        "ttfb_ms" REAL,
+        "download_ms" REAL,
+        "connection_reused" INT,
+        "client_id" VARCHAR(64),
+        "pool_size" INT
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "idx_captured_re_host_6db6f2" '
+    'ON "captured_requests" ("host")',
+    """
+    CREATE TABLE IF NOT EXISTS "client_heartbeats" (
+        "instance_id" VARCHAR(64) NOT NULL PRIMARY KEY,
+        "hostname" VARCHAR(255) NOT NULL,
+        "pid" INT NOT NULL,
+        "smello_version" VARCHAR(50) NOT NULL,
+        "python_version" VARCHAR(50) NOT NULL,
+        "started_at" TIMESTAMP,
+        "last_seen" TIMESTAMP NOT NULL,
+        "stats" JSON NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "idx_client_hear_last_se_221575" '
+    'ON "client_heartbeats" ("last_seen")',
+]
+
+# (table, column, column definition) for columns that tables created by
+# older releases may lack
+_ADDED_COLUMNS = [
+    ("captured_requests", "request_body_truncated", "INT NOT NULL DEFAULT 0"),
+    ("captured_requests", "response_body_truncated", "INT NOT NULL DEFAULT 0"),
+    ("captured_requests", "sample_rate", "REAL NOT NULL DEFAULT 1"),
+    ("captured_requests", "dns_ms", "REAL"),
+    ("captured_requests", "connect_ms", "REAL"),
+    ("captured_requests", "tls_ms", "REAL"),
+    ("captured_requests", "ttfb_ms", "REAL"),
+    ("captured_requests", "download_ms", "REAL"),
+    ("captured_requests", "connection_reused", "INT"),
+    ("captured_requests", "pool_wait_ms", "REAL"),
+    ("captured_requests", "client_id", "VARCHAR(64)"),
+    ("captured_requests", "pool_size", "INT"),
+]
+
+
+async def _baseline(conn: BaseDBAsyncClient, options: MigrationOptions) -> None:
+    """Create the tables, or add the columns older releases lack."""
+    for statement in _BASELINE_TABLES:
+        await conn.execute_query(statement)
+    columns: dict[str, set[str]] = {}
+    for table, column, definition in _ADDED_COLUMNS:
+        if table not in columns:
+            _, rows = await conn.execute_query(f'PRAGMA table_info("{table}")')
+            columns[table] = {row["name"] for row in rows}
+        if column not in columns[table]:
+            await conn.execute_query(
+                f'ALTER TABLE "{table}" ADD COLUMN "{column}" {definition}'
+            )
+
+
+async def _list_indexes(conn: BaseDBAsyncClient, options: MigrationOptions) -> None:
+    """Index the list filters together with the timestamp they sort by."""
+    # Covered by the (host, timestamp) index
+    await conn.execute_query('DROP INDEX IF EXISTS "idx_captured_re_host_6db6f2"')
+    for name, columns in [
+        ("idx_captured_requests_timestamp", '"timestamp"'),
+        ("idx_captured_requests_host_timestamp", '"host", "timestamp"'),
+        ("idx_captured_requests_status_timestamp", '"status_code", "timestamp"'),
+        ("idx_captured_requests_method_timestamp", '"method", "timestamp"'),
+    ]:
+        await conn.execute_query(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "captured_requests" ({columns})'
+        )
+
+
+async def _search_index(conn: BaseDBAsyncClient, options: MigrationOptions) -> None:
+    """Create the full-text index and fill it from the stored captures.
+
+    New captures are indexed by the trigger that
+    :func:`smello_server.search.install_trigger` installs on start; both
+    apply the configured per-body cap.
+    """
+    await conn.execute_query(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS "captured_requests_fts" USING fts5(
+            "url", "headers", "request_body", "response_body", content=''
+        )
+        """
+    )
+    await index_existing(conn, options.search_max_body_chars)
+
+
+async def _cursor_indexes(conn: BaseDBAsyncClient, options: MigrationOptions) -> None:
+    """Extend the list indexes with ``id``, the tie-breaker of list cursors."""
+    for old, name, columns in [
+        (
+            "idx_captured_requests_timestamp",
+            "idx_captured_requests_timestamp_id",
+            '"timestamp", "id"',
+        ),
+        (
+            "idx_captured_requests_host_timestamp",
+            "idx_captured_requests_host_timestamp_id",
+            '"host", "timestamp", "id"',
+        ),
+        (
+            "idx_captured_requests_status_timestamp",
+            "idx_captured_requests_status_timestamp_id",
+            '"status_code", "timestamp", "id"',
+        ),
+        (
+            "idx_captured_requests_method_timestamp",
+            "idx_captured_requests_method_timestamp_id",
+            '"method", "timestamp", "id"',
+        ),
+    ]:
+        await conn.execute_query(f'DROP INDEX IF EXISTS "{old}"')
+        await conn.execute_query(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "captured_requests" ({columns})'
+        )
+
+
+# MIGRATIONS[n] brings the schema from version n to n + 1
+MIGRATIONS: list[Callable[[BaseDBAsyncClient, MigrationOptions], Awaitable[None]]] = [
+    _baseline,
+    _list_indexes,
+    _search_index,
+    _cursor_indexes,
+]
+
+
+async def schema_version() -> int:
+    conn = connections.get("default")
+    _, rows = await conn.execute_query("PRAGMA user_version")
+    return rows[0][0]
+
+
+async def migrate(options: MigrationOptions | None = None) -> None:
+    """Apply the migrations the database hasn't seen yet."""
+    options = options or MigrationOptions()
+    version = await schema_version()
+    if version > len(MIGRATIONS):
+        logger.warning(
+            "Database schema version %d is newer than this server (%d)",
+            version,
+            len(MIGRATIONS),
+        )
+        return
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        async with in_transaction("default") as conn:
+            await migration(conn, options)
+            await conn.execute_query(f"PRAGMA user_version = {number}")
+        logger.info("Migrated the database to schema version %d", number)
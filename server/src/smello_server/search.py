@@ -0,0 +1,167 @@
+"""Full-text search over captured URLs, header values and bodies.
+
+``captured_requests_fts`` is a contentless FTS5 table: it holds the
+index only, not a copy of the text, and its rows share the ``rowid`` of
+their capture.  (The server never runs ``VACUUM``, which could renumber
+those.)  An insert trigger fills it in the transaction that stores the
+capture, so direct, batch and buffered ingest all keep it current.  The
+trigger is installed on every start with the configured per-body cap;
+text past the cap is stored in the capture but not searchable.
+"""
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from smello_server.models import CapturedRequest
+
+# 0 indexes whole bodies
+DEFAULT_MAX_BODY_CHARS = 0
+
+_TRIGGER = "captured_requests_fts_insert"
+
+# bm25 column weights: url, headers, request body, response body.  A match in the URL ranks above one deep in a body.
+_RANK = 'bm25("captured_requests_fts", 4, 2, 1, 1)'
+
+
+def _header_values(column: str) -> str:
+    return f"(SELECT group_concat(value, ' ') FROM json_each({column}))"
+
+
+def _body(column: str, max_chars: int) -> str:
+    return f"substr({column}, 1, {max_chars})" if max_chars > 0 else column
+
+
+async def install_trigger(max_body_chars: int = DEFAULT_MAX_BODY_CHARS) -> None:
+    """(Re)create the trigger that indexes new captures."""
+    async with in_transaction("default") as conn:
+        await conn.execute_query(f'DROP TRIGGER IF EXISTS "{_TRIGGER}"')
+        await conn.execute_query(
+            f"""
+            CREATE TRIGGER "{_TRIGGER}" AFTER INSERT ON "captured_requests"
+            BEGIN
+                INSERT INTO "captured_requests_fts"
+                    ("rowid", "url", "headers", "request_body", "response_body")
+                VALUES (
+                    new."rowid",
+                    new."url",
+                    {_header_values('new."request_headers"')} || ' ' ||
+                    {_header_values('new."response_headers"')},
+                    {_body('new."request_body"', max_body_chars)},
+                    {_body('new."response_body"', max_body_chars)}
+                );
+            END
+            """
+        )
+
+
+async def index_existing(
+    conn: BaseDBAsyncClient, max_body_chars: int = DEFAULT_MAX_BODY_CHARS
+) -> None:
+    """Index the stored captures the way the trigger indexes new ones."""
+    await conn.execute_query(
+        f"""
+        INSERT INTO "captured_requests_fts"
+            ("rowid", "url", "headers", "request_body", "response_body")
+        SELECT
+            "rowid",
+            "url",
+            {_header_values('"request_headers"')} || ' ' ||
+            {_header_values('"response_headers"')},
+            {_body('"request_body"', max_body_chars)},
+            {_body('"response_body"', max_body_chars)}
+        FROM "captured_requests"
+        """
+    )
+
+
+async def clear_index(conn: BaseDBAsyncClient) -> None:
+    """Empty the index; call it where all captures are deleted."""
+    # A contentless table can't find the rows to delete; drop them all
+    await conn.execute_query(
+        'INSERT INTO "captured_requests_fts" ("captured_requests_fts") '
+        "VALUES ('delete-all')"
+    )
+
+
+def match_query(q: str) -> str:
+    """Turn free text into an FTS5 query matching all of its words.
+
+    Each word is quoted, so FTS5 operators and punctuation in user input
+    are searched for rather than parsed; a trailing ``*`` keeps its
+    prefix meaning.  ``ord_123`` matches the adjacent tokens ``ord 123``.
+    """
+    terms = []
+    for word in q.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if not word:
+            continue
+        quoted = '"' + word.replace('"', '""') + '"'
+        terms.append(quoted + "*" if prefix else quoted)
+    return " ".join(terms)
+
+
+async def search_ids(
+    q: str,
+    host: str | None = None,
+    method: str | None = None,
+    status: int | None = None,
+    search: str | None = None,
+    limit: int = 50,
+    db: BaseDBAsyncClient | None = None,
+) -> list[str]:
+    """Ids of the captures matching *q*, best match first.
+
+    The other arguments are the list filters of
+    :func:`smello_server.routes.api.filter_requests`.
+    """
+    query = match_query(q)
+    if not query:
+        return []
+    where = ['"captured_requests_fts" MATCH ?']
+    values: list = [query]
+    if host:
+        where.append('c."host" = ?')
+        values.append(host)
+    if method:
+        where.append('c."method" = ?')
+        values.append(method.upper())
+    if status:
+        where.append('c."status_code" = ?')
+        values.append(status)
+    if search:
+        where.append("c.\"url\" LIKE ? ESCAPE '\\'")
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        values.append(f"%{escaped}%")
+    values.append(limit)
+    db = db or connections.get("default")
+    _, rows = await db.execute_query(
+        f"""
+        SELECT c."id" FROM "captured_requests_fts"
+        JOIN "captured_requests" c ON c."rowid" = "captured_requests_fts"."rowid"
+        WHERE {" AND ".join(where)}
+        ORDER BY {_RANK}
+        LIMIT ?
+        """,
+        values,
+    )
+    return [row["id"] for row in rows]
+
+
+async def search_requests(
+    q: str,
+    host: str | None = None,
+    method: str | None = None,
+    status: int | None = None,
+    search: str | None = None,
+    limit: int = 50,
+    db: BaseDBAsyncClient | None = None,
+) -> list[CapturedRequest]:
+    """The captures matching *q*, best match first; see :func:`search_ids`."""
+    ids = await search_ids(q, host, method, status, search, limit, db)
+    qs = CapturedRequest.filter(id__in=ids)
+    if db is not None:
+        qs = qs.using_db(db)
+    found = {str(r.id): r for r in await qs}
+    return [found[i] for i in ids if i in found]
@@ -12,20 +12,29 @@ def _reset_tortoise_global_context():
 
 
 @pytest.fixture()
-def client(tmp_path):
-    """Create a TestClient with a fresh SQLite database."""
-    _reset_tortoise_global_context()
+def make_client(tmp_path):
+    """Factory fixture for TestClients of apps created with the given arguments.
 
-    db_url = f"sqlite://{tmp_path / 'test.db'}"
+    The apps share a fresh SQLite database unless ``db_url`` is given.  Use
+    the client as a context manager to run the app's startup and shutdown.
+    """
 
-    app = create_app(db_url=db_url)
-
-    with TestClient(app) as tc:
-        yield tc
+    def _make(**create_app_kwargs):
+        _reset_tortoise_global_context()
+        create_app_kwargs.setdefault("db_url", f"sqlite://{tmp_path / 'test.db'}")
+        return TestClient(create_app(**create_app_kwargs))
 
+    yield _make
     _reset_tortoise_global_context()
 
 
+@pytest.fixture()
+def client(make_client):
+    """Create a TestClient with a fresh SQLite database."""
+    with make_client() as tc:
+        yield tc
+
+
 @pytest.fixture()
 def sample_payload():
     """A reusable sample capture payload."""
@@ -1,5 +1,9 @@
 """Tests for the server API endpoints."""
 
+import sqlite3
+
+import pytest
+
 
 def test_capture_returns_201(client, sample_payload):
     resp = client.post("/api/capture", json=sample_payload)
@@ -41,6 +45,60 @@ def test_capture_uppercases_method(client, make_payload):
     assert data[0]["method"] == "POST"
 
 
+def test_capture_batch_stores_all(client, make_payload):
+    batch = [make_payload(method="GET"), make_payload(method="POST")]
+    resp = client.post("/api/capture/batch", json={"captures": batch})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["ok", "ok"]
+    assert all(r["id"] for r in results)
+    assert len(client.get("/api/requests").json()) == 2
+
+
+def test_capture_batch_reports_invalid_items(client, make_payload):
+    batch = [make_payload(), {"id": "broken", "request": {}}, make_payload()]
+    resp = client.post("/api/capture/batch", json={"captures": batch})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["ok", "invalid", "ok"]
+    assert results[1]["id"] == "broken"
+    assert results[1]["error"]
+    assert len(client.get("/api/requests").json()) == 2
+
+
+def test_capture_batch_duplicate_id_is_invalid(client, sample_payload):
+    client.post("/api/capture", json=sample_payload)
+    resp = client.post(
+        "/api/capture/batch",
+        json={"captures": [sample_payload, {**sample_payload, "id": None}]},
+    )
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["invalid", "ok"]
+    assert len(client.get("/api/requests").json()) == 2
+
+
+def test_capture_batch_malformed_id_is_invalid(client, make_payload):
+    resp = client.post(
+        "/api/capture/batch", json={"captures": [make_payload(id="not-a-uuid")]}
+    )
+    results = resp.json()["results"]
+    assert results[0]["status"] == "invalid"
+    assert results[0]["id"] == "not-a-uuid"
+
+
+def test_capture_batch_rejects_oversized_batch(client, make_payload):
+    batch = [make_payload()] * 1001
+    resp = client.post("/api/capture/batch", json={"captures": batch})
+    assert resp.status_code == 422
+    assert client.get("/api/requests").json() == []
+
+
+def test_capture_batch_empty(client):
+    resp = client.post("/api/capture/batch", json={"captures": []})
+    assert resp.status_code == 200
+    assert resp.json() == {"results": []}
+
+
 def test_empty_list(client):
     resp = client.get("/api/requests")
     assert resp.status_code == 200
@@ -94,6 +152,69 @@ def test_limit(client, make_payload):
     assert len(data) == 2
 
 
+def _all_pages(client, **params):
+    pages = []
+    cursor = None
+    while True:
+        resp = client.get("/api/requests", params={**params, "cursor": cursor})
+        assert resp.status_code == 200
+        pages.append([r["id"] for r in resp.json()])
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_through_all_requests(client, make_payload):
+    for i in range(7):
+        client.post("/api/capture", json=make_payload(url=f"https://a.com/{i}"))
+    newest_first = [r["id"] for r in client.get("/api/requests").json()]
+
+    pages = _all_pages(client, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == newest_first
+
+
+def test_cursor_breaks_timestamp_ties_by_id(client, make_payload, tmp_path):
+    for _ in range(5):
+        client.post("/api/capture", json=make_payload())
+    with sqlite3.connect(tmp_path / "test.db") as conn:
+        conn.execute(
+            "UPDATE captured_requests SET timestamp = "
+            "(SELECT min(timestamp) FROM captured_requests)"
+        )
+
+    ids = sum(_all_pages(client, limit=2), [])
+
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 5
+
+
+def test_cursor_keeps_filters(client, make_payload):
+    for i in range(4):
+        client.post("/api/capture", json=make_payload(url="https://a.com/"))
+        client.post("/api/capture", json=make_payload(url="https://b.com/"))
+
+    pages = _all_pages(client, host="a.com", limit=3)
+
+    assert [len(page) for page in pages] == [3, 1]
+
+
+def test_no_cursor_on_last_page(client, make_payload):
+    for _ in range(2):
+        client.post("/api/capture", json=make_payload())
+
+    resp = client.get("/api/requests", params={"limit": 2})
+
+    assert "X-Next-Cursor" not in resp.headers
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "W10", "WyJ4IiwgInkiXQ"])
+def test_invalid_cursor_is_rejected(client, cursor):
+    resp = client.get("/api/requests", params={"cursor": cursor})
+    assert resp.status_code == 400
+
+
 def test_get_request_detail(client, sample_payload):
     client.post("/api/capture", json=sample_payload)
     resp = client.get(f"/api/requests/{sample_payload['id']}")
@@ -105,9 +226,127 @@ def test_get_request_detail(client, sample_payload):
     assert data["request_headers"] == {"Content-Type": "application/json"}
     assert data["response_body"] == '{"result": "success"}'
     assert data["response_body_size"] == 21
+    assert data["response_body_truncated"] is False
     assert data["library"] == "requests"
 
 
+def test_truncated_flag_is_stored(client, sample_payload):
+    sample_payload["response"]["body"] = '{"result": "succ'
+    sample_payload["response"]["body_size"] = 2048
+    sample_payload["response"]["truncated"] = True
+    client.post("/api/capture", json=sample_payload)
+
+    data = client.get(f"/api/requests/{sample_payload['id']}").json()
+    assert data["request_body_truncated"] is False
+    assert data["response_body_truncated"] is True
+    assert data["response_body_size"] == 2048
+
+
+def test_sample_rate_is_stored(client, sample_payload):
+    sample_payload["meta"]["sample_rate"] = 0.25
+    client.post("/api/capture", json=sample_payload)
+
+    assert client.get("/api/requests").json()[0]["sample_rate"] == 0.25
+    data = client.get(f"/api/requests/{sample_payload['id']}").json()
+    assert data["sample_rate"] == 0.25
+
+
+def test_sample_rate_defaults_to_one(client, sample_payload):
+    client.post("/api/capture", json=sample_payload)
+    data = client.get(f"/api/requests/{sample_payload['id']}").json()
+    assert data["sample_rate"] == 1.0
+
+
+def test_invalid_sample_rate_is_rejected(client, sample_payload):
+    sample_payload["meta"]["sample_rate"] = 0
+    assert client.post("/api/capture", json=sample_payload).status_code == 422
+
+
+def test_timings_are_stored(client, sample_payload):
+    sample_payload["timings"] = {
+        "pool_wait_ms": 0.5,
+        "dns_ms": 1.5,
+        "connect_ms": 12.25,
+        "tls_ms": None,
+        "ttfb_ms": 80.0,
+        "download_ms": 3.0,
+        "connection_reused": False,
+    }
+    client.post("/api/capture", json=sample_payload)
+
+    data = client.get(f"/api/requests/{sample_payload['id']}").json()
+    assert data["timings"] == sample_payload["timings"]
+
+
+def test_timings_are_optional(client, sample_payload):
+    client.post("/api/capture", json=sample_payload)
+
+    data = client.get(f"/api/requests/{sample_payload['id']}").json()
+    assert data["timings"] is None
+
+
+def test_client_identity_is_stored(client, sample_payload):
+    sample_payload["meta"]["client_id"] = "3f9a0c1b2d4e"
+    sample_payload["meta"]["pool_size"] = 10
+    client.post("/api/capture", json=sample_payload)
+
+    data = client.get(f"/api/requests/{sample_payload['id']}").json()
+    assert data["client_id"] == "3f9a0c1b2d4e"
+    assert data["pool_size"] == 10
+
+
+def _connection_payload(make_payload, host, reused, pool_wait_ms=0.1, client_id="a"):
+    return make_payload(
+        url=f"https://{host}/v1",
+        timings={"connection_reused": reused, "pool_wait_ms": pool_wait_ms},
+        meta={"library": "requests", "client_id": client_id},
+    )
+
+
+def test_hosts_flags_new_connections(client, make_payload):
+    for i in range(10):
+        # A client per call: every call opens a connection
+        payload = _connection_payload(
+            make_payload, "churn.example.com", False, client_id=str(i)
+        )
+        client.post("/api/capture", json=payload)
+    for i in range(10):
+        payload = _connection_payload(make_payload, "pooled.example.com", i == 0)
+        client.post("/api/capture", json=payload)
+    for i in range(10):
+        payload = _connection_payload(make_payload, "fine.example.com", i != 0)
+        client.post("/api/capture", json=payload)
+
+    hosts = {h["host"]: h for h in client.get("/api/hosts").json()}
+    assert hosts["churn.example.com"]["flags"] == ["new_connections"]
+    assert hosts["churn.example.com"]["new_connection_ratio"] == 1.0
+    assert hosts["churn.example.com"]["clients"] == 10
+    assert hosts["pooled.example.com"]["flags"] == ["new_connections"]
+    assert hosts["pooled.example.com"]["clients"] == 1
+    assert hosts["fine.example.com"]["flags"] == []
+    assert hosts["fine.example.com"]["new_connections"] == 1
+
+
+def test_hosts_flags_pool_wait(client, make_payload):
+    for _ in range(10):
+        payload = _connection_payload(make_payload, "busy.example.com", True, 50.0)
+        client.post("/api/capture", json=payload)
+
+    [host] = client.get("/api/hosts").json()
+    assert host["flags"] == ["pool_wait"]
+    assert host["avg_pool_wait_ms"] == 50.0
+
+
+def test_hosts_needs_enough_calls_to_flag(client, make_payload):
+    payload = _connection_payload(make_payload, "rare.example.com", False, 50.0)
+    client.post("/api/capture", json=payload)
+    client.post("/api/capture", json=make_payload(url="https://grpc.example.com/"))
+
+    [host] = client.get("/api/hosts").json()
+    assert host["host"] == "rare.example.com"
+    assert host["flags"] == []
+
+
 def test_get_request_not_found(client):
     resp = client.get("/api/requests/550e8400-e29b-41d4-a716-446655440000")
     assert resp.status_code == 404
@@ -120,3 +359,43 @@ def test_clear_all(client, sample_payload):
     resp = client.delete("/api/requests")
     assert resp.status_code == 204
     assert len(client.get("/api/requests").json()) == 0
+
+
+def _heartbeat(**overrides):
+    heartbeat = {
+        "instance_id": "4f2c0a8e",
+        "hostname": "web-1",
+        "pid": 1234,
+        "smello_version": "0.3.1",
+        "python_version": "3.13.1",
+        "started_at": 1760000000.0,
+        "stats": {"captures_enqueued": 10, "queue": {"queued_items": 0}},
+    }
+    heartbeat.update(overrides)
+    return heartbeat
+
+
+def test_heartbeat_is_stored(client):
+    resp = client.post("/api/heartbeat", json=_heartbeat())
+    assert resp.status_code == 202
+
+    clients = client.get("/api/clients").json()
+    assert len(clients) == 1
+    assert clients[0]["instance_id"] == "4f2c0a8e"
+    assert clients[0]["hostname"] == "web-1"
+    assert clients[0]["stats"]["captures_enqueued"] == 10
+
+
+def test_heartbeat_replaces_previous_one(client):
+    client.post("/api/heartbeat", json=_heartbeat())
+    client.post("/api/heartbeat", json=_heartbeat(stats={"captures_enqueued": 25}))
+    client.post("/api/heartbeat", json=_heartbeat(instance_id="other"))
+
+    clients = {c["instance_id"]: c for c in client.get("/api/clients").json()}
+    assert set(clients) == {"other", "4f2c0a8e"}
+    assert clients["4f2c0a8e"]["stats"] == {"captures_enqueued": 25}
+
+
+def test_heartbeat_requires_instance_id(client):
+    resp = client.post("/api/heartbeat", json=_heartbeat(instance_id=""))
+    assert resp.status_code == 422
@@ -0,0 +1,51 @@
+"""Tests for the SQLite profile and the reader connections."""
+
+import pytest
+from smello_server.database import SqliteSettings, reader
+from tortoise import connections
+from tortoise.exceptions import OperationalError
+
+
+async def _pragma(conn, name):
+    _, rows = await conn.execute_query(f"PRAGMA {name}")
+    return rows[0][0]
+
+
+def test_pragmas_are_applied(make_client):
+    with make_client(sqlite=SqliteSettings(cache_size_mb=8, mmap_size_mb=16)) as client:
+        writer = client.portal.call(connections.get, "default")
+        for conn in (writer, client.portal.call(reader)):
+            assert client.portal.call(_pragma, conn, "journal_mode") == "wal"
+            assert client.portal.call(_pragma, conn, "synchronous") == 1  # NORMAL
+            assert client.portal.call(_pragma, conn, "temp_store") == 2  # MEMORY
+            assert client.portal.call(_pragma, conn, "cache_size") == -8192
+            assert client.portal.call(_pragma, conn, "mmap_size") == 16 * 1024 * 1024
+
+
+def test_readers_are_read_only(make_client, sample_payload):
+    with make_client(sqlite=SqliteSettings(readers=2)) as client:
+        client.post("/api/capture", json=sample_payload)
+        conn = client.portal.call(reader)
+
+        assert conn is not client.portal.call(connections.get, "default")
+        with pytest.raises(OperationalError):
+            client.portal.call(conn.execute_script, 'DELETE FROM "captured_requests"')
+        assert len(client.get("/api/requests").json()) == 1
+
+
+def test_readers_are_used_in_turn(make_client):
+    with make_client(sqlite=SqliteSettings(readers=2)) as client:
+        first, second, third = (client.portal.call(reader) for _ in range(3))
+
+    assert first is not second
+    assert third is first
+
+
+def test_without_readers_queries_use_the_writer(make_client, sample_payload):
+    with make_client(sqlite=SqliteSettings(readers=0)) as client:
+        client.post("/api/capture", json=sample_payload)
+
+        assert client.portal.call(reader) is client.portal.call(
+            connections.get, "default"
+        )
+        assert len(client.get("/api/requests").json()) == 1
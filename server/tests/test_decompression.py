@@ -0,0 +1,76 @@
+"""Tests for compressed request bodies (RequestDecompressionMiddleware)."""
+
+import gzip
+import json
+
+import pytest
+from smello_server.app import zstd
+
+
+@pytest.fixture()
+def small_limit_client(make_client):
+    """A client whose server accepts at most 2 KiB of decompressed body."""
+    with make_client(max_request_bytes=2048) as tc:
+        yield tc
+
+
+def _post_encoded(client, path, encoding, data):
+    return client.post(
+        path,
+        content=data,
+        headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+    )
+
+
+def test_gzip_capture_is_stored(client, sample_payload):
+    data = gzip.compress(json.dumps(sample_payload).encode())
+    resp = _post_encoded(client, "/api/capture", "gzip", data)
+    assert resp.status_code == 201
+    assert client.get("/api/requests").json()[0]["id"] == sample_payload["id"]
+
+
+def test_gzip_batch_is_stored(client, make_payload):
+    body = {"captures": [make_payload(), make_payload()]}
+    data = gzip.compress(json.dumps(body).encode())
+    resp = _post_encoded(client, "/api/capture/batch", "gzip", data)
+    assert resp.status_code == 200
+    assert len(client.get("/api/requests").json()) == 2
+
+
+@pytest.mark.skipif(zstd is None, reason="zstd needs Python 3.14+")
+def test_zstd_capture_is_stored(client, sample_payload):
+    data = zstd.compress(json.dumps(sample_payload).encode())
+    resp = _post_encoded(client, "/api/capture", "zstd", data)
+    assert resp.status_code == 201
+
+
+def test_unsupported_encoding_returns_415(client, sample_payload):
+    resp = _post_encoded(client, "/api/capture", "br", b"\x00")
+    assert resp.status_code == 415
+
+
+def test_malformed_gzip_returns_400(client, sample_payload):
+    resp = _post_encoded(client, "/api/capture", "gzip", b"nope")
+    assert resp.status_code == 400
+
+
+def test_truncated_gzip_returns_400(client, sample_payload):
+    data = gzip.compress(json.dumps(sample_payload).encode())[:-10]
+    resp = _post_encoded(client, "/api/capture", "gzip", data)
+    assert resp.status_code == 400
+
+
+def test_oversized_decompressed_body_returns_413(small_limit_client, make_payload):
+    payload = make_payload()
+    payload["response"]["body"] = "x" * 100_000
+    data = gzip.compress(json.dumps(payload).encode())
+    assert len(data) < 2048
+
+    resp = _post_encoded(small_limit_client, "/api/capture", "gzip", data)
+    assert resp.status_code == 413
+    assert small_limit_client.get("/api/requests").json() == []
+
+
+def test_uncompressed_requests_still_work(client, sample_payload):
+    resp = client.post("/api/capture", json=sample_payload)
+    assert resp.status_code == 201
@@ -0,0 +1,144 @@
+"""Tests for the write-behind ingest buffer (--buffer-ingest)."""
+
+import asyncio
+import threading
+import time
+import uuid
+
+from smello_server.models import CapturedRequest
+
+
+def _wait_for_rows(client, count):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        rows = client.get("/api/requests").json()
+        if len(rows) >= count:
+            return rows
+        time.sleep(0.01)
+    raise AssertionError(f"expected {count} rows, got {len(rows)}")
+
+
+def test_capture_is_accepted_and_written_behind(make_client, sample_payload):
+    with make_client(buffer_ingest=True, flush_interval_ms=10) as client:
+        resp = client.post("/api/capture", json=sample_payload)
+        assert resp.status_code == 202
+
+        [row] = _wait_for_rows(client, 1)
+        assert row["id"] == sample_payload["id"]
+        stats = client.get("/api/ingest").json()
+    assert stats["mode"] == "buffered"
+    assert stats["committed"] == 1
+    assert stats["depth"] == 0
+
+
+def test_full_batch_is_committed_without_waiting(make_client, make_payload):
+    with make_client(
+        buffer_ingest=True, flush_interval_ms=60_000, flush_rows=5
+    ) as client:
+        for _ in range(5):
+            client.post("/api/capture", json=make_payload())
+
+        assert len(_wait_for_rows(client, 5)) == 5
+        assert client.get("/api/ingest").json()["flushes"] == 1
+
+
+def test_buffered_rows_are_flushed_on_shutdown(make_client, make_payload):
+    with make_client(buffer_ingest=True, flush_interval_ms=60_000) as client:
+        for _ in range(3):
+            client.post("/api/capture", json=make_payload())
+        assert client.get("/api/ingest").json()["depth"] == 3
+
+    with make_client() as client:
+        assert len(client.get("/api/requests").json()) == 3
+
+
+def test_shutdown_waits_for_the_flush_in_progress(
+    make_client, make_payload, monkeypatch
+):
+    started = threading.Event()
+    bulk_create = CapturedRequest.bulk_create
+
+    async def slow_bulk_create(cls, objects, *args, **kwargs):
+        started.set()
+        await asyncio.sleep(0.3)
+        return await bulk_create(objects, *args, **kwargs)
+
+    monkeypatch.setattr(CapturedRequest, "bulk_create", classmethod(slow_bulk_create))
+    with make_client(buffer_ingest=True, flush_interval_ms=1) as client:
+        for _ in range(5):
+            client.post("/api/capture", json=make_payload())
+        assert started.wait(5)
+        # Leaving the block calls stop() while the flush is running
+    stats = client.app.state.ingest.stats()
+
+    assert stats["committed"] == 5
+    assert stats["failed"] == 0
+    with make_client() as client:
+        assert len(client.get("/api/requests").json()) == 5
+
+
+def test_full_buffer_answers_503(make_client, make_payload):
+    with make_client(
+        buffer_ingest=True, buffer_size=2, flush_interval_ms=60_000
+    ) as client:
+        statuses = [
+            client.post("/api/capture", json=make_payload()).status_code
+            for _ in range(3)
+        ]
+        stats = client.get("/api/ingest").json()
+
+    assert statuses == [202, 202, 503]
+    assert stats["rejected"] == 1
+
+
+def test_batch_is_buffered_item_by_item(make_client, make_payload):
+    with make_client(
+        buffer_ingest=True, buffer_size=1, flush_interval_ms=60_000
+    ) as client:
+        resp = client.post(
+            "/api/capture/batch",
+            json={"captures": [make_payload(), {"bad": "item"}, make_payload()]},
+        )
+
+    assert resp.status_code == 202
+    assert [r["status"] for r in resp.json()["results"]] == ["ok", "invalid", "error"]
+
+
+def test_item_rejected_by_a_full_buffer_can_be_retried(make_client, make_payload):
+    with make_client(
+        buffer_ingest=True, buffer_size=1, flush_interval_ms=60_000, flush_rows=1
+    ) as client:
+        first, second = make_payload(), make_payload(id=str(uuid.uuid4()))
+        resp = client.post("/api/capture/batch", json={"captures": [first, second]})
+        assert [r["status"] for r in resp.json()["results"]] == ["ok", "error"]
+
+        _wait_for_rows(client, 1)
+        retry = client.post("/api/capture/batch", json={"captures": [second]})
+        assert [r["status"] for r in retry.json()["results"]] == ["ok"]
+        rows = _wait_for_rows(client, 2)
+
+    assert second["id"] in [row["id"] for row in rows]
+
+
+def test_duplicate_id_drops_only_that_capture(make_client, make_payload):
+    same_id = str(uuid.uuid4())
+    with make_client(buffer_ingest=True, flush_interval_ms=60_000) as client:
+        client.post(
+            "/api/capture/batch",
+            json={
+                "captures": [
+                    make_payload(id=same_id),
+                    make_payload(id=same_id),
+                    make_payload(),
+                ]
+            },
+        )
+        stats = client.get("/api/ingest").json()
+
+    with make_client() as client:
+        assert len(client.get("/api/requests").json()) == 2
+    assert stats["depth"] == 3
+
+
+def test_direct_mode_reports_no_buffer(client):
+    assert client.get("/api/ingest").json()["mode"] == "direct"
@@ -0,0 +1,161 @@
+"""Tests for schema migrations and the indexes behind the list queries."""
+
+import sqlite3
+
+import pytest
+from smello_server.models import CapturedRequest
+from smello_server.routes.api import after_cursor, encode_cursor, filter_requests
+from smello_server.schema import MIGRATIONS
+from tortoise import connections
+
+# captured_requests as created before the truncation flags were added
+_OLD_TABLE = """
+CREATE TABLE "captured_requests" (
+    "id" CHAR(36) NOT NULL PRIMARY KEY,
+    "timestamp" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "duration_ms" INT NOT NULL,
+    "method" VARCHAR(10) NOT NULL,
+    "url" TEXT NOT NULL,
+    "request_headers" JSON NOT NULL,
+    "request_body" TEXT,
+    "request_body_size" INT NOT NULL DEFAULT 0,
+    "status_code" INT NOT NULL,
+    "response_headers" JSON NOT NULL,
+    "response_body" TEXT,
+    "response_body_size" INT NOT NULL DEFAULT 0,
+    "host" VARCHAR(255) NOT NULL,
+    "library" VARCHAR(50) NOT NULL
+);
+"""
+
+
+def test_missing_columns_are_added(tmp_path, make_client, sample_payload):
+    db_path = tmp_path / "old.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(_OLD_TABLE)
+
+    with make_client(db_url=f"sqlite://{db_path}") as client:
+        sample_payload["response"]["truncated"] = True
+        sample_payload["meta"]["sample_rate"] = 0.5
+        sample_payload["timings"] = {"ttfb_ms": 42.0, "connection_reused": True}
+        assert client.post("/api/capture", json=sample_payload).status_code == 201
+        data = client.get(f"/api/requests/{sample_payload['id']}").json()
+
+    assert data["response_body_truncated"] is True
+    assert data["sample_rate"] == 0.5
+    assert data["timings"]["ttfb_ms"] == 42.0
+    assert data["timings"]["connection_reused"] is True
+
+
+def _user_version(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_new_database_is_at_latest_version(client, tmp_path):
+    assert _user_version(tmp_path / "test.db") == len(MIGRATIONS)
+
+
+def test_old_database_is_migrated_in_place(tmp_path, make_client):
+    db_path = tmp_path / "old.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(_OLD_TABLE)
+        conn.execute(
+            "INSERT INTO captured_requests VALUES "
+            "('550e8400-e29b-41d4-a716-446655440001', '2025-01-01 00:00:00', 5,"
+            " 'GET', 'https://old.example.com/', '{}', NULL, 0, 200, '{}', NULL,"
+            " 0, 'old.example.com', 'requests')"
+        )
+
+    for _ in range(2):  # the second start finds nothing to do
+        with make_client(db_url=f"sqlite://{db_path}") as client:
+            rows = client.get("/api/requests").json()
+            found = client.get("/api/requests", params={"q": "old"}).json()
+
+    assert [r["host"] for r in rows] == ["old.example.com"]
+    # Captures stored before the search index existed are indexed too
+    assert [r["host"] for r in found] == ["old.example.com"]
+    assert _user_version(db_path) == len(MIGRATIONS)
+    with sqlite3.connect(db_path) as conn:
+        indexes = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+                " AND tbl_name = 'captured_requests'"
+            )
+        }
+    assert "idx_captured_requests_host_timestamp_id" in indexes
+
+
+def test_search_backfill_applies_the_body_cap(tmp_path, make_client):
+    db_path = tmp_path / "old.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(_OLD_TABLE)
+        conn.execute(
+            "INSERT INTO captured_requests VALUES "
+            "('550e8400-e29b-41d4-a716-446655440001', '2025-01-01 00:00:00', 5,"
+            " 'GET', 'https://old.example.com/', '{}', NULL, 0, 200, '{}', ?,"
+            " 0, 'old.example.com', 'requests')",
+            ("early words " + "x" * 100 + " late words",),
+        )
+
+    db_url = f"sqlite://{db_path}"
+    with make_client(db_url=db_url, search_max_body_chars=20) as client:
+        early = client.get("/api/requests", params={"q": "early"}).json()
+        late = client.get("/api/requests", params={"q": "late"}).json()
+
+    assert len(early) == 1
+    assert late == []
+
+
+async def _query_plan(filters: dict, cursor: str | None = None) -> str:
+    qs = filter_requests(CapturedRequest.all(), **filters)
+    if cursor:
+        qs = after_cursor(qs, cursor)
+    qs = qs.limit(50)
+    _, rows = await connections.get("default").execute_query(
+        f"EXPLAIN QUERY PLAN {qs.sql(params_inline=True)}"
+    )
+    return "\n".join(row["detail"] for row in rows)
+
+
+@pytest.mark.parametrize(
+    ("filters", "index"),
+    [
+        ({}, "idx_captured_requests_timestamp_id"),
+        ({"host": "api.example.com"}, "idx_captured_requests_host_timestamp_id"),
+        ({"method": "post"}, "idx_captured_requests_method_timestamp_id"),
+        ({"status": 500}, "idx_captured_requests_status_timestamp_id"),
+        ({"search": "checkout"}, "idx_captured_requests_timestamp_id"),
+    ],
+)
+def test_list_filters_use_an_index(client, filters, index):
+    plan = client.portal.call(_query_plan, filters)
+
+    assert f"USING INDEX {index}" in plan
+    # Rows come out of the index in order; no sort step
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize(
+    ("filters", "index"),
+    [
+        ({}, "idx_captured_requests_timestamp_id"),
+        ({"host": "api.example.com"}, "idx_captured_requests_host_timestamp_id"),
+        ({"status": 500}, "idx_captured_requests_status_timestamp_id"),
+    ],
+)
+def test_cursor_pages_seek_into_the_index(client, sample_payload, filters, index):
+    client.post("/api/capture", json=sample_payload)
+    cursor = client.portal.call(_cursor_of, sample_payload["id"])
+
+    plan = client.portal.call(_query_plan, filters, cursor)
+
+    # Starts at the cursor instead of skipping the rows before it
+    assert f"SEARCH captured_requests USING INDEX {index}" in plan
+    assert "timestamp<" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+async def _cursor_of(request_id: str) -> str:
+    return encode_cursor(await CapturedRequest.get(id=request_id))
@@ -0,0 +1,159 @@
+"""Tests for full-text search over captures."""
+
+import sqlite3
+
+import pytest
+from smello_server.search import match_query
+
+
+def _search(client, q, **params):
+    return client.get("/api/requests", params={"q": q, **params}).json()
+
+
+def test_matches_url_headers_and_bodies(client, make_payload):
+    payload = make_payload(url="https://api.example.com/v1/orders")
+    payload["request"]["headers"]["X-Request-Id"] = "req-7f3a9c"
+    payload["request"]["body"] = '{"customer": "cus_LkQ81"}'
+    payload["response"]["body"] = '{"error": "card_declined"}'
+    client.post("/api/capture", json=payload)
+    client.post("/api/capture", json=make_payload(url="https://other.example.com/"))
+
+    for q in ["orders", "7f3a9c", "cus_LkQ81", "card_declined"]:
+        assert [r["url"] for r in _search(client, q)] == [
+            "https://api.example.com/v1/orders"
+        ], q
+
+
+def test_header_names_are_not_indexed(client, make_payload):
+    client.post("/api/capture", json=make_payload())
+
+    assert _search(client, "Content-Type") == []
+
+
+def test_all_words_must_match(client, make_payload):
+    client.post("/api/capture", json=make_payload(url="https://a.example.com/refunds"))
+    client.post("/api/capture", json=make_payload(url="https://b.example.com/charges"))
+
+    assert [r["host"] for r in _search(client, "example refunds")] == ["a.example.com"]
+
+
+def test_prefix_search(client, make_payload):
+    client.post("/api/capture", json=make_payload(url="https://a.example.com/invoices"))
+
+    assert len(_search(client, "invoi*")) == 1
+    assert _search(client, "invoi") == []
+
+
+def test_url_matches_rank_above_body_matches(client, make_payload):
+    in_body = make_payload(url="https://a.example.com/items")
+    in_body["response"]["body"] = '{"note": "see the webhook settings"}'
+    client.post("/api/capture", json=in_body)
+    client.post("/api/capture", json=make_payload(url="https://b.example.com/webhook"))
+
+    assert [r["host"] for r in _search(client, "webhook")] == [
+        "b.example.com",
+        "a.example.com",
+    ]
+
+
+def test_combines_with_list_filters(client, make_payload):
+    client.post("/api/capture", json=make_payload(url="https://a.example.com/sync"))
+    client.post(
+        "/api/capture",
+        json=make_payload(method="POST", url="https://a.example.com/sync"),
+    )
+    client.post(
+        "/api/capture",
+        json=make_payload(url="https://b.example.com/sync", status_code=500),
+    )
+
+    assert len(_search(client, "sync")) == 3
+    assert len(_search(client, "sync", host="a.example.com")) == 2
+    assert len(_search(client, "sync", method="post")) == 1
+    assert len(_search(client, "sync", status=500)) == 1
+    assert len(_search(client, "sync", search="b.example")) == 1
+    assert len(_search(client, "sync", limit=2)) == 2
+
+
+@pytest.mark.parametrize("q", ['"', "NOT", "a:b", "(x", "*", "x OR"])
+def test_query_syntax_in_input_is_searched_for(client, make_payload, q):
+    client.post("/api/capture", json=make_payload())
+
+    assert client.get("/api/requests", params={"q": q}).status_code == 200
+
+
+@pytest.mark.parametrize(
+    ("q", "expected"),
+    [
+        ("orders", '"orders"'),
+        ("ord_123 refund", '"ord_123" "refund"'),
+        ("inv*", '"inv"*'),
+        ('say "hi"', '"say" """hi"""'),
+        ("  ", ""),
+        ("*", ""),
+    ],
+)
+def test_match_query(q, expected):
+    assert match_query(q) == expected
+
+
+def test_clear_all_empties_the_index(client, sample_payload):
+    client.post("/api/capture", json=sample_payload)
+    client.delete("/api/requests")
+
+    assert _search(client, "success") == []
+    client.post("/api/capture", json=sample_payload)
+    assert len(_search(client, "success")) == 1
+
+
+def test_buffered_captures_are_indexed(make_client, make_payload):
+    with make_client(buffer_ingest=True) as client:
+        batch = [make_payload(url=f"https://api.example.com/job/{i}") for i in range(3)]
+        client.post("/api/capture/batch", json={"captures": batch})
+
+    with make_client() as client:
+        assert len(_search(client, "job")) == 3
+
+
+def test_body_cap_limits_what_is_searchable(make_client, make_payload):
+    with make_client(search_max_body_chars=20) as client:
+        payload = make_payload()
+        payload["response"]["body"] = "early words " + "x" * 100 + " late words"
+        client.post("/api/capture", json=payload)
+
+        assert len(_search(client, "early")) == 1
+        assert _search(client, "late") == []
+        # The stored body is complete
+        detail = client.get(f"/api/requests/{_search(client, 'early')[0]['id']}")
+        assert detail.json()["response_body"].endswith("late words")
+
+
+def test_index_keeps_no_copy_of_the_text(client, tmp_path, make_payload):
+    payload = make_payload()
+    payload["response"]["body"] = '{"token": "tok_needle"}'
+    client.post("/api/capture", json=payload)
+
+    assert len(_search(client, "tok_needle")) == 1
+    with sqlite3.connect(tmp_path / "test.db") as conn:
+        tables = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        stored = conn.execute('SELECT "response_body" FROM "captured_requests_fts"')
+        assert stored.fetchall() == [(None,)]
+    assert "captured_requests_fts_content" not in tables
+
+
+def test_web_list_searches(client, make_payload):
+    payload = make_payload(url="https://a.example.com/1")
+    payload["response"]["body"] = '{"token": "tok_needle"}'
+    client.post("/api/capture", json=payload)
+    client.post("/api/capture", json=make_payload(url="https://b.example.com/2"))
+
+    resp = client.get("/", params={"q": "tok_needle"})
+
+    assert "a.example.com" in resp.text
+    assert "b.example.com/2" not in resp.text
+    assert 'value="tok_needle"' in resp.text
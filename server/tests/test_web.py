@@ -1,5 +1,10 @@
 """Tests for the server web UI routes."""
 
+import html
+import re
+
+from smello_server.routes.web import PAGE_SIZE
+
 
 def test_empty_state(client):
     resp = client.get("/")
@@ -74,6 +79,70 @@ def test_detail_page_renders(client, sample_payload):
     assert "msg_abc" in html
 
 
+def test_detail_page_marks_truncated_bodies(client, sample_payload):
+    sample_payload["request"]["body_size"] = 4096
+    sample_payload["request"]["truncated"] = True
+    sample_payload["response"]["body_size"] = 2048
+    sample_payload["response"]["truncated"] = True
+    client.post("/api/capture", json=sample_payload)
+
+    html = client.get(f"/requests/{sample_payload['id']}").text
+    assert "Request body not captured (4096 bytes)" in html
+    assert "Truncated by the client (2048 bytes in total)" in html
+
+
+def test_detail_page_shows_sample_rate(client, sample_payload):
+    sample_payload["meta"]["sample_rate"] = 0.05
+    client.post("/api/capture", json=sample_payload)
+
+    html = client.get(f"/requests/{sample_payload['id']}").text
+    assert "sampled at 5%" in html
+
+
+def test_detail_page_shows_timing_bar(client, sample_payload):
+    sample_payload["duration_ms"] = 100
+    sample_payload["timings"] = {
+        "connect_ms": 20.0,
+        "ttfb_ms": 50.0,
+        "download_ms": 5.0,
+        "connection_reused": False,
+    }
+    client.post("/api/capture", json=sample_payload)
+
+    html = client.get(f"/requests/{sample_payload['id']}").text
+    assert 'class="timing-connect" style="width: 20.00%"' in html
+    assert 'class="timing-ttfb" style="width: 50.00%"' in html
+    assert "timing-dns" not in html
+    assert "new connection" in html
+
+
+def test_detail_page_without_timings_has_no_bar(client, sample_payload):
+    client.post("/api/capture", json=sample_payload)
+
+    html = client.get(f"/requests/{sample_payload['id']}").text
+    assert "timing-bar" not in html
+
+
 def test_detail_page_missing_returns_error(client):
     resp = client.get("/requests/00000000-0000-0000-0000-000000000000")
     assert resp.status_code in (404, 500)
+
+
+def test_list_loads_older_requests_on_scroll(client, make_payload):
+    batch = [make_payload(url=f"https://a.com/item-{i}") for i in range(PAGE_SIZE + 5)]
+    client.post("/api/capture/batch", json={"captures": batch})
+
+    first = client.get("/", params={"host": "a.com"}).text
+    next_url = re.search(r'class="list-more"\s+hx-get="([^"]+)"', first).group(1)
+    rest = client.get(html.unescape(next_url)).text
+
+    assert len(re.findall(r'class="list-item[ "]', first)) == PAGE_SIZE
+    assert len(re.findall(r'class="list-item[ "]', rest)) == 5
+    assert "host=a.com" in html.unescape(next_url)
+    assert "list-more" not in rest
+
+
+def test_short_list_has_no_more_marker(client, make_payload):
+    client.post("/api/capture", json=make_payload())
+
+    assert "list-more" not in client.get("/").text